@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:02:31 2026
+
+#  Pipelined evaluation of a population of individuals: each evaluation is split in stages connected by bounded queues,
+#  so that different stages of different individuals run at the same time (e.g. the BEM solution of individual N+1
+#  while OpenFAST runs individual N). Each stage has its own number of workers (threads: the heavy work is done by
+#  Fortran/C libraries, DLLs and sub-processes) and the time spent by each stage is reported as utilisation.
+#  Contains:
+#  - class: EvalPipeline
+#  - functions: fowt_eval_pipeline
+
+@author: Guido Lazzerini
+
+"""
+import copy
+import os
+import queue
+import threading
+import time
+import traceback
+
+import simFOWT
+from resultstore import FailedEvaluation
+
+# Marker closing the queue of a stage
+_STOP = object()
+
+class EvalPipeline:
+
+    # stages (list) : list of (name, function, max_workers), function(item) returns the item passed to the next stage
+    # queue_size (int) : maximum number of items waiting in front of each stage, it limits the files/memory of the evaluations in progress
+    def __init__(self, stages, queue_size=1):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = {}
+
+    # Pass each item of "items" through all the stages, returns the list of outputs of the last stage in the order of "items"
+    # an item raising an exception in a stage skips the next stages and its output is None
+    def map(self, items):
+
+        items = list(items)
+        n_stages = len(self.stages)
+        queues = [queue.Queue(maxsize=self.queue_size) for kk in range(n_stages)]
+        results = [None]*len(items)
+        lock = threading.Lock()
+        running = [stage[2] for stage in self.stages]
+        self.stats = {stage[0]: {'workers': stage[2], 'items': 0, 'busy_time': 0.0, 'blocked_time': 0.0, 'errors': 0} for stage in self.stages}
+
+        def worker(kk):
+            name, function, max_workers = self.stages[kk]
+            stats = self.stats[name]
+            while True:
+                job = queues[kk].get()
+                if job is _STOP:
+                    break
+                index, item = job
+                t0 = time.perf_counter()
+                try:
+                    output = function(item)
+                    failed = False
+                except Exception:
+                    print('Error in stage "%s" of evaluation %d:' % (name, index))
+                    traceback.print_exc()
+                    output = None
+                    failed = True
+                t1 = time.perf_counter()
+                if failed or kk == n_stages-1:
+                    with lock:
+                        results[index] = output
+                else:
+                    # waiting here means that the next stage is the bottleneck
+                    queues[kk+1].put((index, output))
+                t2 = time.perf_counter()
+                with lock:
+                    stats['items'] += 1
+                    stats['busy_time'] += t1 - t0
+                    stats['blocked_time'] += t2 - t1
+                    stats['errors'] += int(failed)
+            # the last worker of a stage closes the queue of the next stage
+            with lock:
+                running[kk] -= 1
+                close_next = running[kk] == 0 and kk < n_stages-1
+            if close_next:
+                for jj in range(self.stages[kk+1][2]):
+                    queues[kk+1].put(_STOP)
+
+        def feeder():
+            for index, item in enumerate(items):
+                queues[0].put((index, item))
+            for jj in range(self.stages[0][2]):
+                queues[0].put(_STOP)
+
+        t_start = time.perf_counter()
+        threads = [threading.Thread(target=feeder, daemon=True)]
+        for kk in range(n_stages):
+            threads += [threading.Thread(target=worker, args=(kk,), daemon=True) for jj in range(self.stages[kk][2])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - t_start
+
+        for name, stats in self.stats.items():
+            stats['wall_time'] = wall_time
+            stats['utilisation'] = stats['busy_time']/(wall_time*stats['workers']) if wall_time > 0 else 0.0
+
+        return results
+
+    # Print (and optionally append to "filename") the utilisation of each stage in the last call of "map"
+    def report(self, filename=None):
+
+        lines = ['%-20s %8s %8s %12s %12s %12s' % ('stage', 'workers', 'items', 'busy [s]', 'blocked [s]', 'utilisation')]
+        for name, stats in self.stats.items():
+            lines.append('%-20s %8d %8d %12.1f %12.1f %11.1f%%' % (name, stats['workers'], stats['items'], stats['busy_time'],
+                                                                  stats['blocked_time'], 100*stats['utilisation']))
+        print('\n'.join(lines))
+
+        if filename is not None:
+            file_object = open(filename, 'a')
+            file_object.write('\n'.join(lines) + '\n')
+            file_object.close()
+
+        return self.stats
+
+# Pipeline of the stages of "simFOWT.eval_Fobj", "map" returns the same values of eval_Fobj for a list of design vectors
+# each individual is evaluated on its own copy of "model", so that the stages of different individuals do not share it
+# the workers of each stage are the maximum number of individuals in that stage at the same time:
+#   mooring_workers is 1 by default because MAP++ is called through a DLL, solver_workers limits the OpenFAST processes
+# designs rejected by the screening (surge constraint) skip all the other stages
+def fowt_eval_pipeline(model, evalTime=0, penaltyValue=9999.9, filepath_template=None,
+                       preprocess_workers=1, mooring_workers=1, solver_workers=1, postprocess_workers=1, queue_size=1):
+
+    if filepath_template is None:
+        filepath_template = os.getcwd() + '\\sims\\template_input_files'
+
+    def screening(xx):
+        passed, f_screen, K0 = simFOWT.eval_screening(xx, model, penaltyValue=penaltyValue, filepath_template=filepath_template)
+        return {'xx': xx, 'passed': passed, 'f_max': f_screen, 'K0': K0}
+
+    def preprocess(item):
+        if not item['passed']:
+            return {'f_max': item['f_max'], 'done': True}
+        ev = simFOWT.eval_preprocess(item['xx'], copy.deepcopy(model), filepath_template=filepath_template)
+        if ev == -1:
+            return ev
+        ev['K0'] = item['K0']
+        return simFOWT.eval_guarded(simFOWT.eval_mooring_check, ev, penaltyValue=penaltyValue)
+
+    def solver_run(ev):
+        if ev == -1:
+            return ev
+        return simFOWT.eval_guarded(simFOWT.eval_solver_run, ev)
+
+    def postprocess(ev):
+        if ev == -1:
+            return FailedEvaluation(1/penaltyValue)
+        return simFOWT.eval_postprocess(ev, evalTime=evalTime, penaltyValue=penaltyValue)
+
+    stages = [('screening', screening, mooring_workers),
+              ('preprocess', preprocess, preprocess_workers),
+              ('solver run', solver_run, solver_workers),
+              ('postprocess', postprocess, postprocess_workers)]
+
+    return EvalPipeline(stages, queue_size=queue_size)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:41:09 2026
+
+#  Scheduler of the evaluations of the optimization, passed to differential_evolution as "workers" (map-like callable).
+#  It knows the cost of the evaluation stages:
+#  - the OpenFAST/QBlade runs are limited, over all the workers, to the number of physical cores ("solver_slot"); on a dask
+#    cluster the limit is set for each machine and shared by its workers (workers joining the cluster later are not limited)
+#  - the BLAS threads of each worker are pinned, so that the numpy/Capytaine work of the workers does not oversubscribe the cores
+#  - the BEM jobs of each individual are the physical cores left to each worker ("bem_jobs_per_worker" of
+#    preproc_floatplat/floatplatcores.py, also used by the 'BEMWorkers' option through floatplatcapyhydrodyn.bem_n_jobs)
+#  Workers are local processes (multiprocessing) or the workers of a dask cluster: a LocalCluster on this machine or,
+#  with "scheduler_address", a cluster spread over several machines (dask is optional).
+#  Contains:
+#  - class: EvalScheduler
+#  - functions: solver_slot
+
+@author: Guido Lazzerini
+
+"""
+import contextlib
+import multiprocessing
+import os
+import threading
+
+from preproc_floatplat.floatplatcores import physical_cores, bem_jobs_per_worker
+
+# Environment variables of the thread pools of the BLAS/OpenMP libraries
+BLAS_THREADS_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS']
+
+# Semaphore limiting the OpenFAST/QBlade runs of this process, set in each worker by the scheduler (None means no limit)
+SOLVER_SLOTS = None
+
+# Context of a run of the simulation software: waits for a free slot if the runs are limited by the scheduler
+@contextlib.contextmanager
+def solver_slot():
+
+    if SOLVER_SLOTS is None:
+        yield
+        return
+
+    SOLVER_SLOTS.acquire()
+    try:
+        yield
+    finally:
+        SOLVER_SLOTS.release()
+
+def _init_worker(solver_slots, blas_threads):
+    global SOLVER_SLOTS
+    SOLVER_SLOTS = solver_slots
+
+    # the environment is inherited when the worker is started, threadpoolctl (optional) also limits libraries already loaded
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(blas_threads)
+    except ImportError:
+        pass
+
+# dask workers: "slots" (dict) is the number of solver slots of each worker (address as key), the tasks of a worker run
+# in threads of the same process
+def _init_dask_worker(slots, blas_threads, dask_worker=None):
+    _init_worker(threading.BoundedSemaphore(slots[dask_worker.address]), blas_threads)
+
+# Solver slots of each dask worker: the slots of each machine ("solver_slots" or its physical cores) are divided among its
+# workers, at least one slot per worker
+def _dask_worker_slots(client, solver_slots=None):
+
+    cores = client.run(physical_cores)
+    hosts = {}
+    for address, info in client.scheduler_info()['workers'].items():
+        hosts.setdefault(info['host'], []).append(address)
+
+    slots = {}
+    for host, addresses in hosts.items():
+        host_slots = min(solver_slots or cores[addresses[0]], cores[addresses[0]])
+        for kk, address in enumerate(sorted(addresses)):
+            slots[address] = max(1, host_slots // len(addresses) + int(kk < host_slots % len(addresses)))
+
+    return slots
+
+@contextlib.contextmanager
+def _blas_environ(blas_threads):
+
+    old_environ = {var: os.environ.get(var) for var in BLAS_THREADS_VARS}
+    for var in BLAS_THREADS_VARS:
+        os.environ[var] = str(blas_threads)
+    try:
+        yield
+    finally:
+        for var, value in old_environ.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+class EvalScheduler:
+
+    # n_workers (int) : individuals evaluated at the same time
+    # solver_slots (int) : maximum number of OpenFAST/QBlade runs at the same time (on each machine of a dask cluster),
+    #                      physical cores by default
+    # blas_threads (int) : BLAS threads of each worker
+    # backend (string) : 'processes' (multiprocessing pool) or 'dask'
+    # scheduler_address (string) : address of a running dask scheduler (multi-node cluster), a LocalCluster is started if None
+    def __init__(self, n_workers=2, solver_slots=None, blas_threads=1, backend='processes', scheduler_address=None):
+
+        self.n_workers = n_workers
+        self.cores = physical_cores()
+        self.solver_slots = min(solver_slots or self.cores, self.cores)
+        self.blas_threads = blas_threads
+        self.backend = backend
+        self.pool = None
+        self.client = None
+        self.cluster = None
+
+        # workers started with pinned BLAS threads
+        with _blas_environ(blas_threads):
+            if backend == 'dask':
+                try:
+                    from dask.distributed import Client, LocalCluster
+                except ImportError:
+                    print('dask.distributed is not installed, going to use a multiprocessing pool')
+                    self.backend = 'processes'
+                else:
+                    if scheduler_address is None:
+                        # one single-threaded worker per individual: the OpenFAST runs are at most n_workers <= solver_slots
+                        self.cluster = LocalCluster(n_workers=min(n_workers, self.solver_slots), threads_per_worker=1, processes=True)
+                        self.client = Client(self.cluster)
+                    else:
+                        self.client = Client(scheduler_address)
+                    self.client.run(_init_dask_worker, _dask_worker_slots(self.client, solver_slots), blas_threads)
+
+            if self.backend == 'processes':
+                slots = multiprocessing.Semaphore(self.solver_slots)
+                self.pool = multiprocessing.Pool(n_workers, initializer=_init_worker, initargs=(slots, blas_threads))
+
+        print('Evaluation scheduler: %d workers (%s), %d solver slots, %d BLAS threads and %d BEM jobs per worker'
+              % (n_workers, self.backend, self.solver_slots, blas_threads, self.bem_jobs()))
+
+    # BEM jobs of each individual, so that the workers together do not use more than the physical cores
+    def bem_jobs(self):
+        return bem_jobs_per_worker(self.n_workers)
+
+    # Map-like interface required by differential_evolution "workers"
+    def __call__(self, func, iterable):
+
+        if self.client is not None:
+            futures = self.client.map(func, list(iterable), pure=False)
+            return self.client.gather(futures)
+
+        return self.pool.map(func, iterable)
+
+    def close(self):
+
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+        if self.cluster is not None:
+            self.cluster.close()
+            self.cluster = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
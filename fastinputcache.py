@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:41:52 2026
+
+#  Parse cache of the OpenFAST input files (FASTInputFile), so that the template files read many times for each
+#  evaluation (".fst", ElastoDyn, HydroDyn, MoorDyn) are parsed only once:
+#  - in-process: parsed objects are kept pickled, keyed on file path, modification time and size
+#  - across the DE workers: parsed objects are stored in "cache_folder" (pickle files keyed on the hash of the file content),
+#    written to a temporary file and renamed into place so that workers never read a half-written entry
+#  Each call returns a new copy of the parsed object, which can be modified and written as the object of FASTInputFile.
+#  Contains:
+#  - functions: read_fast_input, clear_fast_input_cache
+
+@author: Guido Lazzerini
+
+"""
+import hashlib
+import os
+import pickle
+import uuid
+
+from pyFAST.input_output.fast_input_file import FASTInputFile
+
+# In-process cache: (path, mtime, size) as key, pickled FASTInputFile as value
+PARSED_INPUTS = {}
+PARSED_INPUTS_MAX_ENTRIES = 64
+
+# Set the filename of a parsed object (the cached object may have been parsed from a file with the same content)
+def _set_filename(fast_input, filename):
+
+    fast_input.basefile.filename = filename
+    if fast_input._fixedfile is not None:
+        fast_input._fixedfile.filename = filename
+
+    return fast_input
+
+# Read an OpenFAST input file, from the parse cache if the file was already parsed
+# cache_folder (string) : optional, folder of the parsed files shared by the workers (created if needed)
+def read_fast_input(filename, cache_folder=None):
+
+    stat = os.stat(filename)
+    key = (os.path.abspath(filename), stat.st_mtime_ns, stat.st_size)
+
+    if key in PARSED_INPUTS:
+        return _set_filename(pickle.loads(PARSED_INPUTS[key]), filename)
+
+    parsed = None
+    fast_input = None
+    if cache_folder is not None:
+        with open(filename, 'rb') as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        cache_file = os.path.join(cache_folder, content_hash + '.pkl')
+        if os.path.isfile(cache_file):
+            try:
+                with open(cache_file, 'rb') as f:
+                    parsed = f.read()
+                fast_input = pickle.loads(parsed)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                print('Parse cache entry %s not readable, going to parse %s again' % (cache_file, filename))
+                parsed = None
+
+    if parsed is None:
+        fast_input = FASTInputFile(filename)
+        fast_input.fixedfile # dedicated file format, detected once
+        parsed = pickle.dumps(fast_input, protocol=pickle.HIGHEST_PROTOCOL)
+        if cache_folder is not None:
+            os.makedirs(cache_folder, exist_ok=True)
+            tmp_file = cache_file + '.' + uuid.uuid4().hex + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(parsed)
+            os.replace(tmp_file, cache_file)
+
+    if len(PARSED_INPUTS) >= PARSED_INPUTS_MAX_ENTRIES:
+        del PARSED_INPUTS[next(iter(PARSED_INPUTS))]
+    PARSED_INPUTS[key] = parsed
+
+    # the object just parsed or loaded is not shared with the cache
+    return _set_filename(fast_input, filename)
+
+# Clear the in-process cache and, if given, the files of "cache_folder"
+def clear_fast_input_cache(cache_folder=None):
+
+    PARSED_INPUTS.clear()
+    if cache_folder is not None and os.path.isdir(cache_folder):
+        for x in os.listdir(cache_folder):
+            if x.endswith('.pkl'):
+                os.remove(os.path.join(cache_folder, x))
@@ -20,6 +20,14 @@ from turbclass import TurbModel
 
 # Import user defined simulation of FOWT specific library
 import simFOWT
+from evalpipeline import fowt_eval_pipeline
+from resultstore import ResultStore, MemoizedTarget, FailedEvaluation, template_model_key
+from evalscheduler import EvalScheduler
+from postproc_archive import archive_folder, read_archive_sources
+from rundir import collect_run_folders
+from runmanager import RunIndex
+from plotservice import PlotQueue
+from preproc_floatplat.floatplatcapyhydrodyn import bem_n_jobs
 
 # Define template model file (containing all subfile names) and folder
 
@@ -39,10 +47,55 @@ templateModel.addKeyVal('BOUNDARIES',[(templateModel['DESVARIABLES']['FairleadRa
 templateModel.addKeyVal('TMAX',1200)
 templateModel.addKeyVal('IDFOLDER','auto')
 
+# Parallel execution: number of DE workers (individuals evaluated at the same time) and BEM jobs of each individual,
+# the BEM jobs are chosen so that the two levels together do not use more than the available cores
+# the workers are run by the evaluation scheduler (evalscheduler.py), which limits the OpenFAST runs to the physical cores
+# and pins the BLAS threads of each worker; use scheduler_backend = 'dask' (and scheduler_address) for a dask cluster
+n_workers = 2
+scheduler_backend = 'processes'
+scheduler_address = None
+
+templateModel.addKeyVal('OPTIONS',{'TimeDomainSim':True,'FFTAnalysis':True,'EvalCosts':True,'Costs':['MoorCosts'],
+                                   'FixInitDisplacement':False,'InitDisplacement':[0,0,0,0,0,0],
+                                   'BEMWorkers':bem_n_jobs(n_workers),
+                                   'InputCacheFolder':os.getcwd() + '\\sims\\input_cache',
+                                   'RunScratchFolder':None,'RunIndexFile':os.getcwd() + '\\sims\\run_index.sqlite',
+                                   'PlotQueueFolder':os.getcwd() + '\\sims\\plot_queue'})
+
 # Simulation parameters
 evalTime = 600 # simulation starting evaluation time - [s]
 penaltyValue = 9999.9 # penalty value for the objective function [-]
 
+# Weights of the optimization
+w_freq = 0.90
+w_cost = 0.10
+
+# Store of the evaluated designs: designs already evaluated (in this or previous runs with the same template model and
+# objective settings) are not simulated again, with warm_start the initial population is taken from the best stored designs
+resultStore = ResultStore(os.getcwd() + '\\sims\\'+'results'+'.sqlite')
+
+# Index of the run folders (runmanager.py): each case is executed in 'RunScratchFolder' (the "sims" folder if None, 'tmpfs'
+# for "/dev/shm"), only the outputs in 'RunHarvestPatterns' are kept in "sims", the evaluations are counted from the index
+runIndex = RunIndex(templateModel.getOption('RunIndexFile'))
+modelKey = template_model_key(templateModel, templateFolder, extra = {'evalTime':evalTime,'penaltyValue':penaltyValue,
+                                                                      'w_freq':w_freq,'w_cost':w_cost})
+warm_start = True
+
+# Pipelined evaluation: the whole population is passed at once to "f_target_batch" and the evaluation stages of different
+# individuals are overlapped (e.g. BEM of individual N+1 during the OpenFAST run of individual N), see evalpipeline.py
+use_pipeline = False
+evalPipeline = fowt_eval_pipeline(templateModel, evalTime, penaltyValue, filepath_template = templateFolder,
+                                  preprocess_workers = 1, mooring_workers = 1, solver_workers = n_workers, postprocess_workers = 1)
+
+# Archive of the outputs of the runs (postproc_archive.py), written at the end of the optimization; the archived outputs
+# are read with read_archive_channels/read_archive_stats (the .outb/.outq files are removed by the garbage collection)
+archive_outputs = True
+
+# Run folders: the template assets are shared by links (options 'RunShareMethods', default hard link, symbolic link, reflink,
+# copy, and 'RunSymlinkFolders', see rundir.py); the run folders whose outputs are archived are compacted (shared assets
+# and outputs removed) or deleted at the end of the optimization, None to keep them
+run_gc_policy = 'compact'
+
 #--OLD-- Variables
 #LineNumber = 3 # number of mooring lines - [-]
 #FairleadRadius = 54.48 # fairlead to Z axis distance - [m]
@@ -57,12 +110,6 @@ penaltyValue = 9999.9 # penalty value for the objective function [-]
 # Target function definition
 def f_target(xx):
 
-    time.sleep(0.25)
-    
-    # Weights of the optimization
-    w_freq = 0.90
-    w_cost = 0.10
-        
     # Get costs of chains and horizontal legs
     costs = simFOWT.get_costs(xx,templateModel,templateFolder)
     
@@ -74,9 +121,41 @@ def f_target(xx):
     
     fval = w_freq*np.abs((1/yaw_amp))\
          + w_cost*(np.abs(costs[2]-costs[0])/costs[0]+np.abs(costs[3]-costs[1])/costs[1])
+    
+    # evaluations not completed are not stored (see resultstore.py)
+    if isinstance(yaw_amp, FailedEvaluation):
+        fval = FailedEvaluation(fval)
         
     return fval
 
+# Target function for the whole population (differential evolution with vectorized=True), xx_batch has shape (N, S)
+def f_target_batch(xx_batch):
+
+    xx_list = [list(xx) for xx in np.asarray(xx_batch).T]
+    
+    # Stored objective values, only the designs never evaluated are simulated
+    fvals = np.array([resultStore.get(modelKey, xx) for xx in xx_list], dtype=float)
+    new_designs = [kk for kk in range(len(xx_list)) if np.isnan(fvals[kk])]
+    
+    # Get yaw amplitude in forced oscillations of the new individuals, evaluations failed in the pipeline are penalized
+    yaw_amps = evalPipeline.map([xx_list[kk] for kk in new_designs])
+    evalPipeline.report(filename = os.getcwd() + '\\sims\\'+'check_pipeline'+'.txt')
+    
+    for kk, yaw_amp in zip(new_designs, yaw_amps):
+        xx = xx_list[kk]
+        yaw_amp = yaw_amp if yaw_amp is not None else FailedEvaluation(1/penaltyValue)
+        
+        # Get costs of chains and horizontal legs
+        costs = simFOWT.get_costs(xx,templateModel,templateFolder)
+        
+        fvals[kk] = w_freq*np.abs((1/yaw_amp))\
+                  + w_cost*(np.abs(costs[2]-costs[0])/costs[0]+np.abs(costs[3]-costs[1])/costs[1])
+        # evaluations not completed are not stored
+        if not isinstance(yaw_amp, FailedEvaluation):
+            resultStore.put(modelKey, xx, fvals[kk])
+    
+    return fvals
+
 # Function to check differential evolution progress at each iteration
 def my_callback(xk, convergence, f_val):
     file_object = open('DE_output.txt', 'a') 
@@ -90,57 +169,68 @@ def main():
         
     # Common operations for each trial configuration of DE #
     t0 = time.perf_counter()
+    t_start = datetime.now().replace(microsecond=0)
 
     # Define boundaries for design variables
     boundaries = templateModel['BOUNDARIES']
     x0 = list(templateModel['DESVARIABLES'].values())
 
     # Algorithm parameters
-    n_workers = 2
     n_iters = 2
     n_popsize = 2
+    
+    # Initial population, from the stored designs if needed
+    if warm_start:
+        init = resultStore.init_population(modelKey, boundaries, n_popsize*len(boundaries))
+    else:
+        init = 'latinhypercube'
+    
+    # Target function returning the stored values of the designs already evaluated
+    f_target_memo = MemoizedTarget(f_target, resultStore, modelKey)
         
     # Launch optimization
-    res=sp.optimize.differential_evolution(f_target, boundaries, args=(), \
-                                           strategy='best1bin', maxiter=n_iters, \
-                                           popsize=n_popsize, tol=0.0001, mutation=(0.8, 1.3), \
-                                           recombination=0.75, seed=None, callback=my_callback, disp=True, \
-                                           polish=False, init='latinhypercube', atol=0, updating='deferred', \
-                                           workers=n_workers, \
-                                           constraints=(), \
-                                           x0=x0)
+    if use_pipeline:
+        res=sp.optimize.differential_evolution(f_target_batch, boundaries, args=(), \
+                                               strategy='best1bin', maxiter=n_iters, \
+                                               popsize=n_popsize, tol=0.0001, mutation=(0.8, 1.3), \
+                                               recombination=0.75, seed=None, callback=my_callback, disp=True, \
+                                               polish=False, init=init, atol=0, updating='deferred', \
+                                               vectorized=True, \
+                                               constraints=(), \
+                                               x0=x0)
+    else:
+        with EvalScheduler(n_workers, blas_threads = 1, backend = scheduler_backend, scheduler_address = scheduler_address) as evalScheduler:
+            res=sp.optimize.differential_evolution(f_target_memo, boundaries, args=(), \
+                                                   strategy='best1bin', maxiter=n_iters, \
+                                                   popsize=n_popsize, tol=0.0001, mutation=(0.8, 1.3), \
+                                                   recombination=0.75, seed=None, callback=my_callback, disp=True, \
+                                                   polish=False, init=init, atol=0, updating='deferred', \
+                                                   workers=evalScheduler, \
+                                                   constraints=(), \
+                                                   x0=x0)
     
     print('Optimization finished succesfully')
 
     # Final post-processing
     t_fin = time.perf_counter() - t0
     
-    totalDir = 0
     folders_path = os.getcwd() + '\\sims\\'
-    count_exec = 0
-    count_eval = -1
-
-    for base, dirs, files in os.walk(folders_path):
-        # print('Searching in : ',base)
-        for directories in dirs:
-            totalDir += 1
-        for x in files:    
-            if x.endswith(".outb"):
-                count_exec = count_exec + 1
-            elif x.endswith(".outq"):
-                count_exec = count_exec + 1
-                
-    for base, dirs, files in os.walk(folders_path):
-        # print('Searching in : ',base)
-        for directories in dirs:
-            totalDir += 1
-        for x in files:    
-            if x.endswith(".fst"):
-                count_eval = count_eval + 1
-            elif x.endswith(".sim"):
-                count_eval = count_eval + 1
+    
+    # Evaluations and executions of OpenFAST/QBlade of this optimization, from the index of the runs (runmanager.py)
+    count_eval, count_exec = runIndex.counts(since = t_start)
                
-    avg_eval_time = t_fin/count_eval
+    avg_eval_time = t_fin/max(count_eval, 1)
+    
+    # Figures queued by the evaluations (plotservice.py), drawn in the result folders and in one multi-page report
+    plotQueue = PlotQueue(templateModel.getOption('PlotQueueFolder'))
+    if len(plotQueue) > 0:
+        plotQueue.render(report_file = folders_path + 'plots_report' + '.pdf')
+    
+    if archive_outputs:
+        archive_folder(folders_path + 'outputs_archive' + '.h5', folders_path)
+        if run_gc_policy is not None:
+            collect_run_folders(folders_path, read_archive_sources(folders_path + 'outputs_archive' + '.h5'),
+                                policy = run_gc_policy)
     
     now = datetime.now()
     current_time = now.strftime("%H.%M.%S")
@@ -6,15 +6,18 @@ Created on Mon Oct 11 22:57:18 2021
 """
 import numpy as np
 
-from pyFAST.input_output.fast_input_file import FASTInputFile
+from templatedeck import get_template_deck
 from pyQBlade.qblade_input_file import QBladeInputFile
 
 def moor_config_openfast(xx,
                          turbModel,
                          filepath='unused', filepath_mod='unused'):
 
+        # parsed template files, the modified files are written only if they differ from the templates
+        deck = get_template_deck(turbModel, filepath)
+        
         # Check if "Moordyn" file was provided
-        fst_data = FASTInputFile(filepath_mod+"\\"+turbModel['FSTMODFILENAME'])
+        fst_data = deck.input('FSTFILENAME')
         if fst_data['CompMooring'] == 0:
             return -1
 
@@ -48,12 +51,12 @@ def moor_config_openfast(xx,
         LineNumber = turbModel['FIXVARIABLES']['LineNumber']
         
         # read hydrodyn input template file
-        HD_Data = FASTInputFile(filepath+'\\'+turbModel['HYDFILENAME'])
+        HD_Data = deck.input('HYDFILENAME')
         WtrDpth = HD_Data['WtrDpth']
         AnchorDepth = WtrDpth
 
         # read moordyn input template file
-        MD_data = FASTInputFile(filepath+'\\'+turbModel['MRDFILENAME'])
+        MD_data = deck.input('MRDFILENAME')
         MD_data.NLines=LineNumber
         
         for kk in range(LineNumber):
@@ -73,7 +76,7 @@ def moor_config_openfast(xx,
             
             
         # write mooring file
-        MD_data.write(filepath_mod+'\\'+turbModel['MRDMODFILENAME'])
+        deck.write_input('MRDFILENAME', MD_data, filepath_mod+'\\'+turbModel['MRDMODFILENAME'])
         out_data = MD_data
                 
         return out_data
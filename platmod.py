@@ -13,14 +13,17 @@ import shutil
 
 # Import third-party library
 
-from pyFAST.input_output.fast_input_file import FASTInputFile
+from rundir import SHARE_METHODS, share_folder
+from templatedeck import get_template_deck
 from pyQBlade.qblade_input_file import QBladeInputFile
 
 # Import custom libraries
 
 from preproc_floatplat.floatplatgmshes import create_triple_spar_mesh
-from preproc_floatplat.floatplatcapyhydrodyn import create_hydrodyn_database, convert_CAPYtoWAMIT_file
-from preproc_floatplat.floatplatmmhydrost import write_hydrost_file
+from preproc_floatplat.floatplatcapyhydrodyn import create_hydrodyn_database, convert_CAPYtoWAMIT_file, bem_n_jobs
+from preproc_floatplat.floatplatmmhydrost import write_hydrost_file, read_hydrost_file
+from preproc_floatplat.floatplathydrocache import hydro_cache_key, load_hydro_cache, store_hydro_cache
+from preproc_floatplat.floatplatsurrogate import build_hydro_surrogate, load_hydro_surrogate, interp_hydro_surrogate, hydro_surrogate_mismatch
 
 
 def plat_config_openfast(xx,
@@ -30,6 +33,9 @@ def plat_config_openfast(xx,
     
     show_flag = False
     calc_hydro_flag = True
+    
+    # parsed template files, the modified files are written only if they differ from the templates
+    deck = get_template_deck(turbModel, filepath)
 
     if turbModel['PLATFORMTYPE']=='TripleSpar':
         
@@ -50,10 +56,10 @@ def plat_config_openfast(xx,
          calc_hydro_flag = False
       
         #read ElastoDyn input template file 
-        ED_data = FASTInputFile(filepath+'\\'+turbModel['ELSFILENAME'])
+        ED_data = deck.input('ELSFILENAME')
         
         # read Hydrodyn input template file 
-        HD_data = FASTInputFile(filepath+'\\'+turbModel['HYDFILENAME'])
+        HD_data = deck.input('HYDFILENAME')
       
         hstfile = 0
         K_hst = 0
@@ -85,38 +91,7 @@ def plat_config_openfast(xx,
                 
             HD_data["PotFile"] = hydro_folder_name_temp
 
-            spar_radius =  turbModel['FIXVARIABLES']['SparRadius']
-            spar_height = turbModel['FIXVARIABLES']['SparHeight']
-            hp_radius = turbModel['FIXVARIABLES']['HPRadius']
-            hp_thickness = turbModel['FIXVARIABLES']['HPHeight']
-            spar1_X = SparDistance*np.cos(0)
-            spar1_Y = SparDistance*np.sin(0)
-            spar_vertical_divisions = 20
-            circle_divisions = 8
-            hp_vertical_divisions = 2
-            hp_sup_divisions = 4
-            hp_inf_divisions = 8
-            draft = spar_height + hp_thickness
-
-            input_mesh_file = filepath_mod + "\\"+"triple_spar_mesh_mod.msh"
-            create_triple_spar_mesh(input_mesh_file[0:-4],spar_radius,spar_height,hp_radius,hp_thickness,spar1_X,spar1_Y,spar_vertical_divisions, circle_divisions,hp_vertical_divisions,hp_sup_divisions,hp_inf_divisions,show=show_flag)
-        
-            # omegas in rad/s and direction in rad
-            omega_step = 0.10
-            omega_start = (2*np.pi)/300
-            omega_end = (2*np.pi)/2
-        
-            omegas = np.arange(omega_start,omega_end,omega_step)
-            np.append(omegas, [np.infty], axis=0) # fix the vector for infinite freq
-        
-            wave_directions = [0]
-        
-            hd_dataset = create_hydrodyn_database(input_mesh_file, omegas, wave_directions=wave_directions)
-            isConverted = convert_CAPYtoWAMIT_file(hd_dataset,hydro_folder_name+"\\triple_spar_mesh_mod")      
-        
-            # generate hydrostatic file
-            output_hst_namefile=hydro_folder_name+"\\triple_spar_mesh_mod"
-            is_hstfile_gen, hstfile,K_hst,K_dim=write_hydrost_file(input_mesh_file,output_hst_namefile ,CoG_Z = 0, rho=1023, g=9.81, show=show_flag)
+            hstfile,K_hst,draft = calc_triple_spar_hydro(turbModel, SparDistance, hydro_folder_name, filepath_mod, show_flag=show_flag)
 
             # change inertia
             PtfmRIner=ED_data["PtfmRIner"]
@@ -135,36 +110,32 @@ def plat_config_openfast(xx,
 
         else:
             try:
-                # Copy hydrodynamic potential files folder to mod folders
-                src_dir=filepath+turbModel['HYDFOLDERNAME']
-                dst_dir=filepath_mod+turbModel['HYDFOLDERNAME']
-                shutil.copytree(src_dir,dst_dir)
+                # Share hydrodynamic potential files folder with mod folders
+                deck.share_folder('HYDFOLDERNAME', filepath_mod)
             except:
                 print('No hydrodynamic folder was found and copied')
         
         # write hydrodyn and elastodyn modified file
-        HD_data.write(filepath_mod+'\\'+turbModel['HYDMODFILENAME'])
-        ED_data.write(filepath_mod+'\\'+turbModel['ELSMODFILENAME'])
+        deck.write_input('HYDFILENAME', HD_data, filepath_mod+'\\'+turbModel['HYDMODFILENAME'])
+        deck.write_input('ELSFILENAME', ED_data, filepath_mod+'\\'+turbModel['ELSMODFILENAME'])
 
     elif turbModel['PLATFORMTYPE'] == 'Spar':
               
         #read ElastoDyn input template file 
-        ED_data = FASTInputFile(filepath+'\\'+turbModel['ELSFILENAME'])
+        ED_data = deck.input('ELSFILENAME')
         
         # read hydrodyn input template file 
-        HD_data = FASTInputFile(filepath+'\\'+turbModel['HYDFILENAME'])
+        HD_data = deck.input('HYDFILENAME')
             
         try:
-            # Copy hydrodynamic potential files folder to mod folders
-            src_dir=filepath+turbModel['HYDFOLDERNAME']
-            dst_dir=filepath_mod+turbModel['HYDFOLDERNAME']
-            shutil.copytree(src_dir,dst_dir)
+            # Share hydrodynamic potential files folder with mod folders
+            deck.share_folder('HYDFOLDERNAME', filepath_mod)
         except:
             print('No hydrodynamic folder was found and copied')
         
         # write hydrodyn and elastodyn modified file
-        HD_data.write(filepath_mod+'\\'+turbModel['HYDMODFILENAME'])
-        ED_data.write(filepath_mod+'\\'+turbModel['ELSMODFILENAME'])
+        deck.write_input('HYDFILENAME', HD_data, filepath_mod+'\\'+turbModel['HYDMODFILENAME'])
+        deck.write_input('ELSFILENAME', ED_data, filepath_mod+'\\'+turbModel['ELSMODFILENAME'])
         
         hstfile = 0
         K_hst = 0
@@ -188,10 +159,10 @@ def plat_config_openfast(xx,
          calc_hydro_flag = False
       
         #read ElastoDyn input template file 
-        ED_data = FASTInputFile(filepath+'\\'+turbModel['ELSFILENAME'])
+        ED_data = deck.input('ELSFILENAME')
         
         # read Hydrodyn input template file 
-        HD_data = FASTInputFile(filepath+'\\'+turbModel['HYDFILENAME'])
+        HD_data = deck.input('HYDFILENAME')
       
         hstfile = 0
         K_hst = 0
@@ -223,38 +194,7 @@ def plat_config_openfast(xx,
                 
             HD_data["PotFile"] = hydro_folder_name_temp
 
-            spar_radius =  turbModel['FIXVARIABLES']['SparRadius']
-            spar_height = turbModel['FIXVARIABLES']['SparHeight']
-            hp_radius = turbModel['FIXVARIABLES']['HPRadius']
-            hp_thickness = turbModel['FIXVARIABLES']['HPHeight']
-            spar1_X = SparDistance*np.cos(0)
-            spar1_Y = SparDistance*np.sin(0)
-            spar_vertical_divisions = 20
-            circle_divisions = 8
-            hp_vertical_divisions = 2
-            hp_sup_divisions = 4
-            hp_inf_divisions = 8
-            draft = spar_height + hp_thickness
-
-            input_mesh_file = filepath_mod + "\\"+"triple_spar_mesh_mod.msh"
-            create_triple_spar_mesh(input_mesh_file[0:-4],spar_radius,spar_height,hp_radius,hp_thickness,spar1_X,spar1_Y,spar_vertical_divisions, circle_divisions,hp_vertical_divisions,hp_sup_divisions,hp_inf_divisions,show=show_flag)
-        
-            # omegas in rad/s and direction in rad
-            omega_step = 0.10
-            omega_start = (2*np.pi)/300
-            omega_end = (2*np.pi)/2
-        
-            omegas = np.arange(omega_start,omega_end,omega_step)
-            np.append(omegas, [np.infty], axis=0) # fix the vector for infinite freq
-        
-            wave_directions = [0]
-        
-            hd_dataset = create_hydrodyn_database(input_mesh_file, omegas, wave_directions=wave_directions)
-            isConverted = convert_CAPYtoWAMIT_file(hd_dataset,hydro_folder_name+"\\triple_spar_mesh_mod")      
-        
-            # generate hydrostatic file
-            output_hst_namefile=hydro_folder_name+"\\triple_spar_mesh_mod"
-            is_hstfile_gen, hstfile,K_hst,K_dim=write_hydrost_file(input_mesh_file,output_hst_namefile ,CoG_Z = 0, rho=1023, g=9.81, show=show_flag)
+            hstfile,K_hst,draft = calc_triple_spar_hydro(turbModel, SparDistance, hydro_folder_name, filepath_mod, show_flag=show_flag)
 
             # change inertia
             PtfmRIner=ED_data["PtfmRIner"]
@@ -273,19 +213,143 @@ def plat_config_openfast(xx,
 
         else:
             try:
-                # Copy hydrodynamic potential files folder to mod folders
-                src_dir=filepath+turbModel['HYDFOLDERNAME']
-                dst_dir=filepath_mod+turbModel['HYDFOLDERNAME']
-                shutil.copytree(src_dir,dst_dir)
+                # Share hydrodynamic potential files folder with mod folders
+                deck.share_folder('HYDFOLDERNAME', filepath_mod)
             except:
                 print('No hydrodynamic folder was found and copied')
         
         # write hydrodyn and elastodyn modified file
-        HD_data.write(filepath_mod+'\\'+turbModel['HYDMODFILENAME'])
-        ED_data.write(filepath_mod+'\\'+turbModel['ELSMODFILENAME'])
+        deck.write_input('HYDFILENAME', HD_data, filepath_mod+'\\'+turbModel['HYDMODFILENAME'])
+        deck.write_input('ELSFILENAME', ED_data, filepath_mod+'\\'+turbModel['ELSMODFILENAME'])
 
     return HD_data,ED_data,hstfile,K_hst,draft
 
+# Create the mesh of the triple spar platform, calculate hydrodynamics (Capytaine) and hydrostatics (meshmagick) and write
+# the WAMIT files ".1", ".3", ".hst" in "hydro_folder_name". If turbModel['OPTIONS']['HydroCacheFolder'] is defined, the
+# files are taken from the on-disk cache when the same geometry was already calculated (see floatplathydrocache).
+# If turbModel['OPTIONS']['HydroSurrogateFile'] is defined, the hydrodynamic coefficients are interpolated from the
+# surrogate built by "build_triple_spar_surrogate" instead of being calculated (see floatplatsurrogate), interpolated
+# coefficients are not stored in the cache. The surrogate is used only if it was built with the same frequencies, wave
+# directions, depth, symmetry and fixed geometry (triple_spar_surrogate_attrs), otherwise the BEM problems are solved.
+# If turbModel['OPTIONS']['HydroSymmetry'] is 'axial', the 3-fold rotational symmetry of the platform is used by the BEM solver
+def calc_triple_spar_hydro(turbModel, SparDistance, hydro_folder_name, filepath_mod, show_flag=False):
+
+    mesh_params = triple_spar_mesh_params(turbModel, SparDistance)
+    draft = mesh_params['spar_height'] + mesh_params['hp_thickness']
+
+    input_mesh_file = filepath_mod + "\\"+"triple_spar_mesh_mod.msh"
+    output_hyd_namefile = hydro_folder_name+"\\triple_spar_mesh_mod"
+
+    omegas, wave_directions = hydro_frequencies()
+
+    # look for the hydrodynamic database in the cache
+    cache_folder = turbModel.getOption('HydroCacheFolder')
+    if cache_folder is not None:
+        cache_params = dict(mesh_params)
+        if turbModel.getOption('HydroSymmetry') is not None:
+            cache_params['symmetry'] = turbModel.getOption('HydroSymmetry')
+        cache_key = hydro_cache_key(cache_params, omegas, wave_directions,
+                                    decimals=turbModel.getOption('HydroCacheDecimals', 3))
+
+        if load_hydro_cache(cache_folder, cache_key, output_hyd_namefile):
+            hstfile = output_hyd_namefile + '.hst'
+            # float64 matrix, the ".hst" file is written with 7 significant digits (entries stored without it: ".hst" file)
+            if os.path.isfile(hstfile + '.npy'):
+                K_hst = np.load(hstfile + '.npy').tolist()
+            else:
+                K_hst = read_hydrost_file(hstfile)
+            return hstfile,K_hst,draft
+
+    create_triple_spar_mesh(input_mesh_file[0:-4],**mesh_params,show=show_flag)
+
+    # interpolate the hydrodynamic database from the surrogate, if available, or solve the BEM problems
+    hd_dataset = None
+    surrogate_file = turbModel.getOption('HydroSurrogateFile')
+    if surrogate_file is not None:
+        surrogate = load_hydro_surrogate(surrogate_file)
+        mismatch = hydro_surrogate_mismatch(surrogate, omegas, wave_directions, depth=np.inf,
+                                            symmetry=turbModel.getOption('HydroSymmetry'),
+                                            attrs=triple_spar_surrogate_attrs(turbModel))
+        if len(mismatch) == 0:
+            hd_dataset = interp_hydro_surrogate(surrogate, SparDistance, mesh_file=input_mesh_file,
+                                                method=turbModel.getOption('HydroSurrogateMethod', 'linear'))
+        else:
+            print('Surrogate %s does not match the model (%s), going to solve the BEM problems' % (surrogate_file, ', '.join(mismatch)))
+
+    is_exact = hd_dataset is None
+    if is_exact:
+        hd_dataset = create_hydrodyn_database(input_mesh_file, omegas, wave_directions=wave_directions, depth=np.inf,
+                                              n_jobs=turbModel.getOption('BEMWorkers', 1),
+                                              symmetry=turbModel.getOption('HydroSymmetry'), n_sectors=3)
+    isConverted = convert_CAPYtoWAMIT_file(hd_dataset,output_hyd_namefile)
+
+    # generate hydrostatic file
+    is_hstfile_gen, hstfile,K_hst,K_dim=write_hydrost_file(input_mesh_file,output_hyd_namefile ,CoG_Z = 0, rho=1023, g=9.81, show=show_flag)
+
+    # only the BEM solutions are stored in the cache, not the coefficients interpolated from the surrogate
+    if cache_folder is not None and is_exact:
+        np.save(hstfile + '.npy', np.array(K_hst, dtype=np.float64))
+        store_hydro_cache(cache_folder, cache_key, output_hyd_namefile,
+                          src_files={'.hst': hstfile, '.hst.npy': hstfile + '.npy', '.cpt': input_mesh_file[:-4]+".cpt"},
+                          max_size_mb=turbModel.getOption('HydroCacheMaxSizeMB', 2000),
+                          max_entries=turbModel.getOption('HydroCacheMaxEntries'))
+
+    return hstfile,K_hst,draft
+
+# Precompute (offline) the Capytaine databases of the triple spar platform on a grid of "SparDistance" values
+# validate_values (list) : "SparDistance" values, not in the grid, used to report the interpolation error against exact solutions
+def build_triple_spar_surrogate(turbModel, spar_distances, surrogate_file, work_folder, validate_values=None):
+
+    def create_mesh(mesh_namefile, SparDistance):
+        create_triple_spar_mesh(mesh_namefile,**triple_spar_mesh_params(turbModel, SparDistance),show=False)
+
+    omegas, wave_directions = hydro_frequencies()
+
+    return build_hydro_surrogate(spar_distances, create_mesh, omegas, wave_directions,
+                                 surrogate_file=surrogate_file, work_folder=work_folder, param_name='SparDistance',
+                                 depth=np.inf, method=turbModel.getOption('HydroSurrogateMethod', 'linear'),
+                                 validate_values=validate_values, n_jobs=bem_n_jobs(),
+                                 symmetry=turbModel.getOption('HydroSymmetry'), attrs=triple_spar_surrogate_attrs(turbModel))
+
+# Fixed parameters of the triple spar geometry (mesh parameters independent of "SparDistance"), stored in the surrogate
+def triple_spar_surrogate_attrs(turbModel):
+
+    mesh_params = triple_spar_mesh_params(turbModel, 0)
+
+    return {'mesh_' + key: value for key, value in mesh_params.items() if key not in ['spar1_X', 'spar1_Y']}
+
+# Parameters of "create_triple_spar_mesh" for the triple spar platform with spars at distance "SparDistance" from the center
+def triple_spar_mesh_params(turbModel, SparDistance):
+
+    mesh_params = {'spar_radius': turbModel['FIXVARIABLES']['SparRadius'],
+                   'spar_height': turbModel['FIXVARIABLES']['SparHeight'],
+                   'hp_radius': turbModel['FIXVARIABLES']['HPRadius'],
+                   'hp_thickness': turbModel['FIXVARIABLES']['HPHeight'],
+                   'spar1_X': SparDistance*np.cos(0),
+                   'spar1_Y': SparDistance*np.sin(0),
+                   'spar_vertical_divisions': 20,
+                   'circle_divisions': 8,
+                   'hp_vertical_divisions': 2,
+                   'hp_sup_divisions': 4,
+                   'hp_inf_divisions': 8}
+
+    return mesh_params
+
+# Frequencies and wave directions of the hydrodynamic databases
+def hydro_frequencies():
+
+    # omegas in rad/s and direction in rad
+    omega_step = 0.10
+    omega_start = (2*np.pi)/300
+    omega_end = (2*np.pi)/2
+
+    omegas = np.arange(omega_start,omega_end,omega_step)
+    np.append(omegas, [np.infty], axis=0) # fix the vector for infinite freq
+
+    wave_directions = [0]
+
+    return omegas, wave_directions
+
 def plat_config_qblade(xx,
                        turbModel,
                        filepath='unused',
@@ -421,10 +485,11 @@ def plat_config_qblade(xx,
 
         else:
             try:
-               # Copy hydrodynamic potential files folder to mod folders
+               # Share hydrodynamic potential files folder with mod folders
                src_dir=filepath+turbModel['HYDFOLDERNAME']
                dst_dir=filepath_mod+turbModel['HYDFOLDERNAME']
-               shutil.copytree(src_dir,dst_dir)
+               share_folder(src_dir,dst_dir,turbModel.getOption('RunShareMethods', SHARE_METHODS),
+                            turbModel.getOption('RunSymlinkFolders', True))
             except:
                print('No hydrodynamic folder was found and copied')
 
@@ -448,7 +513,8 @@ def plat_config_qblade(xx,
         try:
             src_dir=filepath+turbModel['HYDFOLDERNAME']
             dst_dir=filepath_mod+turbModel['HYDFOLDERNAME']
-            shutil.copytree(src_dir,dst_dir)
+            share_folder(src_dir,dst_dir,turbModel.getOption('RunShareMethods', SHARE_METHODS),
+                         turbModel.getOption('RunSymlinkFolders', True))
         except OSError:
             print ("Creation of the directory %s failed" % hydro_folder_name)
         else:
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 00:02:47 2026
+
+#  Headless plotting service of the diagnostic figures of the runs (time histories, spectra, hydrodynamic coefficients):
+#  - figures are described by a spec (dict): lines (x/y data or a reference to the channels of an output file), labels,
+#    limits, texts and the png file, so that the evaluation only builds the spec and does not draw
+#  - figures are drawn with the Agg backend on object-oriented figures (matplotlib.figure.Figure), without the global
+#    pyplot state, so that figures of different threads/workers do not interfere
+#  - PlotQueue stores the specs in a folder (one pickle file for each figure, written to a temporary file and renamed),
+#    shared by the DE workers; the queue is rendered afterwards ("render"), optionally in a separate low-priority process
+#    ("render_in_background"), and many runs can be rendered in one multi-page pdf report
+#  Spec keys: 'file' (png, optional), 'title', 'xlabel', 'ylabel', 'xlim', 'lines' (list of dict with 'x', 'y', 'label',
+#  'marker', or 'source' instead of 'x' and 'y', see source_line), 'texts' (list of (x, y, s)), 'legend' (bool),
+#  'group' (name of the run, used to sort the pages of the report)
+#  Queued figures of the outputs reference the data ('source': output file of the run or hydrodynamic dataset and
+#  channels/variables), read when the figures are drawn, so that the queue does not store the time histories; only the
+#  referenced channels are read, once for each group (run) of figures
+#  Contains:
+#  - class: PlotQueue
+#  - functions: source_line, line_spec, render_figure, render_specs, get_plot_queue
+
+@author: Guido Lazzerini
+
+"""
+import itertools
+import os
+import pickle
+import subprocess
+import sys
+import uuid
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+
+# Extensions of the hydrodynamic datasets (netCDF written by Capytaine), the other sources are output files of the runs
+DATASET_EXTENSIONS = ['.nc', '.cpt']
+
+# Line of a spec referencing the data of "file" instead of containing it
+# - output file of OpenFAST/QBlade: "x" and "y" are channels (e.g. 'Time_[s]' and 'PtfmYaw_[deg]')
+# - hydrodynamic dataset: "x" and "y" are variables, "y" a list of variables is summed, "sel" selects the coordinates of
+#   "y" (dict) and "absolute" takes the absolute value (e.g. complex excitation forces)
+# "scale" and "x_scale" multiply the values of y and x
+def source_line(file, x, y, label=None, scale=1, x_scale=1, sel=None, absolute=False, marker=None):
+
+    return {'label': label, 'marker': marker,
+            'source': {'file': file, 'x': x, 'y': y, 'scale': scale, 'x_scale': x_scale, 'sel': sel, 'absolute': absolute}}
+
+# Spec of a figure with one or more lines, "series" is a list of (x, y, label) or of lines referencing the data (source_line)
+def line_spec(series, title='', xlabel='', ylabel='', xlim=None, file=None, texts=[], legend=False, marker=None, group=None):
+
+    lines = []
+    for line in series:
+        if isinstance(line, dict):
+            lines.append(dict(line, marker=line.get('marker') or marker))
+        else:
+            x, y, label = line
+            lines.append({'x': np.asarray(x), 'y': np.asarray(y), 'label': label, 'marker': marker})
+
+    return {'file': file, 'title': title, 'xlabel': xlabel, 'ylabel': ylabel, 'xlim': xlim, 'texts': list(texts),
+            'legend': legend, 'group': group, 'lines': lines}
+
+# Channels referenced by the lines of "specs" in each output file (file as key), the datasets are not included
+def _source_channels(specs):
+
+    channels = {}
+    for spec in specs:
+        for line in spec['lines']:
+            if 'source' not in line or os.path.splitext(line['source']['file'])[1] in DATASET_EXTENSIONS:
+                continue
+            source = line['source']
+            names = channels.setdefault(source['file'], [])
+            for name in [source['x']] + (source['y'] if isinstance(source['y'], list) else [source['y']]):
+                if name not in names:
+                    names.append(name)
+
+    return channels
+
+# Channels "names" of an output file of OpenFAST/QBlade as data frame, ValueError if the file cannot be read
+def _read_output(file, names):
+
+    try:
+        if file.endswith('.outq'):
+            from pyQBlade.qblade_output_file import QBladeOutputFile
+            return QBladeOutputFile(file, channels = names).toDataFrame()
+        from pyFAST.input_output.fast_output_file import FASTOutputFile
+        return FASTOutputFile(file, channels = names).toDataFrame()
+    except OSError:
+        raise
+    except Exception as e:
+        raise ValueError('Output file {} not read: {}'.format(file, e))
+
+# Data of a line of the spec, read from the output file or the dataset if the line is a reference ('source'),
+# the files read are kept in "sources" (dict) for the next lines
+# channels (dict) : channels read from each output file (see _source_channels), only the channels of the line if None
+def _line_data(line, sources, channels=None):
+
+    if 'source' not in line:
+        return line['x'], line['y']
+
+    source = line['source']
+    is_dataset = os.path.splitext(source['file'])[1] in DATASET_EXTENSIONS
+    if source['file'] in sources:
+        data = sources[source['file']]
+    elif is_dataset:
+        import xarray as xr
+        data = sources[source['file']] = xr.load_dataset(source['file'], engine='h5netcdf')
+    else:
+        line_names = _source_channels([{'lines': [line]}])[source['file']]
+        names = (channels or {}).get(source['file'], line_names)
+        if names == []:
+            # channels of each line only, not kept
+            data = _read_output(source['file'], line_names)
+        else:
+            try:
+                data = sources[source['file']] = _read_output(source['file'], names)
+            except ValueError:
+                if names == line_names:
+                    raise
+                # a channel of another figure is missing in the file: from now on only the channels of each line
+                channels[source['file']] = []
+                data = _read_output(source['file'], line_names)
+
+    variables = source['y'] if isinstance(source['y'], list) else [source['y']]
+    if is_dataset:
+        y = sum([data[variable].sel(**(source.get('sel') or {})) for variable in variables]).values
+        x = data[source['x']].values
+    else:
+        y = sum([data[variable].to_numpy() for variable in variables])
+        x = data[source['x']].to_numpy()
+    if source.get('absolute'):
+        y = np.abs(y)
+
+    return x*source.get('x_scale', 1), y*source.get('scale', 1)
+
+# Draw the figure of "spec" (Agg canvas), saved as png if spec['file'] is given; returns the figure
+# sources (dict) : files already read by the previous figures (see _line_data), not kept between calls if None
+# channels (dict) : channels read from each output file, those of the spec if None (see _source_channels)
+def render_figure(spec, sources=None, dpi=100, channels=None):
+
+    if sources is None:
+        sources = {}
+    if channels is None:
+        channels = _source_channels([spec])
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    for line in spec['lines']:
+        x, y = _line_data(line, sources, channels)
+        ax.plot(x, y, label=line.get('label'), marker=line.get('marker'))
+    for x, y, s in spec.get('texts', []):
+        ax.text(x, y, s)
+    ax.set_xlabel(spec.get('xlabel', ''))
+    ax.set_ylabel(spec.get('ylabel', ''))
+    ax.set_title(spec.get('title', ''))
+    if spec.get('xlim') is not None:
+        ax.set_xlim(spec['xlim'])
+    if spec.get('legend'):
+        ax.legend()
+
+    if spec.get('file') is not None:
+        fig.savefig(spec['file'], dpi=dpi)
+
+    return fig
+
+# Draw the figures of "specs", optionally also as pages of the pdf "report_file" (pages sorted by group), returns the
+# number of figures drawn; figures failing (e.g. folder or output file removed) are skipped
+# The referenced files are read once for each group, with only the channels referenced by the figures of the group,
+# and released when the next group starts (the time histories of one run at a time are in memory)
+def render_specs(specs, report_file=None, dpi=100):
+
+    report = PdfPages(report_file) if report_file is not None else None
+    n_figures = 0
+    try:
+        for group, group_specs in itertools.groupby(sorted(specs, key=lambda spec: str(spec.get('group'))),
+                                                    key=lambda spec: str(spec.get('group'))):
+            group_specs = list(group_specs)
+            sources = {}
+            channels = _source_channels(group_specs)
+            for spec in group_specs:
+                try:
+                    fig = render_figure(spec, sources, dpi, channels)
+                except (OSError, KeyError, ValueError) as e:
+                    print('Figure %s not drawn: %s' % (spec.get('file'), e))
+                    continue
+                if report is not None:
+                    if spec.get('group') is not None:
+                        fig.suptitle(spec['group'], fontsize='small')
+                    report.savefig(fig)
+                n_figures += 1
+    finally:
+        if report is not None:
+            report.close()
+
+    return n_figures
+
+class PlotQueue:
+
+    # queue_folder (string) : folder of the queued specs, shared by all the workers (created if needed)
+    def __init__(self, queue_folder):
+        self.queue_folder = queue_folder
+        os.makedirs(queue_folder, exist_ok=True)
+
+    # Queue the specs (a spec or a list of specs) of a figure
+    def add(self, specs):
+
+        if isinstance(specs, dict):
+            specs = [specs]
+        for spec in specs:
+            queue_file = os.path.join(self.queue_folder, uuid.uuid4().hex + '.pkl')
+            with open(queue_file + '.tmp', 'wb') as f:
+                pickle.dump(spec, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(queue_file + '.tmp', queue_file)
+
+    def files(self):
+        return sorted([os.path.join(self.queue_folder, x) for x in os.listdir(self.queue_folder) if x.endswith('.pkl')])
+
+    def __len__(self):
+        return len(self.files())
+
+    # Draw the queued figures (and the pdf "report_file" if given), the rendered specs are removed from the queue
+    def render(self, report_file=None, dpi=100, remove=True):
+
+        queue_files = self.files()
+        specs = []
+        for queue_file in queue_files:
+            with open(queue_file, 'rb') as f:
+                specs.append(pickle.load(f))
+
+        n_figures = render_specs(specs, report_file=report_file, dpi=dpi)
+
+        if remove:
+            for queue_file in queue_files:
+                os.remove(queue_file)
+
+        return n_figures
+
+    # Draw the queued figures in a separate process with low priority, returns the process (subprocess.Popen)
+    def render_in_background(self, report_file=None, dpi=100):
+
+        args = [sys.executable, os.path.abspath(__file__), self.queue_folder, '--dpi', str(dpi)]
+        if report_file is not None:
+            args += ['--report', report_file]
+
+        if os.name == 'nt':
+            return subprocess.Popen(args, creationflags=subprocess.BELOW_NORMAL_PRIORITY_CLASS)
+        else:
+            return subprocess.Popen(args, preexec_fn=lambda: os.nice(10))
+
+# Queue of the figures of the model (option 'PlotQueueFolder'), None if the figures are drawn at once
+def get_plot_queue(model):
+
+    queue_folder = model.getOption('PlotQueueFolder')
+
+    return PlotQueue(queue_folder) if queue_folder is not None else None
+
+if __name__ == '__main__':
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Render the figures queued in a plot queue folder')
+    parser.add_argument('queue_folder', help='folder of the queued figures')
+    parser.add_argument('--report', default=None, help='multi-page pdf report of all the figures')
+    parser.add_argument('--dpi', type=int, default=100, help='resolution of the png files')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    n_figures = PlotQueue(args.queue_folder).render(report_file=args.report, dpi=args.dpi)
+    print('%d figures rendered from %s' % (n_figures, args.queue_folder))
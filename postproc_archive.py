@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:02:14 2026
+
+#  Columnar archive (HDF5 file) of the outputs of the OpenFAST/QBlade runs, written once for each run so that the
+#  outputs can be post-processed (read_archive_channels, read_archive_stats) without reading and parsing again the
+#  .outb/.outq files, also after the run folders are compacted (rundir.py):
+#  - one group for each output file ("/runs/<run_id>", run_id from the path of the output file relative to the archived
+#    folder, e.g. "mod_input_files_<id>__<name>.outb"), with the source file and the number of time steps as attributes
+#  - one compressed dataset for each channel, chunked in time ("chunk_steps" time steps), with the channel index
+#    (names of the channels, in the order of the datasets) stored as attribute of the run
+#  - per-chunk statistics of each channel (min/max/mean of each time chunk) and whole-run statistics as attributes,
+#    so that summary values across many runs are read without reading the time histories
+#  Parquet was not used since pyarrow is not a dependency of the framework, h5py is already used for the hydrodynamic data.
+#  Contains:
+#  - functions: archive_run_id, archive_run, archive_folder, list_archive_runs, read_archive_sources, read_archive_channels,
+#    find_archive_run, read_output_channel_names, read_output_channels, read_archive_chunk_stats, read_archive_stats
+
+@author: Guido Lazzerini
+
+"""
+import os
+
+import h5py
+import numpy as np
+import pandas as pd
+
+from pyFAST.input_output.fast_output_file import FASTOutputFile, FASTOutputBinaryMap
+from pyQBlade.qblade_output_file import QBladeOutputFile, read_qblade_header
+
+# Extensions of the output files of the simulation software
+OUTPUT_EXTENSIONS = ['.outb', '.out', '.outq']
+# Parts of the names of the output files not archived (MoorDyn ".MD.out" and ".MD.Line<n>.out")
+OUTPUTS_NOT_ARCHIVED = ['.MD.']
+
+# Statistics of each time chunk, in the order of the columns of the "stats" datasets
+CHUNK_STATS = ['min', 'max', 'mean']
+
+# Read the output file of a run as data frame (time as first column), selection of the channels and of the time window
+# (tmin <= t <= tmax) done by the readers (binary OpenFAST and QBlade files) or after reading (ASCII OpenFAST files)
+def _read_output_file(output_file, channels=None, tmin=None, tmax=None):
+
+    if output_file.endswith('.outq'):
+        outdata = QBladeOutputFile(output_file, channels = channels, tmin = tmin, tmax = tmax).toDataFrame()
+    else:
+        outdata = FASTOutputFile(output_file, channels = channels, tmin = tmin, tmax = tmax).toDataFrame()
+        if not output_file.endswith('.outb'):
+            if channels is not None:
+                outdata = outdata[[outdata.columns[0]] + [c for c in channels if c != outdata.columns[0]]]
+            time = outdata.iloc[:, 0]
+            mask = np.ones(len(time), dtype=bool)
+            if tmin is not None:
+                mask &= time >= tmin
+            if tmax is not None:
+                mask &= time <= tmax
+            outdata = outdata[mask].reset_index(drop=True)
+
+    return outdata
+
+# Statistics (array n_chunks x 3, columns CHUNK_STATS) of the time chunks of "chunk_steps" steps of the channel "values"
+def _chunk_stats(values, chunk_steps):
+
+    starts = np.arange(0, len(values), chunk_steps)
+    counts = np.diff(np.append(starts, len(values)))
+
+    return np.column_stack([np.minimum.reduceat(values, starts),
+                            np.maximum.reduceat(values, starts),
+                            np.add.reduceat(values, starts, dtype=np.float64)/counts])
+
+# Name of the run of "output_file" in the archive: path relative to "folder" (folder of the output file by default) with
+# the separators replaced by "__", so that the output files of the same run folder have different names
+def archive_run_id(output_file, folder=None):
+
+    output_file = os.path.abspath(output_file)
+    if folder is None:
+        folder = os.path.dirname(os.path.dirname(output_file))
+
+    return os.path.relpath(output_file, os.path.abspath(folder)).replace('\\', '__').replace('/', '__')
+
+# Write the outputs of a run in the archive
+# archive_file (string) : HDF5 archive, created if needed
+# output_file (string) : output file of OpenFAST (.outb/.out) or QBlade (.outq)
+# run_id (string) : name of the run in the archive, "<folder of the output file>__<output file>" by default (see archive_run_id)
+# channels (list) : channels to archive, all the channels if None
+# chunk_steps (int) : time steps of each chunk (compression and statistics)
+# dtype (string) : data type of the archived channels (time is always stored in float64)
+# overwrite (bool) : write again a run already in the archive, otherwise the run is skipped if the output file is not newer
+def archive_run(archive_file, output_file, run_id=None, channels=None, chunk_steps=4096, dtype='float32',
+                compression='gzip', overwrite=False):
+
+    if run_id is None:
+        run_id = archive_run_id(output_file)
+    source_mtime = os.path.getmtime(output_file)
+
+    with h5py.File(archive_file, 'a') as h5:
+        runs = h5.require_group('runs')
+        if run_id in runs:
+            if not overwrite and runs[run_id].attrs.get('source_mtime', 0) >= source_mtime:
+                return run_id
+            del runs[run_id]
+
+        outdata = _read_output_file(output_file, channels)
+        time = outdata.iloc[:, 0].to_numpy(dtype=np.float64)
+        names = list(outdata.columns[1:])
+        n_steps = len(time)
+        chunks = (max(1, min(chunk_steps, n_steps)),)
+
+        run = runs.create_group(run_id)
+        run.attrs['source_file'] = os.path.abspath(output_file)
+        run.attrs['source_mtime'] = source_mtime
+        run.attrs['n_steps'] = n_steps
+        run.attrs['chunk_steps'] = chunks[0]
+        run.attrs['time_name'] = outdata.columns[0]
+        run.attrs['channel_names'] = names
+
+        run.create_dataset('time', data=time, chunks=chunks, compression=compression, shuffle=True)
+        run.create_dataset('chunk_time', data=_chunk_stats(time, chunks[0])[:, :2])
+
+        # channels stored by index, the names may contain "/" (e.g. units "m/s")
+        for kk, name in enumerate(names):
+            values = outdata[name].to_numpy(dtype=dtype)
+            dset = run.create_dataset('channels/%05d' % kk, data=values, chunks=chunks, compression=compression, shuffle=True)
+            dset.attrs['name'] = name
+            stats = _chunk_stats(values.astype(np.float64), chunks[0])
+            run.create_dataset('stats/%05d' % kk, data=stats)
+            dset.attrs['min'] = stats[:, 0].min()
+            dset.attrs['max'] = stats[:, 1].max()
+            dset.attrs['mean'] = np.mean(values, dtype=np.float64)
+            dset.attrs['std'] = np.std(values, dtype=np.float64)
+
+    return run_id
+
+# Write in the archive the outputs of all the runs in "folder" (and subfolders), runs already archived are skipped
+def archive_folder(archive_file, folder, channels=None, chunk_steps=4096, dtype='float32', compression='gzip'):
+
+    run_ids = []
+    for base, dirs, files in os.walk(folder):
+        for x in files:
+            if os.path.splitext(x)[1] in OUTPUT_EXTENSIONS and not any([part in x for part in OUTPUTS_NOT_ARCHIVED]):
+                try:
+                    run_ids.append(archive_run(archive_file, os.path.join(base, x),
+                                               run_id = archive_run_id(os.path.join(base, x), folder), channels = channels,
+                                               chunk_steps = chunk_steps, dtype = dtype, compression = compression))
+                except Exception as e:
+                    print('Output file %s not archived: %s' % (os.path.join(base, x), e))
+
+    print('%d runs in the archive %s' % (len(run_ids), archive_file))
+
+    return run_ids
+
+# Names of the runs in the archive
+def list_archive_runs(archive_file):
+
+    with h5py.File(archive_file, 'r') as h5:
+        return list(h5['runs'].keys()) if 'runs' in h5 else []
+
+# Output files of the runs in the archive, with their modification time when archived (source file as key)
+def read_archive_sources(archive_file):
+
+    if not os.path.isfile(archive_file):
+        return {}
+    with h5py.File(archive_file, 'r') as h5:
+        if 'runs' not in h5:
+            return {}
+        return {str(run.attrs['source_file']): float(run.attrs['source_mtime']) for run in h5['runs'].values()}
+
+# Index of the channel "name" in the run, names with or without units are accepted (e.g. 'PtfmYaw' or 'PtfmYaw_[deg]')
+def _channel_index(run, name):
+
+    names = [str(n) for n in run.attrs['channel_names']]
+    if name in names:
+        return names.index(name)
+    short_names = [n.split('_[')[0].split(' [')[0] for n in names]
+    if name in short_names:
+        return short_names.index(name)
+
+    raise KeyError('Channel {} not in run {}'.format(name, run.name))
+
+# Time histories of the channels of a run as data frame, only the time chunks between tmin and tmax are read
+def read_archive_channels(archive_file, run_id, channels, tmin=None, tmax=None):
+
+    with h5py.File(archive_file, 'r') as h5:
+        run = h5['runs'][run_id]
+        chunk_time = run['chunk_time'][:]
+        chunk_steps = int(run.attrs['chunk_steps'])
+
+        # steps of the chunks containing the time window, then exact selection
+        first = 0 if tmin is None else int(np.sum(chunk_time[:, 1] < tmin))*chunk_steps
+        last = int(run.attrs['n_steps']) if tmax is None else int(np.sum(chunk_time[:, 0] <= tmax))*chunk_steps
+        time = run['time'][first:last]
+        mask = np.ones(len(time), dtype=bool)
+        if tmin is not None:
+            mask &= time >= tmin
+        if tmax is not None:
+            mask &= time <= tmax
+
+        names = [str(n) for n in run.attrs['channel_names']]
+        data = {run.attrs['time_name']: time[mask]}
+        for name in channels:
+            kk = _channel_index(run, name)
+            data[names[kk]] = run['channels/%05d' % kk][first:last][mask]
+
+    return pd.DataFrame(data)
+
+# Run of the archive with the outputs of "output_file", None if the archive does not exist, if the output file is not
+# archived or if it is newer than the archived outputs (output files removed by the garbage collection are found)
+def find_archive_run(archive_file, output_file):
+
+    if archive_file is None or not os.path.isfile(archive_file):
+        return None
+    source = os.path.normcase(os.path.abspath(output_file))
+    with h5py.File(archive_file, 'r') as h5:
+        if 'runs' not in h5:
+            return None
+        runs = h5['runs']
+        # name given by archive_folder on the simulations folder, otherwise search by source file
+        run_id = archive_run_id(output_file)
+        if run_id not in runs or os.path.normcase(str(runs[run_id].attrs['source_file'])) != source:
+            run_id = next((name for name, run in runs.items() if os.path.normcase(str(run.attrs['source_file'])) == source), None)
+        if run_id is None:
+            return None
+        if os.path.isfile(output_file) and os.path.getmtime(output_file) > runs[run_id].attrs['source_mtime']:
+            return None
+
+    return run_id
+
+# Names of the channels (time first, with units) of the output file of a run, from the archive if the run is archived,
+# otherwise from the header of the output file (the whole file is read only for ASCII OpenFAST files)
+def read_output_channel_names(output_file, archive_file=None):
+
+    run_id = find_archive_run(archive_file, output_file)
+    if run_id is not None:
+        with h5py.File(archive_file, 'r') as h5:
+            run = h5['runs'][run_id]
+            return [str(run.attrs['time_name'])] + [str(n) for n in run.attrs['channel_names']]
+    if output_file.endswith('.outq'):
+        return read_qblade_header(output_file)
+    if output_file.endswith('.outb'):
+        with FASTOutputBinaryMap(output_file) as B:
+            return [n+'_['+u.replace('sec','s')+']' for n, u in zip(B.names, B.units)]
+
+    return list(_read_output_file(output_file).columns)
+
+# Channels of the output file of a run as data frame (time as first column) between tmin and tmax, read from the archive
+# if the run is archived (only the time chunks of the window), otherwise from the output file
+def read_output_channels(output_file, channels, archive_file=None, tmin=None, tmax=None):
+
+    run_id = find_archive_run(archive_file, output_file)
+    if run_id is not None:
+        return read_archive_channels(archive_file, run_id, channels, tmin = tmin, tmax = tmax)
+
+    return _read_output_file(output_file, channels, tmin = tmin, tmax = tmax)
+
+# Per-chunk statistics of a channel of a run as data frame (start/end time of each chunk and CHUNK_STATS)
+def read_archive_chunk_stats(archive_file, run_id, channel):
+
+    with h5py.File(archive_file, 'r') as h5:
+        run = h5['runs'][run_id]
+        kk = _channel_index(run, channel)
+        stats = pd.DataFrame(run['stats/%05d' % kk][:], columns=CHUNK_STATS)
+        stats.insert(0, 't_end', run['chunk_time'][:, 1])
+        stats.insert(0, 't_start', run['chunk_time'][:, 0])
+
+    return stats
+
+# Whole-run statistics (min, max, mean, std) of a channel for the runs of the archive (all the runs if None),
+# as data frame with one row per run, runs without the channel are skipped; only the attributes are read
+def read_archive_stats(archive_file, channel, runs=None):
+
+    rows = {}
+    with h5py.File(archive_file, 'r') as h5:
+        for run_id in (runs if runs is not None else h5['runs'].keys()):
+            run = h5['runs'][run_id]
+            try:
+                kk = _channel_index(run, channel)
+            except KeyError:
+                continue
+            attrs = run['channels/%05d' % kk].attrs
+            rows[run_id] = {stat: attrs[stat] for stat in ['min', 'max', 'mean', 'std']}
+
+    return pd.DataFrame.from_dict(rows, orient='index', columns=['min', 'max', 'mean', 'std'])
+
+if __name__ == '__main__':
+
+    folders_path = os.getcwd() + '\\sims\\'
+    archive_file = folders_path + 'outputs_archive' + '.h5'
+    archive_folder(archive_file, folders_path)
+    print(read_archive_stats(archive_file, 'PtfmYaw_[deg]'))
@@ -5,6 +5,7 @@ Created on Tue Feb 15 14:12:47 2022
 @author: Lazzerini Guido
 """
 
+import os
 import scipy as sp
 import numpy as np
 import pandas as pd
@@ -22,6 +23,7 @@ import seaborn as sns
 #import plotly.graph_objects as go
 #from plotly.subplots import make_subplots
 from scipy.stats import pearsonr
+from postproc_archive import read_archive_stats
 
 #sns.set_theme(style="ticks")
 
@@ -36,6 +38,19 @@ df = pd.read_csv(namefile_optimoutput, sep=" ", on_bad_lines='skip')
 print(df['fairlead_radius'])
 df = df.loc[df['fairlead_radius'] != "ABORT"]
 
+# Statistics of the platform motions across the archived runs (postproc_archive.py, written at the end of the
+# optimization), read from the attributes of the archive without reading the output files; skipped if not archived
+
+namefile_archive = r"outputs_archive.h5"
+archive_channels = ["PtfmSurge_[m]", "PtfmRoll_[deg]", "PtfmPitch_[deg]", "PtfmYaw_[deg]"]
+
+if os.path.isfile(namefile_archive):
+    df_archive = pd.concat([read_archive_stats(namefile_archive, channel).add_prefix(channel.split('_[')[0] + '_')
+                            for channel in archive_channels], axis=1)
+    print(df_archive.describe())
+    a = sns.pairplot(df_archive[[c for c in df_archive.columns if c.endswith('_mean') or c.endswith('_std')]], diag_kind="hist")
+    a.savefig('archive_stats_SOFTWIND.png', dpi=200)
+
 #dfDE = pd.read_csv(namefile_DEoptimoutput, sep=" ", on_bad_lines='skip')
 
 # Define method to calculate obj function and cost functions
@@ -5,165 +5,113 @@ Created on Thu May 26 12:06:53 2022
 @author: Guido
 """
 # Import standard libraries
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
-from pyFAST.input_output.fast_output_file import FASTOutputFile
-# Plot time histories 
-def plot_func(simSoftware,evalTime,outdata,folder_path='unused'):
+from plotservice import line_spec, source_line, render_specs
+from postproc_archive import read_output_channel_names, read_output_channels
+
+# Channels of the time histories: (channel, ylabel, title, png name, plot from evalTime), blade pitch in one figure
+TIME_HISTORY_CHANNELS = {'OpenFAST': [("PtfmYaw_[deg]", 'yaw (deg)', 'Yaw Time History', 'yaw', True),
+                                      ("PtfmYaw_[deg]", 'yaw (deg)', 'Yaw Complete Time History', 'yaw_complete', False),
+                                      ("PtfmRoll_[deg]", 'roll (deg)', 'Roll Time History', 'roll', True),
+                                      ("PtfmSurge_[m]", 'surge (m)', 'Surge Time History', 'surge', True),
+                                      ("PtfmPitch_[deg]", 'pitch (deg)', 'Pitch Time History', 'pitch', True),
+                                      ("PtfmHeave_[m]", 'heave (m)', 'Heave Time History', 'heave', True),
+                                      ("RotThrust_[kN]", 'thrust (kN)', 'Thrust Time History', 'thrust', True),
+                                      ("RotPwr_[kW]", 'power (kW)', 'Power Time History', 'power', True),
+                                      (["PtchPMzc1_[deg]","PtchPMzc2_[deg]","PtchPMzc3_[deg]"], 'b. pitch (deg)', 'Blade Pitch Time History', 'bladepitch', True),
+                                      ("RotSpeed_[rpm]", 'rot. speed (RPM)', 'Rot. Speed Time History', 'rotspeed', True)],
+                         'QBlade': [('NP Yaw Z_l [deg]', 'yaw (deg)', 'Yaw Time History', 'yaw', True),
+                                    ('NP Yaw Z_l [deg]', 'yaw (deg)', 'Yaw Complete Time History', 'yaw_complete', False),
+                                    ('NP Roll X_l [deg]', 'roll (deg)', 'Roll Time History', 'roll', True),
+                                    ('X_g COG Pos. [m]', 'surge (m)', 'Surge Time History', 'surge', True),
+                                    ('NP Pitch Y_l [deg]', 'pitch (deg)', 'Pitch Time History', 'pitch', True),
+                                    ('Z_g COG Pos. [m]', 'heave (m)', 'Heave Time History', 'heave', True)]}
+
+# Channels of the mooring time histories (MoorDyn): (channel, ylabel, title, png name, scale)
+MOORING_CHANNELS = [("L1N1PZ_[m]", 'L1N1PZ (m)', 'L1N1PZ Time History', 'L1N1PZ', 1),
+                    ("L2N1PZ_[m]", 'L2N1PZ (m)', 'L2N1PZ Time History', 'L2N1PZ', 1),
+                    ("L3N1PZ_[m]", 'L3N1PZ (m)', 'L3N1PZ Time History', 'L3N1PZ', 1),
+                    ("CON1FZ_[N]", 'Anch. Fz (kN)', 'Con1FZ Time History', 'Con1FZ', 1/1000),
+                    ("CON2FZ_[N]", 'Anch. Fz (kN)', 'Con2FZ Time History', 'Con2FZ', 1/1000),
+                    ("CON3FZ_[N]", 'Anch. Fz (kN)', 'Con3FZ Time History', 'Con3FZ', 1/1000)]
+
+# Lines of the channels: data of "outdata", or references to the channels of "output_file" if given (queued figures)
+def _channel_lines(outdata, time_name, channels, output_file=None, scale=1):
     
-    if simSoftware == 'OpenFAST':
-        time=outdata["Time_[s]"].to_numpy()[:]
-        pitch=outdata["PtfmPitch_[deg]"].to_numpy()[:]
-        yaw=outdata["PtfmYaw_[deg]"].to_numpy()[:]
-        surge=outdata["PtfmSurge_[m]"].to_numpy()[:]
-        heave=outdata["PtfmHeave_[m]"].to_numpy()[:]
-        roll=outdata["PtfmRoll_[deg]"].to_numpy()[:]
-        thrust = outdata["RotThrust_[kN]"].to_numpy()[:]
-        power = outdata["RotPwr_[kW]"].to_numpy()[:]
-        rotspeed = outdata["RotSpeed_[rpm]"].to_numpy()[:]
-        genspeed = outdata["GenSpeed_[rpm]"].to_numpy()[:]
-        bladepitch1 = outdata["PtchPMzc1_[deg]"].to_numpy()[:]
-        bladepitch2 = outdata["PtchPMzc2_[deg]"].to_numpy()[:]
-        bladepitch3 = outdata["PtchPMzc3_[deg]"].to_numpy()[:]
+    if output_file is not None:
+        return [source_line(output_file, time_name, channel, scale=scale) for channel in channels]
+    
+    time = outdata[time_name].to_numpy()
+    return [(time, outdata[channel].to_numpy()*scale, None) for channel in channels]
 
-    elif simSoftware == 'QBlade':
-        time=outdata['Time [s]'].to_numpy()[:]
-        pitch=outdata['NP Pitch Y_l [deg]'].to_numpy()[:]
-        yaw=outdata['NP Yaw Z_l [deg]'].to_numpy()[:]
-        surge=outdata['X_g COG Pos. [m]'].to_numpy()[:]
-        heave=outdata['Z_g COG Pos. [m]'].to_numpy()[:]
-        roll=outdata['NP Roll X_l [deg]'].to_numpy()[:]
-        
-    plt.xlabel('time (s)')
-    plt.ylabel('yaw (deg)')
-    plt.title('Yaw Time History')
-    plt.plot(time,yaw)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_yaw_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('yaw (deg)')
-    plt.title('Yaw Complete Time History')
-    plt.plot(time,yaw)
-    plt.xlim(0, time[-1])
-    plt.savefig(folder_path+"\\output_yaw_complete_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('roll (deg)')
-    plt.title('Roll Time History')
-    plt.plot(time,roll)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_roll_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('surge (m)')
-    plt.title('Surge Time History')
-    plt.plot(time,surge)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_surge_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('pitch (deg)')
-    plt.title('Pitch Time History')
-    plt.plot(time,pitch)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_pitch_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('heave (m)')
-    plt.title('Heave Time History')
-    plt.plot(time,heave)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_heave_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('thrust (kN)')
-    plt.title('Thrust Time History')
-    plt.plot(time,thrust)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_thrust_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('power (kW)')
-    plt.title('Power Time History')
-    plt.plot(time,power)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_power_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('b. pitch (deg)')
-    plt.title('Blade Pitch Time History')
-    plt.plot(time,bladepitch1)
-    plt.plot(time,bladepitch2)
-    plt.plot(time,bladepitch3)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_bladepitch_time_history.png") #save as png
-    plt.clf()
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('rot. speed (RPM)')
-    plt.title('Rot. Speed Time History')
-    plt.plot(time,rotspeed)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_rotspeed_time_history.png") #save as png
-    plt.clf()
+# Specs of the figures of the time histories (see plotservice.py), channels missing in the outputs are skipped
+# output_file (string) : output file of "outdata", the specs reference its channels instead of containing the data
+def time_history_specs(simSoftware,evalTime,outdata,folder_path='unused',group=None,output_file=None):
+    
+    time_name = "Time_[s]" if simSoftware == 'OpenFAST' else 'Time [s]'
+    time = outdata[time_name].to_numpy()
+    
+    specs = []
+    for channels, ylabel, title, name, from_evalTime in TIME_HISTORY_CHANNELS[simSoftware]:
+        channels = channels if isinstance(channels, list) else [channels]
+        if not all([channel in outdata.columns for channel in channels]):
+            continue
+        specs.append(line_spec(_channel_lines(outdata, time_name, channels, output_file),
+                               title = title, xlabel = 'time (s)', ylabel = ylabel,
+                               xlim = (evalTime if from_evalTime else 0, time[-1]),
+                               file = folder_path+"\\output_{name}_time_history.png".format(name=name), group = group))
+    
+    return specs
 
-def plot_func_moor(simSoftware,evalTime,outdata,folder_path='unused'):
+# Specs of the figures of the mooring time histories
+def mooring_time_history_specs(simSoftware,evalTime,outdata,folder_path='unused',group=None,output_file=None):
     
+    specs = []
     if simSoftware == 'OpenFAST':
-        time=outdata["Time_[s]"].to_numpy()[:]
-        Con1FZ=outdata["CON1FZ_[N]"].to_numpy()[:]/1000
-        Con2FZ=outdata["CON2FZ_[N]"].to_numpy()[:]/1000
-        Con3FZ=outdata["CON3FZ_[N]"].to_numpy()[:]/1000
-        L1N1PZ=outdata["L1N1PZ_[m]"].to_numpy()[:]
-        L2N1PZ=outdata["L2N1PZ_[m]"].to_numpy()[:]
-        L3N1PZ=outdata["L3N1PZ_[m]"].to_numpy()[:]
-        
+        time = outdata["Time_[s]"].to_numpy()
+        for channel, ylabel, title, name, scale in MOORING_CHANNELS:
+            specs.append(line_spec(_channel_lines(outdata, "Time_[s]", [channel], output_file, scale),
+                                   title = title, xlabel = 'time (s)', ylabel = ylabel, xlim = (evalTime, time[-1]),
+                                   file = folder_path+"\\output_{name}_time_history.png".format(name=name), group = group))
+    
+    return specs
+
+# Plot time histories, drawn at once or queued in "plot_queue" (plotservice.PlotQueue) to be drawn afterwards
+# output_file (string) : output file of "outdata" read when the queued figures are drawn (the data are queued if None)
+def plot_func(simSoftware,evalTime,outdata,folder_path='unused',plot_queue=None,output_file=None):
+    
+    output_file = output_file if plot_queue is not None else None
+    specs = time_history_specs(simSoftware,evalTime,outdata,folder_path,group=folder_path,output_file=output_file)
+    if plot_queue is not None:
+        plot_queue.add(specs)
+    else:
+        render_specs(specs)
 
-    plt.xlabel('time (s)')
-    plt.ylabel('L1N1PZ (m)')
-    plt.title('L1N1PZ Time History')
-    plt.plot(time,L1N1PZ)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_L1N1PZ_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('L2N1PZ (m)')
-    plt.title('L2N1PZ Time History')
-    plt.plot(time,L2N1PZ)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_L2N1PZ_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('L3N1PZ (m)')
-    plt.title('L3N1PZ Time History')
-    plt.plot(time,L3N1PZ)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_L3N1PZ_time_history.png") #save as png
-    plt.clf()
+def plot_func_moor(simSoftware,evalTime,outdata,folder_path='unused',plot_queue=None,output_file=None):
+    
+    output_file = output_file if plot_queue is not None else None
+    specs = mooring_time_history_specs(simSoftware,evalTime,outdata,folder_path,group=folder_path,output_file=output_file)
+    if plot_queue is not None:
+        plot_queue.add(specs)
+    else:
+        render_specs(specs)
+
+# Plot the time histories of the output file of a run, only the plotted channels are read, from the archive of the
+# outputs (postproc_archive.py) if the run is archived, otherwise from the output file
+# moorings (bool) : plot the mooring time histories of the MoorDyn output file (not archived)
+def plot_run(simSoftware,evalTime,output_file,folder_path='unused',archive_file=None,moorings=False):
+    
+    if moorings:
+        outdata = read_output_channels(output_file, [channel for channel, *_ in MOORING_CHANNELS])
+        plot_func_moor(simSoftware,evalTime,outdata,folder_path)
+        return
     
-    plt.xlabel('time (s)')
-    plt.ylabel('Anch. Fz (kN)')
-    plt.title('Con1FZ Time History')
-    plt.plot(time,Con1FZ)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_Con1FZ_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('Anch. Fz (kN)')
-    plt.title('Con2FZ Time History')
-    plt.plot(time,Con2FZ)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_Con2FZ_time_history.png") #save as png
-    plt.clf()
-    plt.xlabel('time (s)')
-    plt.ylabel('Anch. Fz (kN)')
-    plt.title('Con3FZ Time History')
-    plt.plot(time,Con3FZ)
-    plt.xlim(evalTime, time[-1])
-    plt.savefig(folder_path+"\\output_Con3FZ_time_history.png") #save as png
-    plt.clf()
+    names = read_output_channel_names(output_file, archive_file)
+    channels = [channel for channels, *_ in TIME_HISTORY_CHANNELS[simSoftware]
+                for channel in (channels if isinstance(channels, list) else [channels])]
+    outdata = read_output_channels(output_file, [channel for channel in dict.fromkeys(channels) if channel in names], archive_file)
+    plot_func(simSoftware,evalTime,outdata,folder_path)
 
 if __name__ == '__main__':
 
@@ -172,8 +120,8 @@ if __name__ == '__main__':
     
     templateFolder = r'C:\Users\Utente\Desktop\Work_Guido\Projects\FLOATECH\WP4\triple_spar_optimization_helix\mod_input_files_triple_spar_optimized_constforce_helix'
     simSoftware = 'OpenFAST'
-    outdata=FASTOutputFile(output_filename).toDataFrame()
-    #outdata_moor=FASTOutputFile(output_filename2).toDataFrame()
+    # archive of the outputs (postproc_archive.py), e.g. sims folder + 'outputs_archive.h5', the output file is read if None
+    archive_file = None
     evalTime = 0
-    plot_func(simSoftware,evalTime,outdata,templateFolder)
-    #plot_func_moor(simSoftware,evalTime,outdata_moor,templateFolder)
\ No newline at end of file
+    plot_run(simSoftware,evalTime,output_filename,templateFolder,archive_file)
+    #plot_run(simSoftware,evalTime,output_filename2,templateFolder,moorings=True)
\ No newline at end of file
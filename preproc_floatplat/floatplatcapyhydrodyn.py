@@ -5,9 +5,12 @@ Created on Wed Sep  8 12:34:48 2021
 #  Module for processing hydrodynamics for FLOATING PLATFORMS of wind turbines with "Capytaine"
 #  Run it as an independent script if you need it.
 #  Contains: 
-#  - functions: create_hydrodyn_database, convert_CAPYtoWAMIT_file
+#  - functions: create_hydrodyn_database, convert_CAPYtoWAMIT_file, bem_n_jobs, get_bem_solver, make_symmetric_body
 #
 # omegas is in rad/s and wave direction in rad
+# n_jobs > 1 solves the BEM problems in parallel processes (joblib), use bem_n_jobs to fit them under the optimization workers
+# symmetry = 'reflection' (xOz plane, e.g. single spar) or 'axial' (n_sectors copies around Oz, e.g. triple spar) solves the
+# BEM problems on a symmetric body, the influence matrices are built and decomposed per symmetric block
 
 @author: Guido Lazzerini (99.9%) & Giancarlo Troise (<1%)
 
@@ -15,7 +18,6 @@ Created on Wed Sep  8 12:34:48 2021
 """
 import capytaine as cpt
 import numpy as np
-import matplotlib.pyplot as plt
 import os
 
 import xarray as xr
@@ -23,29 +25,44 @@ import xarray as xr
 from datetime import datetime
 import logging
 
+from preproc_floatplat.floatplatcores import bem_jobs_per_worker
+
 logging.basicConfig(level=logging.INFO)
 
 
-def create_hydrodyn_database(input_mesh_file, omegas, wave_directions = [0],*, show=False,depth = np.infty):
+# BEM solver shared by all the calls in this process, so the Green function tabulation and the engine are built only once
+BEM_SOLVER = None
+
+def create_hydrodyn_database(input_mesh_file, omegas, wave_directions = [0],*, show=False,depth = np.infty, n_jobs = 1, symmetry = None, n_sectors = 3):
     # SOLVE BEM PROBLEMS
     body = cpt.FloatingBody.from_file(input_mesh_file)  # msh file
     body.add_all_rigid_body_dofs()
     body.keep_immersed_part()
 
+    if symmetry is not None:
+        body = make_symmetric_body(body, symmetry, n_sectors)
+
     if show : body.show()
 
     if not np.isin(0, wave_directions):
         print('Error zero direction must be present in wave direction vector')
         return -1
     
-    bem_solver = cpt.BEMSolver()
+    bem_solver = get_bem_solver()
     problems = []
     for wave_direction in wave_directions:
         for omega in omegas:
             if wave_direction==0:
                 problems += [cpt.RadiationProblem(sea_bottom=-depth,omega=omega, body=body, radiating_dof=dof) for dof in body.dofs]
             problems += [cpt.DiffractionProblem(sea_bottom=-depth,omega=omega, body=body, wave_direction=wave_direction)]
-    results = [bem_solver.solve(problem) for problem in problems]
+    # problems with the same omega one after the other, the influence matrices (and their LU decomposition) cached by the
+    # engine are then computed once per omega and reused by all the radiation and diffraction problems
+    problems = sorted(problems, key=lambda problem: problem.omega)
+    if n_jobs == 1:
+        results = [bem_solver.solve(problem) for problem in problems]
+    else:
+        # each joblib worker limits its own OpenMP threads, so the Green function evaluation does not oversubscribe cores
+        results = bem_solver.solve_all(problems, n_jobs=n_jobs)
     #*radiation_results, diffraction_result = results
     dataset = cpt.assemble_dataset(results)
 
@@ -54,20 +71,73 @@ def create_hydrodyn_database(input_mesh_file, omegas, wave_directions = [0],*, s
 
     return dataset
 
+# Return the BEM solver of this process, created at the first call
+def get_bem_solver(matrix_cache_size = 1):
+    global BEM_SOLVER
+
+    if BEM_SOLVER is None:
+        BEM_SOLVER = cpt.BEMSolver(engine=cpt.BasicMatrixEngine(matrix_cache_size=matrix_cache_size))
+
+    return BEM_SOLVER
+
+# Rebuild the body on a symmetric mesh, made of copies of the faces of one half (symmetry = 'reflection', xOz plane) or of one
+# sector around the x axis (symmetry = 'axial', n_sectors sectors around Oz). If the mesh does not have the symmetry,
+# the body is returned unchanged
+def make_symmetric_body(body, symmetry, n_sectors = 3):
+
+    mesh = body.mesh
+    centers = mesh.faces_centers
+
+    if symmetry == 'reflection':
+        half_mesh = mesh.extract_faces(np.where(centers[:,1] > 0)[0])
+        symmetric_mesh = cpt.ReflectionSymmetricMesh(half_mesh, plane=cpt.xOz_Plane, name=mesh.name)
+    elif symmetry == 'axial':
+        angles = np.arctan2(centers[:,1], centers[:,0])
+        sector_mesh = mesh.extract_faces(np.where(np.abs(angles) < np.pi/n_sectors)[0])
+        symmetric_mesh = cpt.AxialSymmetricMesh(sector_mesh, axis=cpt.Oz_axis, nb_repetitions=n_sectors-1, name=mesh.name)
+    else:
+        print('Unknown symmetry %s, the body is solved without symmetries' % symmetry)
+        return body
+
+    # the copies must cover the same surface of the original mesh
+    if symmetric_mesh.nb_faces != mesh.nb_faces or \
+       not np.isclose(np.sum(symmetric_mesh.faces_areas), np.sum(mesh.faces_areas), rtol=1e-3):
+        print('Mesh %s does not have %s symmetry, the body is solved without symmetries' % (mesh.name, symmetry))
+        return body
+
+    symmetric_body = cpt.FloatingBody(mesh=symmetric_mesh, name=body.name)
+    symmetric_body.add_all_rigid_body_dofs()
+
+    return symmetric_body
+
+# Number of parallel BEM jobs for each individual, so that "outer_workers" individuals solved at the same time use at most
+# all the physical cores (same value as the evaluation scheduler, see floatplatcores.bem_jobs_per_worker)
+def bem_n_jobs(outer_workers = 1, max_jobs = None):
+
+    return bem_jobs_per_worker(outer_workers, max_jobs)
+
 # CONVERT CAPYTAINE OUTPUT TO WAMIT OUTPUT FILES ".1", ".3"
 
+# rigid body dofs in WAMIT order (dof number = position + 1)
+WAMIT_DOFS = ["Surge","Sway","Heave","Roll","Pitch","Yaw"]
+
 def convert_CAPYtoWAMIT_file(dataset,output_hyd_namefile):
-    body_name = dataset.body_name.item()
-    body = cpt.FloatingBody.from_file(body_name)  # msh file
-    body.add_all_rigid_body_dofs()
-    body.keep_immersed_part()
     rho = dataset['rho'].item()
     g = dataset['g'].item()
 
-    omegas = dataset['omega'].values.tolist()
-    # fix last value to infinity for 0 period necessary in OpenFast 
-    omegas[-1] = np.infty
-    wave_directions = dataset['wave_direction'].values.tolist()
+    # omegas from the dataset, the first row is written with period -1 (zero frequency) and the last one with period 0
+    # (infinite frequency), both necessary in OpenFast, excitation forces are not written for these two rows
+    omegas = dataset['omega'].values
+    wave_directions = dataset['wave_direction'].values
+    dofs = [dof for dof in WAMIT_DOFS if dof in dataset['influenced_dof'].values]
+    dof_ids = np.array([WAMIT_DOFS.index(dof)+1 for dof in dofs])
+    n_omegas = len(omegas)
+    n_dofs = len(dofs)
+    n_directions = len(wave_directions)
+
+    periods = (2*np.pi)/omegas
+    periods[0] = -1
+    periods[-1] = 0
     
     # Create name of file
     first_file_ext = '.1'
@@ -85,63 +155,42 @@ def convert_CAPYtoWAMIT_file(dataset,output_hyd_namefile):
     first_file = "".join([output_hyd_namefile,dt_string,first_file_ext]) if os.path.exists(first_file) else first_file
     second_file = "".join([output_hyd_namefile,dt_string,second_file_ext]) if os.path.exists(second_file) else second_file
     
-    file_object_1 = open(first_file, "w+")
-    file_object_2 = open(second_file, "w+")
+    # radiation coefficients (file .1): one row for each omega, radiating dof i and influenced dof j, written once for each zero wave direction
+    added_mass = dataset['added_mass'].sel(radiating_dof=dofs, influenced_dof=dofs).transpose('omega','radiating_dof','influenced_dof').values
+    radiation_damping = dataset['radiation_damping'].sel(radiating_dof=dofs, influenced_dof=dofs).transpose('omega','radiating_dof','influenced_dof').values
+    
+    table_1 = np.empty((n_omegas, n_dofs, n_dofs, 5))
+    table_1[:,:,:,0] = periods[:,None,None]
+    table_1[:,:,:,1] = dof_ids[None,:,None]
+    table_1[:,:,:,2] = dof_ids[None,None,:]
+    table_1[:,:,:,3] = added_mass/rho
+    table_1[:,:,:,4] = radiation_damping/(rho*omegas[:,None,None])
+    n_zero_directions = np.count_nonzero(wave_directions == 0)
+    table_1 = np.repeat(table_1, n_zero_directions, axis=0).reshape(-1,5)
+    
+    # excitation forces (file .3): one row for each omega (except first and last), wave direction and influenced dof i
+    exc_force = (dataset['Froude_Krylov_force'] + dataset['diffraction_force']).sel(influenced_dof=dofs).transpose('omega','wave_direction','influenced_dof').values
+    adim_exc_force = exc_force[1:-1]/(rho*g)
     
-    # skip header
-    for omega_k in omegas:
-     for wave_direct_k in wave_directions:
-       for dof_i in body.dofs:
-        if dof_i == "Surge":
-            i = 1
-        elif dof_i == "Sway":
-            i = 2
-        elif dof_i == "Heave":
-            i = 3
-        elif dof_i == "Roll":
-            i = 4
-        elif dof_i == "Pitch":
-            i = 5
-        else:
-            i = 6
-        if omega_k != np.infty and omega_k != omegas[0]:
-            FK_force = dataset['Froude_Krylov_force'].sel(omega = omega_k, wave_direction = wave_direct_k, influenced_dof=dof_i).item()
-            D_force = dataset['diffraction_force'].sel(omega = omega_k, wave_direction = wave_direct_k, influenced_dof=dof_i).item()
-            adim_exc_force = (FK_force + D_force)/(rho*g)
-            mod_aef = np.abs(adim_exc_force)
-            pha_aef = np.angle(adim_exc_force)
-            rea_aef = np.real(adim_exc_force)
-            ima_aef = np.imag(adim_exc_force)
-            line_2 = "{period:.3E}   {direct:.3E}   {dof1:n}   {element1:.5E}   {element2:.5E}   {element3:.5E}   {element4:.5E}\n".format(period = (2*np.pi)/omega_k, direct=wave_direct_k*180/np.pi  ,dof1=i, element1=mod_aef, element2=-pha_aef*180/np.pi,element3=rea_aef,element4=-ima_aef)
-            file_object_2.write(line_2)
-        if wave_direct_k == 0:
-         for dof_j in body.dofs:
-            if dof_j == "Surge":
-                j = 1
-            elif dof_j == "Sway":
-                j = 2
-            elif dof_j == "Heave":
-                j = 3
-            elif dof_j == "Roll":
-                j = 4
-            elif dof_j == "Pitch":
-                j = 5
-            else:
-                j = 6
-            if omega_k == omegas[0]:
-                line_1 = "{period:.3E}   {dof1:n}   {dof2:n}   {element1:.5E}   {element2:.5E}\n".format(period = -1, dof1=i, dof2=j, element1=dataset['added_mass'].sel(omega = omega_k,radiating_dof = dof_i, influenced_dof=dof_j).item()/rho, element2=dataset['radiation_damping'].sel(omega = omega_k,radiating_dof = dof_i, influenced_dof=dof_j).item()/(rho*omega_k))
-            elif omega_k == np.infty:
-                line_1 = "{period:.3E}   {dof1:n}   {dof2:n}   {element1:.5E}   {element2:.5E}\n".format(period = 0, dof1=i, dof2=j, element1=dataset['added_mass'].sel(omega = dataset.omega.to_numpy()[-1],radiating_dof = dof_i, influenced_dof=dof_j).item()/rho, element2=dataset['radiation_damping'].sel(omega = dataset.omega.to_numpy()[-1],radiating_dof = dof_i, influenced_dof=dof_j).item()/(rho*dataset.omega.to_numpy()[-1]))
-            else:
-                line_1 = "{period:.3E}   {dof1:n}   {dof2:n}   {element1:.5E}   {element2:.5E}\n".format(period = (2*np.pi)/omega_k, dof1=i, dof2=j, element1=dataset['added_mass'].sel(omega = omega_k,radiating_dof = dof_i, influenced_dof=dof_j).item()/rho, element2=dataset['radiation_damping'].sel(omega = omega_k,radiating_dof = dof_i, influenced_dof=dof_j).item()/(rho*omega_k))
-            file_object_1.write(line_1)
-            
-    file_object_1.close()
-    file_object_2.close()
+    table_3 = np.empty((max(n_omegas-2,0), n_directions, n_dofs, 7))
+    table_3[:,:,:,0] = periods[1:-1,None,None]
+    table_3[:,:,:,1] = (wave_directions*180/np.pi)[None,:,None]
+    table_3[:,:,:,2] = dof_ids[None,None,:]
+    table_3[:,:,:,3] = np.abs(adim_exc_force)
+    table_3[:,:,:,4] = -np.angle(adim_exc_force)*180/np.pi
+    table_3[:,:,:,5] = np.real(adim_exc_force)
+    table_3[:,:,:,6] = -np.imag(adim_exc_force)
+    table_3 = table_3.reshape(-1,7)
+    
+    with open(first_file, "w+") as file_object_1:
+        np.savetxt(file_object_1, table_1, fmt="%.3E   %d   %d   %.5E   %.5E")
+    with open(second_file, "w+") as file_object_2:
+        np.savetxt(file_object_2, table_3, fmt="%.3E   %.3E   %d   %.5E   %.5E   %.5E   %.5E")
     
     plot_flag = False
     
     if plot_flag:
+        body = cpt.FloatingBody.from_file(dataset.body_name.item())  # msh file
         #plot_CAPY_output(body,dataset,output_hyd_namefile[0:-21])
         plot_CAPY_output(body,dataset,'./')
 
@@ -155,98 +204,47 @@ def convert_CAPYfile_to_WAMITfile(dataset_file,output_hyd_namefile):
     
     return dataset
 
-def plot_CAPY_output(body,dataset,path):
+def plot_CAPY_output(body,dataset,path,plot_queue=None,dataset_file=None):
+    
+    # figures drawn by the plotting service (Agg, no pyplot state), at once or queued in "plot_queue"; queued figures
+    # reference the variables of "dataset_file" (dataset written by create_hydrodyn_database, ".cpt") if given
+    from plotservice import line_spec, source_line, render_specs
     
     trasl_DoFs = ["Surge","Sway","Heave"]
     rot_DoFs = ["Roll","Pitch","Yaw"]
-   
-    plt.figure()
-    for dof in trasl_DoFs:
-        plt.plot(
-            dataset['omega']/(np.pi*2),
-            np.abs(dataset['diffraction_force'].sel(wave_direction=0, influenced_dof=dof)+
-            dataset['Froude_Krylov_force'].sel(wave_direction=0, influenced_dof=dof))/1000,
-            label=dof,
-            marker='o',
-        )
-    plt.xlabel('f (Hz)')
-    plt.ylabel('Excitation force (kN)')
-    plt.legend()
-    plt.savefig(path+"\\trasl_exc_force.png") #save as png
-    plt.clf()
+    freqs = dataset['omega'].values/(np.pi*2)
     
-    plt.figure()
-    for dof in trasl_DoFs:    
-        
-        plt.plot(
-            dataset['omega']/(np.pi*2),
-            (dataset['added_mass'].sel(radiating_dof=dof, influenced_dof=dof))/1000,
-            label=dof,
-            marker='o',
-        )
-    plt.xlabel('f (Hz)')
-    plt.ylabel('added mass (ton)')
-    plt.legend()
-    plt.savefig(path+"\\trasl_added_mass.png") #save as png
-    plt.clf()
+    # quantities: variables of the dataset (summed), absolute value, selection of the dof
+    quantities = {'exc_force': (['diffraction_force', 'Froude_Krylov_force'], True, lambda dof: {'wave_direction': 0, 'influenced_dof': dof}),
+                  'added_mass': (['added_mass'], False, lambda dof: {'radiating_dof': dof, 'influenced_dof': dof}),
+                  'radiation_damping': (['radiation_damping'], False, lambda dof: {'radiating_dof': dof, 'influenced_dof': dof})}
     
-    plt.figure()
-    for dof in trasl_DoFs:
-        plt.plot(
-            dataset['omega']/(np.pi*2),
-            (dataset['radiation_damping'].sel(radiating_dof=dof, influenced_dof=dof))/1000,
-            label=dof,
-            marker='o',
-        )
-    plt.xlabel('f (Hz)')
-    plt.ylabel('radiation damping (kN*s/m)')
-    plt.legend()
-    plt.savefig(path+"\\trasl_radiation_damping.png") #save as png
-    plt.clf()
+    def lines(DoFs, quantity):
+        variables, absolute, sel = quantities[quantity]
+        if plot_queue is not None and dataset_file is not None:
+            return [source_line(dataset_file, 'omega', variables, label=dof, scale=1/1000, x_scale=1/(np.pi*2), sel=sel(dof),
+                                absolute=absolute) for dof in DoFs]
+        series = []
+        for dof in DoFs:
+            values = sum([dataset[variable].sel(**sel(dof)) for variable in variables]).values/1000
+            series.append((freqs, np.abs(values) if absolute else values, dof))
+        return series
     
-    plt.figure()
-    for dof in rot_DoFs:
-        plt.plot(
-            dataset['omega']/(np.pi*2),
-            (np.abs(dataset['diffraction_force'].sel(wave_direction=0, influenced_dof=dof)+
-            dataset['Froude_Krylov_force'].sel(wave_direction=0, influenced_dof=dof)))/1000,
-            label=dof,
-            marker='o',
-        )
-    plt.xlabel('f (Hz)')
-    plt.ylabel('Excitation force (kN*m)')
-    plt.legend()
-    plt.savefig(path+"\\rot_exc_force.png") #save as png
-    plt.clf()
+    figures = [(trasl_DoFs, 'exc_force', 'Excitation force (kN)', 'trasl_exc_force'),
+               (trasl_DoFs, 'added_mass', 'added mass (ton)', 'trasl_added_mass'),
+               (trasl_DoFs, 'radiation_damping', 'radiation damping (kN*s/m)', 'trasl_radiation_damping'),
+               (rot_DoFs, 'exc_force', 'Excitation force (kN*m)', 'rot_exc_force'),
+               (rot_DoFs, 'added_mass', 'added mass (ton*m^2)', 'rot_added_mass'),
+               (rot_DoFs, 'radiation_damping', 'radiation damping (kN*s)', 'rot_radiation_damping')]
     
-    plt.figure()
-    for dof in rot_DoFs:    
-        
-        plt.plot(
-            dataset['omega']/(np.pi*2),
-            (dataset['added_mass'].sel(radiating_dof=dof, influenced_dof=dof))/1000,
-            label=dof,
-            marker='o',
-        )
-    plt.xlabel('f (Hz)')
-    plt.ylabel('added mass (ton*m^2)')
-    plt.legend()
-    plt.savefig(path+"\\rot_added_mass.png") #save as png
-    plt.clf()
+    specs = [line_spec(lines(DoFs, quantity), xlabel='f (Hz)', ylabel=ylabel, legend=True, marker='o',
+                       file=path+"\\{name}.png".format(name=name), group=path)
+             for DoFs, quantity, ylabel, name in figures]
     
-    plt.figure()
-    for dof in rot_DoFs:
-        plt.plot(
-            dataset['omega']/(np.pi*2),
-            (dataset['radiation_damping'].sel(radiating_dof=dof, influenced_dof=dof))/1000,
-            label=dof,
-            marker='o',
-        )
-    plt.xlabel('f (Hz)')
-    plt.ylabel('radiation damping (kN*s)')
-    plt.legend()
-    plt.savefig(path+"\\rot_radiation_damping.png") #save as png
-    plt.clf()
+    if plot_queue is not None:
+        plot_queue.add(specs)
+    else:
+        render_specs(specs)
     
 if __name__ == '__main__':
 
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 10:02:15 2026
+
+#  Cores of the machine shared by the BEM solutions of FLOATING PLATFORMS and the optimization workers: the BEM jobs of
+#  each individual are the physical cores left to each worker (used by floatplatcapyhydrodyn.bem_n_jobs and by the
+#  evaluation scheduler, evalscheduler.py)
+#  Contains:
+#  - functions: physical_cores, bem_jobs_per_worker
+
+@author: Guido Lazzerini
+
+"""
+import os
+
+# Number of physical cores of this machine (logical cores if psutil is not installed)
+def physical_cores():
+
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+    except ImportError:
+        cores = None
+
+    return cores or os.cpu_count() or 1
+
+# BEM jobs of each individual, so that "n_workers" individuals solved at the same time use at most all the physical cores
+def bem_jobs_per_worker(n_workers=1, max_jobs=None):
+
+    n_jobs = max(1, physical_cores() // max(1, n_workers))
+    if max_jobs is not None:
+        n_jobs = min(n_jobs, max_jobs)
+
+    return n_jobs
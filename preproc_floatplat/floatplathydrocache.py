@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:40 2026
+
+#  Module for caching on disk the hydrodynamic databases of FLOATING PLATFORMS (WAMIT ".1", ".3", ".hst" files, hydrostatic
+#  matrix in float64 ".hst.npy" and Capytaine netCDF ".cpt" file), so that repeated or near-duplicate platform geometries
+#  skip the BEM solution.
+#  The cache folder can be shared by several optimization workers:
+#  - entries are written in a temporary folder and renamed into place (atomic on the same file system)
+#  - entries are renamed to a trash folder before being deleted, so a worker never reads a half-deleted entry
+#  - eviction (least recently used entries first) is done by one worker at a time, guarded by a lock file
+#  Contains:
+#  - functions: hydro_cache_key, load_hydro_cache, store_hydro_cache, evict_hydro_cache
+#
+# omegas is in rad/s and wave direction in rad
+
+@author: Guido Lazzerini
+
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+
+# Extensions of the files stored in each cache entry (the ".hst.npy" matrix and the ".cpt" netCDF file are optional)
+HYDRO_CACHE_EXTS = ['.1', '.3', '.hst', '.hst.npy', '.cpt']
+HYDRO_CACHE_REQUIRED_EXTS = ['.1', '.3', '.hst']
+HYDRO_CACHE_BASENAME = 'hydro'
+
+# Build the key of a cache entry from the mesh parameters, the omega grid, the wave directions and the depth
+# mesh_params (dict) : parameters used to build the mesh (e.g. radii, heights, spar position, number of divisions)
+# decimals (int) : number of decimals used to round the floats, near-duplicate geometries share the same key
+def hydro_cache_key(mesh_params, omegas, wave_directions=[0], depth=np.inf, decimals=3):
+
+    def rounded(value):
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+            return int(value)
+        return round(float(value), decimals)
+
+    key_data = {'mesh': {k: rounded(v) for k, v in sorted(mesh_params.items())},
+                'omegas': [rounded(omega) for omega in omegas],
+                'wave_directions': [rounded(direction) for direction in wave_directions],
+                'depth': rounded(depth)}
+
+    key_string = json.dumps(key_data, sort_keys=True)
+
+    return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
+
+# Copy the files of a cache entry to "output_hyd_namefile" + extension, returns False if the entry is not in the cache
+def load_hydro_cache(cache_folder, key, output_hyd_namefile):
+
+    entry_folder = os.path.join(cache_folder, key)
+
+    if not os.path.isdir(entry_folder):
+        return False
+
+    try:
+        for ext in HYDRO_CACHE_EXTS:
+            src_file = os.path.join(entry_folder, HYDRO_CACHE_BASENAME + ext)
+            if ext in HYDRO_CACHE_REQUIRED_EXTS or os.path.isfile(src_file):
+                shutil.copyfile(src_file, output_hyd_namefile + ext)
+        # mark the entry as recently used
+        os.utime(entry_folder, None)
+    except OSError:
+        # the entry was evicted by another worker while copying
+        print('Hydrodynamic cache entry %s not available, going to recalculate it' % key)
+        return False
+
+    print('Hydrodynamic database loaded from cache entry %s' % key)
+
+    return True
+
+# Store the files "hyd_namefile" + extension in the cache, then evict old entries if the cache is too large
+# src_files (dict) : optional, extension as key and file path as value, for the files not named "hyd_namefile" + extension
+def store_hydro_cache(cache_folder, key, hyd_namefile, src_files={}, max_size_mb=2000, max_entries=None):
+
+    os.makedirs(cache_folder, exist_ok=True)
+    entry_folder = os.path.join(cache_folder, key)
+
+    if os.path.isdir(entry_folder):
+        return True
+
+    tmp_folder = os.path.join(cache_folder, '.tmp_' + uuid.uuid4().hex)
+    os.mkdir(tmp_folder)
+
+    try:
+        for ext in HYDRO_CACHE_EXTS:
+            src_file = src_files.get(ext, hyd_namefile + ext)
+            if os.path.isfile(src_file):
+                shutil.copyfile(src_file, os.path.join(tmp_folder, HYDRO_CACHE_BASENAME + ext))
+            elif ext in HYDRO_CACHE_REQUIRED_EXTS:
+                print('No "%s" file was found, hydrodynamic database not stored in cache' % ext)
+                shutil.rmtree(tmp_folder, ignore_errors=True)
+                return False
+        os.rename(tmp_folder, entry_folder)
+    except OSError:
+        # another worker stored the same entry in the meantime
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+
+    evict_hydro_cache(cache_folder, max_size_mb=max_size_mb, max_entries=max_entries)
+
+    return True
+
+# Delete the least recently used entries until the cache is smaller than "max_size_mb" and has at most "max_entries" entries
+def evict_hydro_cache(cache_folder, max_size_mb=2000, max_entries=None, lock_timeout=600):
+
+    lock_file = os.path.join(cache_folder, '.evict.lock')
+
+    # only one worker at a time evicts entries, stale locks (crashed workers) are removed after "lock_timeout" s
+    try:
+        if time.time() - os.path.getmtime(lock_file) > lock_timeout:
+            os.remove(lock_file)
+    except OSError:
+        pass
+    try:
+        lock_fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except OSError:
+        return False
+
+    try:
+        entries = []
+        for name in os.listdir(cache_folder):
+            entry_folder = os.path.join(cache_folder, name)
+            if name.startswith('.') or not os.path.isdir(entry_folder):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_folder))
+                entries.append((os.path.getmtime(entry_folder), size, name))
+            except OSError:
+                continue
+
+        # least recently used first
+        entries.sort()
+        total_size = sum(entry[1] for entry in entries)
+        max_size = max_size_mb*1024**2 if max_size_mb is not None else np.inf
+        max_number = max_entries if max_entries is not None else np.inf
+
+        while entries and (total_size > max_size or len(entries) > max_number):
+            mtime, size, name = entries.pop(0)
+            trash_folder = os.path.join(cache_folder, '.trash_' + uuid.uuid4().hex)
+            try:
+                os.rename(os.path.join(cache_folder, name), trash_folder)
+            except OSError:
+                continue
+            shutil.rmtree(trash_folder, ignore_errors=True)
+            total_size -= size
+    finally:
+        os.close(lock_fd)
+        os.remove(lock_file)
+
+    return True
@@ -6,6 +6,7 @@ Created on Fri Sep 10 12:29:39 2021
 #  Run it as an independent script if you need it.
 #  Contains: 
 #  - functions: write_hydrost_file,
+#               read_hydrost_file,
 #               get_hydrost,
 #               calc_equil,
 #               print_mesh_quality,
@@ -75,6 +76,19 @@ def write_hydrost_file(input_mesh_file,output_hst_namefile, * ,CoG_Z = 0, rho=10
     
     return True,complete_name,K_hst, K_dim
 
+# Read a hydrostatic file written by "write_hydrost_file", returns the non-dimensional restoring matrix K_hst (6x6 list)
+def read_hydrost_file(hst_file):
+
+    K_hst = [[0, 0, 0, 0, 0, 0] for i in range(6)]
+
+    with open(hst_file, "r") as file_object:
+        for line in file_object:
+            splits = line.split()
+            if len(splits) == 3:
+                K_hst[int(splits[0])-1][int(splits[1])-1] = float(splits[2])
+
+    return K_hst
+
 def get_hydrost(input_mesh_file, * , CoG_Z= 0, rho=1023, g=9.81,show = False):
 
     V, F = mmio.load_MSH(input_mesh_file)
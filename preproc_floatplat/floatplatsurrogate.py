@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:05:13 2026
+
+#  Module for surrogate hydrodynamics of FLOATING PLATFORMS: Capytaine databases are precomputed (offline) on a grid of
+#  values of one geometric parameter (e.g. "SparDistance") and interpolated (online) for each new value of the parameter,
+#  so that WAMIT files are written without running a BEM solution.
+#  Run it offline with "build_hydro_surrogate" before the optimization, then use "interp_hydro_surrogate" in the loop.
+#  Contains:
+#  The settings of the BEM solutions (depth, wave directions, symmetry) and the fixed parameters of the geometry ("attrs")
+#  are stored in the surrogate, "hydro_surrogate_mismatch" compares them with the current model before interpolating.
+#  - functions: build_hydro_surrogate, load_hydro_surrogate, hydro_surrogate_mismatch, interp_hydro_surrogate,
+#    validate_hydro_surrogate
+#
+# omegas is in rad/s and wave direction in rad
+
+@author: Guido Lazzerini
+
+"""
+import os
+
+import numpy as np
+import xarray as xr
+from scipy.interpolate import CubicSpline
+
+from preproc_floatplat.floatplatcapyhydrodyn import create_hydrodyn_database
+
+# Hydrodynamic coefficients interpolated by the surrogate
+HYDRO_SURROGATE_VARS = ['added_mass', 'radiation_damping', 'diffraction_force', 'Froude_Krylov_force']
+
+# Surrogates already loaded in this process, with file path as key
+HYDRO_SURROGATES = {}
+
+# Solve the BEM problems for each value of the parameter in "param_values" and save the stacked databases in "surrogate_file"
+# create_mesh (function) : create_mesh(mesh_namefile, param_value) writes the mesh file mesh_namefile + ".msh"
+# validate_values (list) : values of the parameter, not in the grid, used to check the interpolation error against exact solutions
+# symmetry (string) : symmetry used by the BEM solver (see create_hydrodyn_database)
+# attrs (dict) : fixed parameters of the geometry (numbers or strings), compared with the current model before interpolating
+def build_hydro_surrogate(param_values, create_mesh, omegas, wave_directions=[0], *, surrogate_file, work_folder,
+                          param_name='SparDistance', depth=np.inf, method='linear', validate_values=None, n_jobs=1,
+                          symmetry=None, attrs=None):
+
+    param_values = np.sort(np.asarray(param_values, dtype=float))
+
+    if len(param_values) < 2:
+        print('Error at least two values of %s are needed to build the surrogate' % param_name)
+        return -1
+
+    os.makedirs(work_folder, exist_ok=True)
+
+    datasets = []
+    for kk, param_value in enumerate(param_values):
+        print('Building surrogate: %s = %.4f (%d of %d)' % (param_name, param_value, kk+1, len(param_values)))
+        dataset = solve_hydro_point(param_value, create_mesh, omegas, wave_directions, work_folder, "surrogate_%d" % kk, depth, n_jobs,
+                                    symmetry)
+        datasets.append(dataset[HYDRO_SURROGATE_VARS].drop_vars('body_name', errors='ignore'))
+
+    surrogate = xr.concat(datasets, dim=param_name)
+    surrogate = surrogate.assign_coords({param_name: param_values})
+    surrogate.attrs['param_name'] = param_name
+    surrogate.attrs.update(_surrogate_settings(wave_directions, depth, symmetry, attrs))
+
+    # interpolation error against exact solutions at held-out values
+    if validate_values is None:
+        validate_values = [0.5*(param_values[len(param_values)//2-1] + param_values[len(param_values)//2])]
+
+    for kk, param_value in enumerate(validate_values):
+        exact_dataset = solve_hydro_point(param_value, create_mesh, omegas, wave_directions, work_folder, "surrogate_check_%d" % kk,
+                                          depth, n_jobs, symmetry)
+        errors = validate_hydro_surrogate(surrogate, exact_dataset, param_value, method=method)
+        for var in HYDRO_SURROGATE_VARS:
+            surrogate.attrs['max_rel_error_%s_%d' % (var, kk)] = errors[var]
+        surrogate.attrs['validate_value_%d' % kk] = param_value
+
+    surrogate.to_netcdf(surrogate_file, engine='h5netcdf', invalid_netcdf=True)
+    HYDRO_SURROGATES[surrogate_file] = surrogate
+
+    return surrogate
+
+# Create the mesh and solve the BEM problems for one value of the parameter
+def solve_hydro_point(param_value, create_mesh, omegas, wave_directions, work_folder, name, depth, n_jobs=1, symmetry=None):
+
+    mesh_namefile = os.path.join(work_folder, name)
+    create_mesh(mesh_namefile, param_value)
+
+    return create_hydrodyn_database(mesh_namefile + ".msh", omegas, wave_directions=wave_directions, depth=depth, n_jobs=n_jobs,
+                                    symmetry=symmetry)
+
+# Settings of the BEM solutions and fixed parameters of the geometry, as attributes of the surrogate (netCDF attributes:
+# numbers, arrays and strings, the symmetry None is stored as 'None')
+def _surrogate_settings(wave_directions, depth, symmetry, attrs):
+
+    settings = {'depth': float(depth), 'wave_directions': np.asarray(wave_directions, dtype=float), 'symmetry': str(symmetry)}
+    settings.update(attrs or {})
+
+    return settings
+
+# Settings of the surrogate different from those of the current model (empty list if the surrogate can be used):
+# frequencies, wave directions, depth, symmetry and the fixed parameters of the geometry "attrs" (see build_hydro_surrogate)
+# Surrogates built without the settings do not match
+def hydro_surrogate_mismatch(surrogate, omegas, wave_directions=[0], depth=np.inf, symmetry=None, attrs=None):
+
+    mismatch = []
+    if surrogate['omega'].shape != np.shape(omegas) or not np.allclose(surrogate['omega'].values, omegas):
+        mismatch.append('omega')
+
+    for key, value in _surrogate_settings(wave_directions, depth, symmetry, attrs).items():
+        if key not in surrogate.attrs:
+            mismatch.append(key)
+        elif isinstance(value, str):
+            if str(surrogate.attrs[key]) != value:
+                mismatch.append(key)
+        else:
+            # arrays of one element are read back as scalars
+            stored, value = np.atleast_1d(surrogate.attrs[key]), np.atleast_1d(value)
+            if stored.shape != value.shape or not np.allclose(stored, value):
+                mismatch.append(key)
+
+    return mismatch
+
+# Load a surrogate from file, only once per process
+def load_hydro_surrogate(surrogate_file):
+
+    if surrogate_file not in HYDRO_SURROGATES:
+        HYDRO_SURROGATES[surrogate_file] = xr.load_dataset(surrogate_file, engine='h5netcdf')
+
+    return HYDRO_SURROGATES[surrogate_file]
+
+# Interpolate the hydrodynamic coefficients at "param_value", per omega and wave direction
+# mesh_file (string) : mesh of the current geometry, stored as body name in the returned dataset (needed by convert_CAPYtoWAMIT_file)
+# method (string) : 'linear' or 'cubic' interpolation along the parameter
+# returns a dataset with the same structure of "create_hydrodyn_database" or None if "param_value" is out of the surrogate grid
+def interp_hydro_surrogate(surrogate, param_value, mesh_file=None, method='linear'):
+
+    param_name = surrogate.attrs.get('param_name', 'SparDistance')
+    param_values = surrogate[param_name].values
+
+    if param_value < param_values[0] or param_value > param_values[-1]:
+        print('%s = %.4f is outside the surrogate range [%.4f, %.4f]' % (param_name, param_value, param_values[0], param_values[-1]))
+        return None
+
+    kk = min(np.searchsorted(param_values, param_value, side='right') - 1, len(param_values) - 2)
+    weight = (param_value - param_values[kk])/(param_values[kk+1] - param_values[kk])
+
+    lower = surrogate.isel({param_name: kk})
+    upper = surrogate.isel({param_name: kk+1})
+
+    dataset = lower.copy(deep=True)
+    for var in HYDRO_SURROGATE_VARS:
+        if method == 'cubic':
+            axis = surrogate[var].dims.index(param_name)
+            values = CubicSpline(param_values, surrogate[var].values, axis=axis)(param_value)
+        else:
+            values = (1 - weight)*lower[var].values + weight*upper[var].values
+        dataset[var] = lower[var].copy(data=values)
+
+    dataset = dataset.assign_coords({param_name: param_value})
+    if mesh_file is not None:
+        dataset = dataset.assign_coords(body_name=mesh_file)
+
+    return dataset
+
+# Maximum relative error (referred to the maximum absolute value over the frequencies) of the surrogate against an exact dataset
+def validate_hydro_surrogate(surrogate, exact_dataset, param_value, method='linear'):
+
+    dataset = interp_hydro_surrogate(surrogate, param_value, method=method)
+    param_name = surrogate.attrs.get('param_name', 'SparDistance')
+
+    errors = {}
+    for var in HYDRO_SURROGATE_VARS:
+        exact = exact_dataset[var].transpose(*dataset[var].dims).values
+        scale = np.max(np.abs(exact))
+        errors[var] = float(np.max(np.abs(dataset[var].values - exact))/scale) if scale > 0 else 0.0
+        print('Surrogate error at %s = %.4f: %s max relative error %.3E' % (param_name, param_value, var, errors[var]))
+
+    return errors
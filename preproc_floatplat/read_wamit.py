@@ -5,6 +5,8 @@ Created on Sat Aug 13 16:24:00 2022
 @author: Giancarlo
 """
 
+import os
+
 import pandas as pd
 import numpy as np
 import xarray as xr
@@ -16,67 +18,117 @@ class WamitData:
         self.addedMass = addedMass
         self.radDamping = radDamping
         self.excForces = excForces
-        
-    def read_wamit(self, filename):
-    
-        # read radiation coefficients (file .1) --> output a dictionary with omega (rad/s) as key value 
-        df1 = pd.read_csv(filename+'.1', skiprows = 0, delim_whitespace=True, na_values=[''], names = ['period', 'i', 'j', 'A', 'B'])    
-    
-        omega1=np.zeros(len(df1))
-        omega1=2*np.pi/df1['period']
-        omega1[omega1<0]=0
-        omega1=np.unique(omega1)
-        omega1=np.sort(omega1)
-        self.omega1=omega1
-        
-        self.addedMass = {}
-        self.radDamping = {}
-        for kk in range(len(omega1)):
-            self.addedMass[omega1[kk]]=np.zeros([6,6])
-            self.radDamping[omega1[kk]]=np.zeros([6,6])
-
-        for kk in range(len(df1)):
-            if df1['period'].iloc[kk] != -1:
-                self.addedMass[2*np.pi/df1['period'].iloc[kk]][df1['i'].iloc[kk]-1,df1['j'].iloc[kk]-1]=df1['A'].iloc[kk]
-                self.radDamping[2*np.pi/df1['period'].iloc[kk]][df1['i'].iloc[kk]-1,df1['j'].iloc[kk]-1]=df1['B'].iloc[kk]
-            else:
-                self.addedMass[0][df1['i'].iloc[kk]-1,df1['j'].iloc[kk]-1]=df1['A'].iloc[kk]
-                self.radDamping[0][df1['i'].iloc[kk]-1,df1['j'].iloc[kk]-1]=df1['B'].iloc[kk]
-        
-        # read excitation force coefficients (file .3) 
-        df3 = pd.read_csv(filename+'.3', skiprows = 0, delim_whitespace=True, names = ['period', 'beta', 'i', 'Mod', 'Phase', 'Re', 'Im'])
-        omega3=np.zeros(len(df3))
-        omega3=2*np.pi/df3['period']
-        omega3[omega3<0]=0
-        omega3=np.unique(omega3)
-        omega3=np.sort(omega3)
-        self.omega3=omega3
-        
-        beta=np.zeros(len(df3))
-        beta=df3['beta']
-        beta=np.unique(beta)
-        beta=np.sort(beta)
-        self.beta=beta
-        
-        self.excForces = {}
-        for ii in range(len(omega3)):
-            for jj in range(len(beta)):
-                self.excForces[(omega3[ii],beta[jj])]=np.zeros([6,2])
-            
-        for kk in range(len(df3)):
-                if df3['period'].iloc[kk] != -1:
-                    self.excForces[(2*np.pi/df3['period'].iloc[kk],df3['beta'].iloc[kk])][df3['i'].iloc[kk]-1,0]=df3['Mod'].iloc[kk]
-                    self.excForces[(2*np.pi/df3['period'].iloc[kk],df3['beta'].iloc[kk])][df3['i'].iloc[kk]-1,1]=df3['Phase'].iloc[kk]
-                else:
-                    self.excForces[(0,df3['beta'].iloc[kk])][df3['i'].iloc[kk]-1,0]=df3['Mod'].iloc[kk]
-                    self.excForces[(0,df3['beta'].iloc[kk])][df3['i'].iloc[kk]-1,1]=df3['Phase'].iloc[kk]
-        
+
+    # Read WAMIT files ".1" and ".3" in dense arrays:
+    #   omega1 (n_omega1), A and B (n_omega1, 6, 6) radiation coefficients, period -1 is omega 0 and period 0 is omega inf
+    #   omega3 (n_omega3), beta (n_beta), excMod, excPhase, excRe, excIm (n_omega3, n_beta, 6) excitation force coefficients
+    # dictionaries addedMass, radDamping (omega as key) are views of A and B, excForces ((omega, beta) as key, [mod, phase] as value)
+    # holds copies of excMod and excPhase (changes to the arrays are not seen by excForces)
+    # use_cache (bool) : store the arrays in filename + ".npz" and read them from there if it is newer than the WAMIT files
+    def read_wamit(self, filename, use_cache=False):
+
+        cache_file = filename+'.npz'
+        wamit_mtime = max(os.path.getmtime(filename+'.1'), os.path.getmtime(filename+'.3'))
+
+        if use_cache and os.path.isfile(cache_file) and os.path.getmtime(cache_file) >= wamit_mtime:
+            with np.load(cache_file) as data:
+                for key in ['omega1', 'A', 'B', 'omega3', 'beta', 'excMod', 'excPhase', 'excRe', 'excIm']:
+                    setattr(self, key, data[key])
+            self._set_dicts()
+            return True
+
+        # read radiation coefficients (file .1) --> columns period, i, j, A, B
+        data1 = pd.read_csv(filename+'.1', skiprows = 0, sep=r'\s+', header=None, na_values=[''], names = ['period', 'i', 'j', 'A', 'B']).to_numpy()
+
+        omega1, iom1 = self._periods_to_omegas(data1[:,0])
+        self.omega1 = omega1
+
+        ii = data1[:,1].astype(int)-1
+        jj = data1[:,2].astype(int)-1
+        self.A = np.zeros([len(omega1),6,6])
+        self.B = np.zeros([len(omega1),6,6])
+        self.A[iom1,ii,jj] = data1[:,3]
+        self.B[iom1,ii,jj] = data1[:,4]
+
+        # read excitation force coefficients (file .3) --> columns period, beta, i, Mod, Phase, Re, Im
+        data3 = pd.read_csv(filename+'.3', skiprows = 0, sep=r'\s+', header=None, names = ['period', 'beta', 'i', 'Mod', 'Phase', 'Re', 'Im']).to_numpy()
+
+        omega3, iom3 = self._periods_to_omegas(data3[:,0])
+        self.omega3 = omega3
+
+        beta, ibeta = np.unique(data3[:,1], return_inverse=True)
+        self.beta = beta
+
+        ii = data3[:,2].astype(int)-1
+        self.excMod = np.zeros([len(omega3),len(beta),6])
+        self.excPhase = np.zeros([len(omega3),len(beta),6])
+        self.excRe = np.zeros([len(omega3),len(beta),6])
+        self.excIm = np.zeros([len(omega3),len(beta),6])
+        self.excMod[iom3,ibeta,ii] = data3[:,3]
+        self.excPhase[iom3,ibeta,ii] = data3[:,4]
+        self.excRe[iom3,ibeta,ii] = data3[:,5]
+        self.excIm[iom3,ibeta,ii] = data3[:,6]
+
+        self._set_dicts()
+
+        if use_cache:
+            np.savez(cache_file, omega1=self.omega1, A=self.A, B=self.B, omega3=self.omega3, beta=self.beta,
+                     excMod=self.excMod, excPhase=self.excPhase, excRe=self.excRe, excIm=self.excIm)
+
         return True
 
+    # Index of "omega" in the radiation (file=1) or excitation (file=3) frequencies, within a relative tolerance
+    def omega_index(self, omega, file=1, rtol=1e-6):
+
+        omegas = self.omega1 if file == 1 else self.omega3
+        kk = np.clip(np.searchsorted(omegas, omega), 1, len(omegas)-1)
+        kk = kk-1 if abs(omega-omegas[kk-1]) <= abs(omega-omegas[kk]) else kk
+        if not np.isclose(omegas[kk], omega, rtol=rtol, atol=0) and omegas[kk] != omega:
+            raise KeyError('omega {} not found in WAMIT data'.format(omega))
+
+        return kk
+
+    # Added mass and radiation damping (6x6) linearly interpolated at "omega" (finite frequencies only)
+    def interp_radiation(self, omega):
+
+        finite = np.isfinite(self.omega1)
+        A = self._interp(omega, self.omega1[finite], self.A[finite])
+        B = self._interp(omega, self.omega1[finite], self.B[finite])
+
+        return A, B
+
+    # Complex excitation force coefficients (n_beta x 6) linearly interpolated at "omega" (finite frequencies only)
+    def interp_excitation(self, omega):
+
+        finite = np.isfinite(self.omega3)
+        exc = self.excRe[finite] + 1j*self.excIm[finite]
+
+        return self._interp(omega, self.omega3[finite], exc)
+
+    @staticmethod
+    def _interp(omega, omegas, values):
+        kk = np.clip(np.searchsorted(omegas, omega)-1, 0, len(omegas)-2)
+        weight = np.clip((omega-omegas[kk])/(omegas[kk+1]-omegas[kk]), 0, 1)
+        return (1-weight)*values[kk] + weight*values[kk+1]
+
+    @staticmethod
+    def _periods_to_omegas(periods):
+        with np.errstate(divide='ignore'):
+            omegas = 2*np.pi/periods
+        omegas[omegas<0] = 0
+        return np.unique(omegas, return_inverse=True)
+
+    def _set_dicts(self):
+        self.addedMass = dict(zip(self.omega1, self.A))
+        self.radDamping = dict(zip(self.omega1, self.B))
+        self.excForces = {}
+        for ii in range(len(self.omega3)):
+            for jj in range(len(self.beta)):
+                self.excForces[(self.omega3[ii],self.beta[jj])] = np.stack([self.excMod[ii,jj], self.excPhase[ii,jj]], axis=1)
+
 if __name__=='__main__':
-    
+
     wm=WamitData()
     print()
-    
+
     wm.read_wamit(filename=r'D:\04_Floatech\WP2\float_plat_mod\run_capytaine_SW_rot\SW_Capytaine_rot')
-    
\ No newline at end of file
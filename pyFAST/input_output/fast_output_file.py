@@ -7,6 +7,7 @@ Main content:
 - data, info = def load_output(filename)
 - data, info = def load_ascii_output(filename)
 - data, info = def load_binary_output(filename, use_buffer=True)
+- class FASTOutputBinaryMap()  (memory-mapped, lazily decoded binary output)
 - def writeDataFrame(df, filename, binary=True)
 - def writeBinary(fileName, channels, chanNames, chanUnits, fileID=2, descStr='')
 """
@@ -83,7 +84,12 @@ class FASTOutputFile(File):
         # --- Calling (children) function to read
         self._read(**kwargs)
 
-    def _read(self):
+    def _read(self, channels=None, tmin=None, tmax=None, dtype='float64'):
+        """ 
+        For binary files, `channels` (list of channel names, with or without units), `tmin` and `tmax` 
+        restrict the data read to the given channels and time window (tmin <= t <= tmax). 
+        Only the selected data are decoded, in the precision `dtype` (see FASTOutputBinaryMap).
+        """
         def readline(iLine):
             with open(self.filename) as f:
                 for i, line in enumerate(f):
@@ -98,6 +104,9 @@ class FASTOutputFile(File):
         try:
             if ext in ['.out','.elev','.dbg','.dbg2']:
                 self.data, self.info = load_ascii_output(self.filename)
+            elif ext=='.outb' and (channels is not None or tmin is not None or tmax is not None):
+                self.data, self.info = load_binary_output_selection(self.filename, channels=channels, tmin=tmin, tmax=tmax, dtype=dtype)
+                self['binary']=True
             elif ext=='.outb':
                 self.data, self.info = load_binary_output(self.filename)
                 self['binary']=True
@@ -170,6 +179,11 @@ class FASTOutputFile(File):
 # --------------------------------------------------------------------------------
 # --- Helper low level functions 
 # --------------------------------------------------------------------------------
+FileFmtID_WithTime              = 1 # File identifiers used in FAST
+FileFmtID_WithoutTime           = 2
+FileFmtID_NoCompressWithoutTime = 3
+FileFmtID_ChanLen_In            = 4
+
 def load_output(filename):
     """Load a FAST binary or ascii output file
 
@@ -230,6 +244,7 @@ def load_binary_output(filename, use_buffer=True):
     03/09/15: Ported from ReadFASTbinary.m by Mads M Pedersen, DTU Wind
     24/10/18: Low memory/buffered version by E. Branlard, NREL
     18/01/19: New file format for exctended channels, by E. Branlard, NREL
+    Packed data decoded with np.fromfile (no struct unpacking) and scaled with vectorized operations
 
     Info about ReadFASTbinary.m:
     % Author: Bonnie Jonkman, National Renewable Energy Laboratory
@@ -237,10 +252,6 @@ def load_binary_output(filename, use_buffer=True):
     %
     %  Edited for FAST v7.02.00b-bjj  22-Oct-2012
     """
-    def fread(fid, n, type):
-        fmt, nbytes = {'uint8': ('B', 1), 'int16':('h', 2), 'int32':('i', 4), 'float32':('f', 4), 'float64':('d', 8)}[type]
-        return struct.unpack(fmt * n, fid.read(nbytes * n))
-
     def freadRowOrderTableBuffered(fid, n, type_in, nCols, nOff=0, type_out='float64'):
         """ 
         Reads of row-ordered table from a binary file.
@@ -255,81 +266,32 @@ def load_binary_output(filename, use_buffer=True):
         @author E.Branlard, NREL
 
         """
-        fmt, nbytes = {'uint8': ('B', 1), 'int16':('h', 2), 'int32':('i', 4), 'float32':('f', 4), 'float64':('d', 8)}[type_in]
         nLines          = int(n/nCols)
-        GoodBufferSize  = 4096*40
-        nLinesPerBuffer = int(GoodBufferSize/nCols)
-        BufferSize      = nCols * nLinesPerBuffer
-        nBuffer         = int(n/BufferSize)
+        GoodBufferSize  = 4096*40*16
+        nLinesPerBuffer = max(int(GoodBufferSize/nCols),1)
         # Allocation of data
-        data = np.zeros((nLines,nCols+nOff), dtype = type_out)
+        data = np.empty((nLines,nCols+nOff), dtype = type_out)
         # Reading
-        try:
-            nIntRead   = 0
-            nLinesRead = 0
-            while nIntRead<n:
-                nIntToRead = min(n-nIntRead, BufferSize)
-                nLinesToRead = int(nIntToRead/nCols)
-                Buffer = np.array(struct.unpack(fmt * nIntToRead, fid.read(nbytes * nIntToRead)))
-                Buffer = Buffer.reshape(-1,nCols)
-                data[ nLinesRead:(nLinesRead+nLinesToRead),  nOff:(nOff+nCols)  ] = Buffer
-                nLinesRead = nLinesRead + nLinesToRead
-                nIntRead   = nIntRead   + nIntToRead
-        except:
-            raise Exception('Read only %d of %d values in file:' % (nIntRead, n, filename))
+        nLinesRead = 0
+        while nLinesRead<nLines:
+            nLinesToRead = min(nLines-nLinesRead, nLinesPerBuffer)
+            Buffer = np.fromfile(fid, dtype=type_in, count=nLinesToRead*nCols)
+            if len(Buffer)<nLinesToRead*nCols:
+                raise Exception('Read only %d of %d values in file: %s' % (nLinesRead*nCols+len(Buffer), n, filename))
+            data[ nLinesRead:(nLinesRead+nLinesToRead),  nOff:(nOff+nCols)  ] = Buffer.reshape(-1,nCols)
+            nLinesRead = nLinesRead + nLinesToRead
         return data
 
-
-    FileFmtID_WithTime              = 1 # File identifiers used in FAST
-    FileFmtID_WithoutTime           = 2
-    FileFmtID_NoCompressWithoutTime = 3
-    FileFmtID_ChanLen_In            = 4
-
     with open(filename, 'rb') as fid:
         #----------------------------        
         # get the header information
         #----------------------------
-
-        FileID = fread(fid, 1, 'int16')[0]  #;             % FAST output file format, INT(2)
-
-        if FileID not in [FileFmtID_WithTime, FileFmtID_WithoutTime, FileFmtID_NoCompressWithoutTime, FileFmtID_ChanLen_In]:
-            raise Exception('FileID not supported {}. Is it a FAST binary file?'.format(FileID))
-
-        if FileID == FileFmtID_ChanLen_In: 
-            LenName = fread(fid, 1, 'int16')[0] # Number of characters in channel names and units
-        else:
-            LenName = 10                    # Default number of characters per channel name
-
-        NumOutChans = fread(fid, 1, 'int32')[0]  #;             % The number of output channels, INT(4)
-        NT = fread(fid, 1, 'int32')[0]  #;             % The number of time steps, INT(4)
-
-        if FileID == FileFmtID_WithTime:
-            TimeScl = fread(fid, 1, 'float64')  #;           % The time slopes for scaling, REAL(8)
-            TimeOff = fread(fid, 1, 'float64')  #;           % The time offsets for scaling, REAL(8)
-        else:
-            TimeOut1 = fread(fid, 1, 'float64')  #;           % The first time in the time series, REAL(8)
-            TimeIncr = fread(fid, 1, 'float64')  #;           % The time increment, REAL(8)
-
-        if FileID == FileFmtID_NoCompressWithoutTime:
-            ColScl = np.ones ((NumOutChans, 1)) # The channel slopes for scaling, REAL(4)
-            ColOff = np.zeros((NumOutChans, 1)) # The channel offsets for scaling, REAL(4)
-        else:
-            ColScl = fread(fid, NumOutChans, 'float32')  # The channel slopes for scaling, REAL(4)
-            ColOff = fread(fid, NumOutChans, 'float32')  # The channel offsets for scaling, REAL(4)
-
-        LenDesc      = fread(fid, 1, 'int32')[0]  #;  % The number of characters in the description string, INT(4)
-        DescStrASCII = fread(fid, LenDesc, 'uint8')  #;  % DescStr converted to ASCII
-        DescStr      = "".join(map(chr, DescStrASCII)).strip()
-
-        ChanName = []  # initialize the ChanName cell array
-        for iChan in range(NumOutChans + 1):
-            ChanNameASCII = fread(fid, LenName, 'uint8')  #; % ChanName converted to numeric ASCII
-            ChanName.append("".join(map(chr, ChanNameASCII)).strip())
-
-        ChanUnit = []  # initialize the ChanUnit cell array
-        for iChan in range(NumOutChans + 1):
-            ChanUnitASCII = fread(fid, LenName, 'uint8')  #; % ChanUnit converted to numeric ASCII
-            ChanUnit.append("".join(map(chr, ChanUnitASCII)).strip()[1:-1])
+        h = read_binary_header(fid)
+        FileID      = h['fileID']
+        NumOutChans = h['NumOutChans']
+        NT          = h['NT']
+        ColScl      = h['ColScl'] # The channel slopes for scaling, REAL(4)
+        ColOff      = h['ColOff'] # The channel offsets for scaling, REAL(4)
 
         # -------------------------
         #  get the channel time series
@@ -338,57 +300,248 @@ def load_binary_output(filename, use_buffer=True):
         nPts = NT * NumOutChans  #;           % number of data points in the file
 
         if FileID == FileFmtID_WithTime:
-            PackedTime = fread(fid, NT, 'int32')  #; % read the time data
+            PackedTime = np.fromfile(fid, dtype=np.int32, count=NT)  #; % read the time data
             cnt = len(PackedTime)
             if cnt < NT:
                 raise Exception('Could not read entire %s file: read %d of %d time values' % (filename, cnt, NT))
 
+        type_in = np.float64 if FileID == FileFmtID_NoCompressWithoutTime else np.int16
         if use_buffer:
             # Reading data using buffers, and allowing an offset for time column (nOff=1)
-            if FileID == FileFmtID_NoCompressWithoutTime:
-                data = freadRowOrderTableBuffered(fid, nPts, 'float64', NumOutChans, nOff=1, type_out='float64')
-            else:
-                data = freadRowOrderTableBuffered(fid, nPts, 'int16', NumOutChans, nOff=1, type_out='float64')
+            data = freadRowOrderTableBuffered(fid, nPts, type_in, NumOutChans, nOff=1, type_out='float64')
         else:
-            # NOTE: unpacking huge data not possible on 32bit machines
-            if FileID == FileFmtID_NoCompressWithoutTime:
-                PackedData = fread(fid, nPts, 'float64')  #; % read the channel data
-            else:
-                PackedData = fread(fid, nPts, 'int16')  #; % read the channel data
-
+            PackedData = np.fromfile(fid, dtype=type_in, count=nPts)  #; % read the channel data
             cnt = len(PackedData)
             if cnt < nPts:
                 raise Exception('Could not read entire %s file: read %d of %d values' % (filename, cnt, nPts))
-            data = np.array(PackedData).reshape(NT, NumOutChans)
+            data = np.empty((NT, NumOutChans+1), dtype='float64')
+            data[:,1:] = PackedData.reshape(NT, NumOutChans)
             del PackedData
 
     if FileID == FileFmtID_WithTime:
-        time = (np.array(PackedTime) - TimeOff) / TimeScl;
+        time = (PackedTime - h['TimeOff']) / h['TimeScl']
     else:
-        time = TimeOut1 + TimeIncr * np.arange(NT)
+        time = h['TimeOut1'] + h['TimeIncr'] * np.arange(NT)
 
     # -------------------------
-    #  Scale the packed binary to real data
+    #  Scale the packed binary to real data (in place, broadcast over the channels)
     # -------------------------
-    if use_buffer:
-        # Scaling Data
-        for iCol in range(NumOutChans):
-            if np.isnan(ColScl[iCol]) and np.isnan(ColOff[iCol]):
-                data[:,iCol+1] = 0 # probably due to a division by zero in Fortran
-            else:
-                data[:,iCol+1] = (data[:,iCol+1] - ColOff[iCol]) / ColScl[iCol]
-        # Adding time column
-        data[:,0] = time
-    else:
-        # NOTE: memory expensive due to time conversion, and concatenation
-        data = (data - ColOff) / ColScl
-        data = np.concatenate([time.reshape(NT, 1), data], 1)
+    data[:,1:] -= ColOff.astype(np.float64)
+    data[:,1:] /= ColScl.astype(np.float64)
+    data[:,1:][:, np.isnan(ColScl) & np.isnan(ColOff)] = 0 # probably due to a division by zero in Fortran
+    # Adding time column
+    data[:,0] = time
 
     info = {'name': os.path.splitext(os.path.basename(filename))[0],
-            'description': DescStr,
+            'description': h['description'],
             'fileID': FileID,
-            'attribute_names': ChanName,
-            'attribute_units': ChanUnit}
+            'attribute_names': h['attribute_names'],
+            'attribute_units': h['attribute_units']}
+    return data, info
+
+
+# --------------------------------------------------------------------------------
+# --- Memory-mapped binary output, lazily decoded
+# --------------------------------------------------------------------------------
+def read_binary_header(fid):
+    """ 
+    Reads the header of an OpenFAST binary output file, from the current position of `fid`.
+    At return, `fid` is positioned at the beginning of the packed time (FileID=1) or of the channel data.
+
+    Returns a dictionary with the keys: 
+        fileID, LenName, NumOutChans, NT, TimeScl, TimeOff, TimeOut1, TimeIncr, ColScl, ColOff, 
+        description, attribute_names, attribute_units (time included)
+    """
+    def fread(n, type):
+        values = np.fromfile(fid, dtype=type, count=n)
+        if len(values)<n:
+            raise Exception('Could not read the header of the binary file')
+        return values
+
+    h = {}
+    FileID = int(fread(1, np.int16)[0])
+    if FileID not in [FileFmtID_WithTime, FileFmtID_WithoutTime, FileFmtID_NoCompressWithoutTime, FileFmtID_ChanLen_In]:
+        raise Exception('FileID not supported {}. Is it a FAST binary file?'.format(FileID))
+    h['fileID'] = FileID
+
+    if FileID == FileFmtID_ChanLen_In: 
+        h['LenName'] = int(fread(1, np.int16)[0])  # Number of characters in channel names and units
+    else:
+        h['LenName'] = 10                          # Default number of characters per channel name
+
+    h['NumOutChans'] = int(fread(1, np.int32)[0])  # The number of output channels, INT(4)
+    h['NT']          = int(fread(1, np.int32)[0])  # The number of time steps, INT(4)
+
+    h['TimeScl'] = h['TimeOff'] = h['TimeOut1'] = h['TimeIncr'] = None
+    if FileID == FileFmtID_WithTime:
+        h['TimeScl'], h['TimeOff']  = fread(2, np.float64) # The time slopes and offsets for scaling, REAL(8)
+    else:
+        h['TimeOut1'], h['TimeIncr'] = fread(2, np.float64) # The first time in the time series and the time increment, REAL(8)
+
+    if FileID == FileFmtID_NoCompressWithoutTime:
+        h['ColScl'] = np.ones (h['NumOutChans'], dtype=np.float32) # The channel slopes for scaling
+        h['ColOff'] = np.zeros(h['NumOutChans'], dtype=np.float32) # The channel offsets for scaling
+    else:
+        h['ColScl'] = fread(h['NumOutChans'], np.float32)  # The channel slopes for scaling, REAL(4)
+        h['ColOff'] = fread(h['NumOutChans'], np.float32)  # The channel offsets for scaling, REAL(4)
+
+    LenDesc = int(fread(1, np.int32)[0])  # The number of characters in the description string, INT(4)
+    h['description'] = "".join(map(chr, fread(LenDesc, np.uint8))).strip()
+
+    names = fread(h['LenName']*(h['NumOutChans']+1), np.uint8).reshape(-1, h['LenName'])
+    units = fread(h['LenName']*(h['NumOutChans']+1), np.uint8).reshape(-1, h['LenName'])
+    h['attribute_names'] = ["".join(map(chr, name)).strip() for name in names]
+    h['attribute_units'] = ["".join(map(chr, unit)).strip()[1:-1] for unit in units]
+    return h
+
+
+class FASTOutputBinaryMap(object):
+    """ 
+    Memory-mapped access to an OpenFAST binary output file (.outb).
+
+    The header is decoded once, when the object is created. The packed channel data stay on disk, 
+    and only the requested channels and time window are de-scaled, on demand. Memory usage and decoding 
+    time are therefore proportional to the data used, not to the size of the file.
+
+    Examples
+    --------
+
+        with FASTOutputBinaryMap('5MW.outb') as B:
+            time, data = B.channels(['PtfmYaw', 'PtfmPitch_[deg]'], tmin=600)
+            df = B.toDataFrame(['RotThrust'], tmin=600, dtype='float32')
+
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as fid:
+            self.header = read_binary_header(fid)
+            offset = fid.tell()
+        h = self.header
+        NT, nChan = h['NT'], h['NumOutChans']
+        self.names = h['attribute_names']
+        self.units = [re.sub(r'[()\[\]]','',u) for u in h['attribute_units']]
+
+        # Packed time (FileID=1) and channel data, mapped but not read
+        dataType = np.float64 if h['fileID'] == FileFmtID_NoCompressWithoutTime else np.int16
+        nBytes   = os.path.getsize(filename)
+        nTimeBytes = 4*NT if h['fileID'] == FileFmtID_WithTime else 0
+        if nBytes < offset + nTimeBytes + NT*nChan*np.dtype(dataType).itemsize:
+            raise Exception('Could not read entire {} file: the file is shorter than expected for {} time steps'.format(filename, NT))
+        self._packedTime = None
+        if nTimeBytes>0:
+            self._packedTime = np.memmap(filename, dtype=np.int32, mode='r', offset=offset, shape=(NT,))
+        self._data = np.memmap(filename, dtype=dataType, mode='r', offset=offset+nTimeBytes, shape=(NT, nChan))
+        self._time = None
+
+    @property
+    def time(self):
+        """ Time vector of the file (decoded once)"""
+        if self._time is None:
+            h = self.header
+            if h['fileID'] == FileFmtID_WithTime:
+                self._time = (np.asarray(self._packedTime, dtype=np.float64) - h['TimeOff']) / h['TimeScl']
+            else:
+                self._time = h['TimeOut1'] + h['TimeIncr'] * np.arange(h['NT'])
+        return self._time
+
+    def channelIndex(self, name):
+        """ Index of a channel in the file (0 is the time), `name` is a channel name, with or without unit (e.g. `PtfmYaw` or `PtfmYaw_[deg]`)"""
+        if name in self.names:
+            return self.names.index(name)
+        labels = [n+'_['+u.replace('sec','s')+']' for n,u in zip(self.names, self.units)]
+        if name in labels:
+            return labels.index(name)
+        raise KeyError('Channel `{}` not found in file: {}'.format(name, self.filename))
+
+    def timeSlice(self, tmin=None, tmax=None):
+        """ Slice of the time steps with tmin <= t <= tmax"""
+        time = self.time
+        i0 = 0       if tmin is None else np.searchsorted(time, tmin, side='left')
+        i1 = len(time) if tmax is None else np.searchsorted(time, tmax, side='right')
+        return slice(i0, i1)
+
+    def channels(self, names=None, tmin=None, tmax=None, dtype='float64'):
+        """ 
+        Returns the time vector and the de-scaled data (array nt x len(names)) of the channels `names` 
+        (all the channels if None) for tmin <= t <= tmax.
+        """
+        return self._decode(self._columns(names), self.timeSlice(tmin, tmax), dtype)
+
+    def iterChunks(self, names=None, chunkSize=100000, tmin=None, tmax=None, dtype='float64'):
+        """ 
+        Iterates over the time vector and the de-scaled data of the channels `names` (all the channels if None)
+        for tmin <= t <= tmax, in chunks of `chunkSize` time steps (memory independent of the length of the file).
+        """
+        iCols = self._columns(names)
+        iRows = self.timeSlice(tmin, tmax)
+        for i0 in range(iRows.start, iRows.stop, chunkSize):
+            yield self._decode(iCols, slice(i0, min(i0+chunkSize, iRows.stop)), dtype)
+
+    def _columns(self, names):
+        if names is None:
+            return np.arange(1, len(self.names))
+        return np.array([self.channelIndex(n) for n in names], dtype=int)
+
+    def _decode(self, iCols, iRows, dtype):
+        time  = self.time[iRows].astype(dtype)
+        iChan = iCols[iCols>0]-1  # channel columns in the packed data (no time)
+
+        packed = self._data[iRows][:, iChan]
+        ColScl = self.header['ColScl'][iChan].astype(dtype)
+        ColOff = self.header['ColOff'][iChan].astype(dtype)
+        values = (packed.astype(dtype) - ColOff) / ColScl
+        values[:, np.isnan(ColScl) & np.isnan(ColOff)] = 0 # probably due to a division by zero in Fortran
+
+        # Time requested as a channel
+        data = np.empty((len(time), len(iCols)), dtype=dtype)
+        data[:, iCols>0]  = values
+        data[:, iCols==0] = time[:,None]
+        return time, data
+
+    def toDataFrame(self, names=None, tmin=None, tmax=None, dtype='float64'):
+        """ DataFrame with the time and the channels `names` (all if None) for tmin <= t <= tmax"""
+        if names is None:
+            iCols = list(range(1, len(self.names)))
+        else:
+            iCols = [self.channelIndex(n) for n in names if self.channelIndex(n)>0]
+        time, data = self.channels([self.names[i] for i in iCols], tmin=tmin, tmax=tmax, dtype=dtype)
+        cols = [self.names[i]+'_['+self.units[i].replace('sec','s')+']' for i in [0]+iCols]
+        return pd.DataFrame(data=np.column_stack([time, data]), columns=cols)
+
+    def close(self):
+        """ Releases the memory maps (the file cannot be removed on Windows while mapped)"""
+        self._packedTime = None
+        self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        s='<{} object> of {} with {} channels and {} time steps\n'.format(type(self).__name__, self.filename, self.header['NumOutChans'], self.header['NT'])
+        return s
+
+
+def load_binary_output_selection(filename, channels=None, tmin=None, tmax=None, dtype='float64'):
+    """ 
+    Load the time and the channels `channels` (all if None) of a binary output file, for tmin <= t <= tmax.
+    Same outputs as `load_binary_output`, restricted to the selection.
+    """
+    with FASTOutputBinaryMap(filename) as B:
+        if channels is None:
+            iCols = list(range(1, len(B.names)))
+        else:
+            iCols = [B.channelIndex(c) for c in channels]
+            iCols = [i for i in iCols if i>0]
+        time, values = B.channels([B.names[i] for i in iCols], tmin=tmin, tmax=tmax, dtype=dtype)
+        data = np.column_stack([time, values])
+        info = {'name': os.path.splitext(os.path.basename(filename))[0],
+                'description': B.header['description'],
+                'fileID': B.header['fileID'],
+                'attribute_names': [B.header['attribute_names'][i] for i in [0]+iCols],
+                'attribute_units': [B.header['attribute_units'][i] for i in [0]+iCols]}
     return data, info
 
 
@@ -515,12 +668,10 @@ def writeBinary(fileName, channels, chanNames, chanUnits, fileID=2, descStr=''):
                 fid.write(struct.pack('@10B', *ordunit))
 
             # Pack data
-            packedData=np.zeros((nT, nChannels), dtype=np.int16)
-            for iChan in range(nChannels):
-                packedData[:,iChan] = np.clip( ColScl[iChan]*dataWithoutTime[:,iChan]+ColOff[iChan], int16Min, int16Max)
+            packedData = np.clip( ColScl*dataWithoutTime+ColOff, int16Min, int16Max).astype(np.int16)
 
             # Write data
-            fid.write(struct.pack('@{}h'.format(packedData.size), *packedData.flatten()))
+            fid.write(packedData.tobytes())
             fid.close()
 
 
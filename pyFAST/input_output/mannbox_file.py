@@ -42,6 +42,11 @@ class MannBoxFile(File):
             OR 
         mb = MannBoxFile('Turb_1024x16x16.u')
 
+        # Memory-mapped box (large boxes), or streaming by chunks of x-slices
+        mb = MannBoxFile('Turb_1024x16x16.u', mode='memmap')
+        for ix, field in mb.iterSlices(chunk_nx=128):
+            print(ix, field.shape)
+
         # Show info
         print(mb)
         print(mb['field'].shape)  
@@ -86,7 +91,7 @@ class MannBoxFile(File):
         if filename:
             self.read(filename=filename,**kwargs)
 
-    def read(self, filename=None, N=None, dy=1, dz=1, y0=None, z0=0, zMid=None):
+    def read(self, filename=None, N=None, dy=1, dz=1, y0=None, z0=0, zMid=None, mode='auto'):
         """ read MannBox
         INPUTS (all optional):
         - filename: name of input file to be read
@@ -94,6 +99,10 @@ class MannBoxFile(File):
         - y0: minimum value of the y vector (default is -ly/2 where ly = ny x dy)
         - z0: minimum value of the z vector (default is 0)
         - zMid: mid value of the z vector (default it lz/2 where lz= nz x dz )
+        - mode: 'load': the box is read in memory (one vectorized read)
+                'memmap': the box is memory-mapped (zero-copy, read-only), values are read from disk when accessed
+                'auto': 'memmap' if the box is larger than half of the available memory, 'load' otherwise
+            In both cases the y-flip is a negative-stride view. See also `iterSlices` to stream the box by x-slices.
 
         SET:
          - the keys 'field', array of shape (nx x ny x nz)
@@ -119,34 +128,47 @@ class MannBoxFile(File):
             else:
                 raise BrokenFormatError('Reading a Mann box requires the knowledge of the dimensions. The dimensions can be inferred from the filename, for instance: `filebase_1024x32x32.u`. Try renaming your file such that the three last digits are the dimensions in x, y and z.')
         nx,ny,nz=N
-        def _read_buffered():
-            data=np.zeros((nx,ny,nz),dtype=np.float32)
-            with open(self.filename, mode='rb') as f:            
-                for ix in range(nx):
-                    Buffer = np.frombuffer(f.read(4*ny*nz), dtype=np.float32) # 4-bytes
-                    data[ix,:,:] =  np.flip(Buffer.reshape((ny,nz)),0)
-            return data
-
-        def _read_nonbuffered():
-            data = np.fromfile(self.filename, np.dtype('<f'), -1)
-            assert len(data) == nx*ny*nz, "Size of turbulence box (%d) does not match nx x ny x nz (%d)" % (len(data),nx*ny*nz)
-            # Fortran order z the fastest, then y then x. We then flip that back to nx, ny, nz
-            data = np.transpose(data.reshape(nz, ny, nx, order='F'), axes=(2,1,0))
-            # The issue is the y-coordinate in Mann Boxes go from Ly/2 -> -Ly/2
-            # So we flip the y-axis, so that the field is consistent with typical y values
-            return np.flip(data, 1) # i.e. data=data[:,::-1,:]
-
-#         self['field']= _read_nonbuffered()
-        self['field']= _read_buffered()
+        size = os.path.getsize(self.filename)
+        if size != 4*nx*ny*nz:
+            raise BrokenFormatError('Size of turbulence box ({:d}) does not match nx x ny x nz ({:d})'.format(int(size/4), nx*ny*nz))
+        self.N = (nx, ny, nz)
+
+        if mode=='auto':
+            available = _available_memory()
+            if available is not None:
+                mode = 'memmap' if size > 0.5*available else 'load'
+            else:
+                mode = 'memmap' if size > 2*1024**3 else 'load'
+        if mode=='memmap':
+            data = np.memmap(self.filename, dtype=np.dtype('<f4'), mode='r', shape=(nx,ny,nz))
+        elif mode=='load':
+            # z the fastest, then y then x (Fortran order of nz, ny, nx)
+            data = np.fromfile(self.filename, np.dtype('<f4')).reshape(nx, ny, nz)
+        else:
+            raise ValueError('Invalid mode {}, use "auto", "load" or "memmap"'.format(mode))
+        # The issue is the y-coordinate in Mann Boxes go from Ly/2 -> -Ly/2
+        # So we flip the y-axis, so that the field is consistent with typical y values
+        self['field']= data[:,::-1,:]
         self['dy']=dy
         self['dz']=dz
         self['y0']=y0
         self['z0']=z0
         self['zMid']=zMid
-#         print('1',self['field'][:,-1,0])
-#         print('2',self['field'][0,-1::-1,0])
-#         print('3',self['field'][0,-1,:])
 
+    def iterSlices(self, chunk_nx=None):
+        """ 
+        Iterate over the box file by chunks of x-slices, without reading the whole box.
+        Yields (ix, field) with field the slices ix:ix+chunk_nx, shape (<=chunk_nx x ny x nz), y flipped.
+        The default chunk is about 64MB.
+        """
+        nx,ny,nz = self.N
+        if chunk_nx is None:
+            chunk_nx = max(1, int(64*1024**2/(4*ny*nz)))
+        with open(self.filename, mode='rb') as f:
+            for ix in range(0, nx, chunk_nx):
+                n = min(chunk_nx, nx-ix)
+                data = np.fromfile(f, np.dtype('<f4'), n*ny*nz).reshape(n, ny, nz)
+                yield ix, data[:,::-1,:]
 
     def write(self, filename=None):
         """ Write mann box """
@@ -322,6 +344,21 @@ class MannBoxFile(File):
             self['field'] = u[icomp, :, : ,: ]
         return self
 
+# --------------------------------------------------------------------------------}
+# --- Helper functions 
+# --------------------------------------------------------------------------------{
+def _available_memory():
+    """ Available memory in bytes, None if unknown """
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES')*os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
 if __name__=='__main__':
     mb = MannBoxFile('mini-u_1024x32x32.bin')
 #     mb = MannBoxFile('mann_bin/mini-u.bin', N=(2,4,8))
@@ -0,0 +1,46 @@
+import unittest
+import os
+import numpy as np
+from pyFAST.input_output.tests.helpers_for_test import MyDir
+from pyFAST.input_output.fast_output_file import FASTOutputFile, FASTOutputBinaryMap, load_binary_output
+
+class Test(unittest.TestCase):
+
+    def test_selection(self):
+        # --- Channels and time window, compared to the full read
+        for FN in ['FASTOutBin.outb', 'FASTOutBin_ID4.outb']:
+            data, info = load_binary_output(os.path.join(MyDir,FN))
+            t0, t1 = data[2,0], data[5,0]
+            F = FASTOutputFile(os.path.join(MyDir,FN), channels=['Wind1VelZ','Wind1VelX_[m/s]'], tmin=t0, tmax=t1)
+            df = F.toDataFrame()
+            self.assertEqual(list(df.columns), ['Time_[s]','Wind1VelZ_[m/s]','Wind1VelX_[m/s]'])
+            np.testing.assert_array_equal(df.values, data[2:6][:,[0,3,1]])
+            # No selection: same data as the standard reader
+            F = FASTOutputFile(os.path.join(MyDir,FN), tmin=data[0,0])
+            np.testing.assert_array_equal(F.data, data)
+            self.assertEqual(F.info['attribute_names'], info['attribute_names'])
+
+    def test_map(self):
+        data, info = load_binary_output(os.path.join(MyDir,'FASTOutBin.outb'))
+        with FASTOutputBinaryMap(os.path.join(MyDir,'FASTOutBin.outb')) as B:
+            self.assertEqual(B.header['NT'], data.shape[0])
+            np.testing.assert_array_equal(B.time, data[:,0])
+            # Time as a channel, float32 decoding
+            time, values = B.channels(['GenPwr','Time'], tmin=0.5, dtype='float32')
+            self.assertEqual(values.dtype, np.float32)
+            np.testing.assert_array_equal(values[:,1], time)
+            np.testing.assert_almost_equal(values[-1,0], 40.57663190807828, 4)
+            self.assertEqual(len(time), np.sum(data[:,0]>=0.5))
+            with self.assertRaises(KeyError):
+                B.channels(['NotAChannel'])
+    def test_chunks(self):
+        # Chunks in a time window, concatenated: same data as the whole selection
+        with FASTOutputBinaryMap(os.path.join(MyDir,'FASTOutBin.outb')) as B:
+            time, values = B.channels(['GenPwr','Wind1VelX'], tmin=0.2)
+            chunks = list(B.iterChunks(['GenPwr','Wind1VelX'], chunkSize=3, tmin=0.2))
+            self.assertTrue(all([len(t)<=3 for t, v in chunks]))
+            np.testing.assert_array_equal(np.concatenate([t for t, v in chunks]), time)
+            np.testing.assert_array_equal(np.concatenate([v for t, v in chunks]), values)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import os
+import numpy as np
+from pyFAST.input_output.tests.helpers_for_test import MyDir
+from pyFAST.input_output.mannbox_file import MannBoxFile
+from pyFAST.input_output.turbsim_file import TurbSimFile
+
+class Test(unittest.TestCase):
+
+    def test_modes(self):
+        # --- Write a box, read it back with the different modes
+        field = np.random.default_rng(0).normal(size=(10,4,6)).astype(np.float32)
+        mb = MannBoxFile()
+        mb['field'] = field
+        filename = os.path.join(MyDir,'MannBox_TMP_10x4x6.u')
+        mb.write(filename)
+        try:
+            for mode in ['auto', 'load', 'memmap']:
+                mb2 = MannBoxFile(filename, mode=mode)
+                np.testing.assert_array_equal(mb2['field'], field)
+            mb2 = MannBoxFile(filename, mode='memmap')
+            np.testing.assert_array_equal(mb2.valuesAt(y=mb2.y[0], z=mb2.z[-1]), field[:,0,-1])
+            # Streaming by x-slices
+            slices = [(ix, f.copy()) for ix, f in mb2.iterSlices(chunk_nx=3)]
+            self.assertEqual([ix for ix,_ in slices], [0, 3, 6, 9])
+            np.testing.assert_array_equal(np.concatenate([f for _,f in slices]), field)
+            ts = TurbSimFile()
+            ts.fromMannBox(mb2, mb2, mb2, dx=1, U=10, y=mb2.y, z=mb2.z+100)
+            np.testing.assert_array_equal(ts['u'][1], field)
+            # Box built in memory, not streamed
+            ts.fromMannBox(mb, mb, mb, dx=1, U=10, y=mb2.y, z=mb2.z+100)
+            np.testing.assert_array_equal(ts['u'][2], field)
+            del mb2, slices
+            with self.assertRaises(ValueError):
+                MannBoxFile(filename, mode='stream')
+        finally:
+            os.remove(filename)
+
+if __name__ == '__main__':
+    unittest.main()
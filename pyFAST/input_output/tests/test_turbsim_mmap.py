@@ -0,0 +1,48 @@
+import unittest
+import os
+import numpy as np
+from pyFAST.input_output.tests.helpers_for_test import MyDir
+from pyFAST.input_output.turbsim_file import TurbSimFile, TurbSimField
+
+class Test(unittest.TestCase):
+
+    def test_mmap(self):
+        # --- Memory-mapped field, same values as the full read
+        for FN in ['TurbSim_NoTwr.bts', 'TurbSim_WithTwr.bts']:
+            F = TurbSimFile(os.path.join(MyDir,FN))
+            M = TurbSimFile(os.path.join(MyDir,FN), mmap=True)
+            self.assertIsInstance(M['u'], TurbSimField)
+            self.assertEqual(M['u'].shape, F['u'].shape)
+            np.testing.assert_array_equal(M['u'][1,:,2,1], F['u'][1,:,2,1])
+            np.testing.assert_array_equal(M['u'][:,-3:], F['u'][:,-3:])
+            np.testing.assert_array_equal(M['uTwr'][0,4,:], F['uTwr'][0,4,:])
+            np.testing.assert_array_equal(np.asarray(M['u']), F['u'])
+            np.testing.assert_array_equal(M.valuesAt(y=0, z=90), F.valuesAt(y=0, z=90))
+            self.assertEqual(M.hubValues(), F.hubValues())
+        np.testing.assert_almost_equal(M['u'][2,-1,1,3], 0.508036, 5)
+        np.testing.assert_almost_equal(M['uTwr'][0, 4, :], [6.1509, 6.4063, 8.9555, 7.6943], 4)
+
+    def test_modifiers(self):
+        # --- Modifiers on a memory-mapped field: the field is loaded first
+        F = TurbSimFile(os.path.join(MyDir,'TurbSim_WithTwr.bts'))
+        M = TurbSimFile(os.path.join(MyDir,'TurbSim_WithTwr.bts'), mmap=True)
+        F.scale(new_mean=10, new_std=1)
+        M.scale(new_mean=10, new_std=1)
+        self.assertIsInstance(M['u'], np.ndarray)
+        np.testing.assert_array_equal(M['u'], F['u'])
+        F = TurbSimFile(os.path.join(MyDir,'TurbSim_WithTwr.bts'))
+        M = TurbSimFile(os.path.join(MyDir,'TurbSim_WithTwr.bts'), mmap=True)
+        F.makePeriodic()
+        M.makePeriodic()
+        np.testing.assert_array_equal(M['u'], F['u'])
+        np.testing.assert_array_equal(M['uTwr'], F['uTwr'])
+
+    def test_chunks(self):
+        # --- Field decoded by chunks of time steps
+        F = TurbSimFile(os.path.join(MyDir,'TurbSim_WithTwr.bts'))
+        F2= TurbSimFile(os.path.join(MyDir,'TurbSim_WithTwr.bts'), chunk_nt=7)
+        np.testing.assert_array_equal(F['u'], F2['u'])
+        np.testing.assert_array_equal(F['uTwr'], F2['uTwr'])
+
+if __name__ == '__main__':
+    unittest.main()
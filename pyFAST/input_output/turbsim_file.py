@@ -42,6 +42,10 @@ class TurbSimFile(File):
         print(ts['u'].shape)  
         u,v,w = ts.valuesAt(y=10.5, z=90)
 
+        # memory-mapped field, only the values at the point are read from the file
+        ts = TurbSimFile('Turb.bts', mmap=True)
+        u,v,w = ts.valuesAt(y=10.5, z=90)
+
 
     """
 
@@ -58,10 +62,16 @@ class TurbSimFile(File):
         if filename:
             self.read(filename, **kwargs)
 
-    def read(self, filename=None, header_only=False):
+    def read(self, filename=None, header_only=False, mmap=False, chunk_nt=None):
         """ read BTS file, with field: 
                      u    (3 x nt x ny x nz)
                      uTwr (3 x nt x nTwr)
+        INPUTS:
+          - header_only: only read the header, no field
+          - mmap: if True, 'u' and 'uTwr' are read-only TurbSimField objects, lazily scaled views
+                  over the int16 data of the memory-mapped file: indexing them (e.g. u[0,:,iy,iz])
+                  only reads and scales the selected grid points. Use np.asarray to get the full field.
+          - chunk_nt: number of time steps decoded at once when the field is loaded (default: ~64MB chunks)
         """
         if filename:
             self.filename = filename
@@ -80,22 +90,20 @@ class TurbSimFile(File):
             scl[0],off[0],scl[1],off[1],scl[2],off[2] = struct.unpack('<6f' , f.read(6*4))
             nChar, = struct.unpack('<l',  f.read(4))
             info = (f.read(nChar)).decode()
-            # Reading turbulence field
-            if not header_only: 
-                u    = np.zeros((3,nt,ny,nz))
-                uTwr = np.zeros((3,nt,nTwr))
-                # For loop on time (acts as buffer reading, and only possible way when nTwr>0)
-                for it in range(nt):
-                    Buffer = np.frombuffer(f.read(2*3*ny*nz), dtype=np.int16).astype(np.float32).reshape([3, ny, nz], order='F')
-                    u[:,it,:,:]=Buffer
-                    Buffer = np.frombuffer(f.read(2*3*nTwr), dtype=np.int16).astype(np.float32).reshape([3, nTwr], order='F')
-                    uTwr[:,it,:]=Buffer
-                u -= off[:, None, None, None]
-                u /= scl[:, None, None, None]
-                self['u']    = u
-                uTwr -= off[:, None, None]
-                uTwr /= scl[:, None, None]
-                self['uTwr'] = uTwr
+            offset = f.tell()
+        # Reading turbulence field
+        if not header_only: 
+            # One memory map over all time steps: grid (3 x ny x nz, Fortran order) then tower (3 x nTwr)
+            raw = np.memmap(self.filename, dtype='<i2', mode='r', offset=offset, shape=(nt, 3*(ny*nz+nTwr)))
+            u    = TurbSimField(raw[:, :3*ny*nz].reshape(nt, nz, ny, 3).transpose(3, 0, 2, 1), scl, off)
+            uTwr = TurbSimField(raw[:, 3*ny*nz:].reshape(nt, nTwr, 3).transpose(2, 0, 1), scl, off)
+            if not mmap:
+                # Decoding by chunks of time steps
+                u    = u.load(chunk_nt)
+                uTwr = uTwr.load(chunk_nt)
+                del raw
+            self['u']    = u
+            self['uTwr'] = uTwr
         self['info'] = info
         self['ID']   = ID
         self['dt']   = dt
@@ -489,10 +497,17 @@ class TurbSimFile(File):
     # --------------------------------------------------------------------------------}
     # --- Modifierss
     # --------------------------------------------------------------------------------{
+    def _loadFields(self):
+        """ Replace the read-only memory-mapped fields (read with mmap=True) by float64 arrays, before modifying them """
+        for key in ['u', 'uTwr']:
+            if isinstance(self.get(key, None), TurbSimField):
+                self[key] = self[key].load()
+
     def scale(self, new_mean=None, new_std=None, component=0, reference='mid', y_ref=0, z_ref=None):
         """ 
         TODO needs more thinking
         """
+        self._loadFields()
         # mean/std values for each points in the plane (averaged with time)
         old_plane_mean = np.mean(self['u'][component,:,:,:],axis=0)
         old_plane_std  = np.std( self['u'][component,:,:,:],axis=0)
@@ -526,6 +541,7 @@ class TurbSimFile(File):
 
     def makePeriodic(self):
         """ Make the box periodic in the streamwise direction by mirroring it """
+        self._loadFields()
         nDim, nt0, ny, nz = self['u'].shape
         u = self['u'].copy()
         del self['u']
@@ -737,23 +753,31 @@ class TurbSimFile(File):
                 but when exported to binary files, the y axis is flipped again)
         
         INPUTS:
-          - u, v, w : mann box fields
+          - u, v, w : mann box fields, arrays or MannBoxFile objects (if read from file, the box is then 
+                      streamed from the file by chunks of x-slices, see MannBoxFile.iterSlices)
           - dx: axial spacing of mann box (to compute time)
           - U: reference speed of mann box (to compute time)
           - y: y coords of mann box
           - z: z coords of mann box
         """
-        nt,ny,nz = u.shape
+        nt,ny,nz = u['field'].shape if hasattr(u, 'iterSlices') else u.shape
         dt       = dx/U
         t        = np.arange(0, dt*(nt-0.5), dt)
         nt       = len(t)
         if y[0]>y[-1]:
             raise Exception('y is assumed to go from - to +')
 
-        self['u']=np.zeros((3, nt, ny, nz))
-        self['u'][0,:,:,:] = u 
-        self['u'][1,:,:,:] = v
-        self['u'][2,:,:,:] = w
+        self['u']=np.empty((3, nt, ny, nz))
+        for ic, field in enumerate([u, v, w]):
+            if hasattr(field, 'iterSlices') and getattr(field, 'N', None) is not None and getattr(field, 'filename', None):
+                # box read from a file: streamed from the file
+                for ix, slices in field.iterSlices():
+                    self['u'][ic,ix:ix+len(slices),:,:] = slices
+            elif hasattr(field, 'iterSlices'):
+                # box built in memory
+                self['u'][ic,:,:,:] = field['field']
+            else:
+                self['u'][ic,:,:,:] = field
         if addU is not None:
             self['u'][0,:,:,:] += addU
         self['t']  = t
@@ -932,6 +956,55 @@ class TurbSimFile(File):
 
 
 
+class TurbSimField(object):
+    """ 
+    Read-only velocity field of a TurbSim file, scaled lazily from the int16 data of the file.
+    Behaves as the float64 array (3 x nt x ...) for indexing (only the selected values are decoded),
+    `shape`, `ndim`, `dtype`, and numpy functions (through np.asarray, which decodes the full field).
+    """
+    def __init__(self, raw, scl, off):
+        self.raw = raw  # int16 view (3 x nt x ...), usually over a np.memmap
+        # Scaling of each component, broadcasted to the shape of the field (no copy)
+        self._scl = np.broadcast_to(scl.reshape((3,)+(1,)*(raw.ndim-1)), raw.shape)
+        self._off = np.broadcast_to(off.reshape((3,)+(1,)*(raw.ndim-1)), raw.shape)
+
+    @property
+    def shape(self): return self.raw.shape
+
+    @property
+    def ndim(self): return self.raw.ndim
+
+    @property
+    def dtype(self): return np.dtype(np.float64)
+
+    def __len__(self): return self.raw.shape[0]
+
+    def __getitem__(self, key):
+        u  = np.asarray(self.raw[key], dtype=np.float64)
+        u -= self._off[key]
+        u /= self._scl[key]
+        return u if u.ndim>0 else u[()]
+
+    def __array__(self, dtype=None, copy=None):
+        u = self.load()
+        return u if dtype is None else u.astype(dtype, copy=False)
+
+    def load(self, chunk_nt=None):
+        """ Return the field as a float64 array, decoded by chunks of `chunk_nt` time steps """
+        u = np.empty(self.shape)
+        nt = self.shape[1]
+        if chunk_nt is None:
+            chunk_nt = max(1, int(64*1024**2/max(1, 8*u.size/max(nt,1))))
+        for it in range(0, nt, chunk_nt):
+            u[:,it:it+chunk_nt] = self.raw[:,it:it+chunk_nt]
+        u -= self._off[(slice(None),)+(slice(0,1),)*(u.ndim-1)]
+        u /= self._scl[(slice(None),)+(slice(0,1),)*(u.ndim-1)]
+        return u
+
+    def __repr__(self):
+        return '<TurbSimField> ({})'.format(' x '.join([str(n) for n in self.shape]))
+
+
 def fit_powerlaw_u_alpha(x, y, z_ref=100, p0=(10,0.1)):
     """ 
     p[0] : u_ref
@@ -24,14 +24,17 @@ or
 - 'rainflow_astm' (based on the c-implementation by Adam Nieslony found at the MATLAB Central File Exchange
                    http://www.mathworks.com/matlabcentral/fileexchange/3026)
 '''
+import os
 import warnings
 import numpy as np
 
 
-__all__  = ['rainflow_astm', 'rainflow_windap','eq_load','eq_load_and_cycles','cycle_matrix','cycle_matrix2']
+__all__  = ['rainflow_astm', 'rainflow_windap','eq_load','eq_load_and_cycles','cycle_matrix','cycle_matrix2',
+            'rainflow_astm_fast', 'rainflow_windap_fast', 'rainflow_astm_channels', 'rainflow_windap_channels',
+            'eq_load_channels', 'RainflowAccumulator', 'rainflow_files']
 
 
-def equivalent_load(signal, m=3, Teq=1, nBins=46, method='rainflow_windap'):
+def equivalent_load(signal, m=3, Teq=1, nBins=46, method='rainflow_windap_fast'):
     """Equivalent load calculation
 
     Calculate the equivalent loads for a list of Wohler exponent
@@ -42,7 +45,8 @@ def equivalent_load(signal, m=3, Teq=1, nBins=46, method='rainflow_windap'):
     m :    Wohler exponent (default is 3)
     Teq : The equivalent number of load cycles (default is 1, but normally the time duration in seconds is used)
     nBins : Number of bins in rainflow count histogram
-    method: 'rainflow_windap, rainflow_astm, fatpack
+    method: 'rainflow_windap_fast', 'rainflow_astm_fast', 'rainflow_windap', 'rainflow_astm', 'fatpack'
+        the fast methods give the same equivalent loads as 'rainflow_windap' and 'rainflow_astm'
 
     Returns
     -------
@@ -50,7 +54,8 @@ def equivalent_load(signal, m=3, Teq=1, nBins=46, method='rainflow_windap'):
     """
     signal = np.asarray(signal)
 
-    rainflow_func_dict = {'rainflow_windap':rainflow_windap, 'rainflow_astm':rainflow_astm}
+    rainflow_func_dict = {'rainflow_windap':rainflow_windap, 'rainflow_astm':rainflow_astm,
+                          'rainflow_windap_fast':rainflow_windap_fast, 'rainflow_astm_fast':rainflow_astm_fast}
     if method in rainflow_func_dict.keys():
         # Call wetb function for one m
         Leq = eq_load(signal, m=[m], neq=Teq, no_bins=nBins, rainflow_func=rainflow_func_dict[method])[0][0]
@@ -199,7 +204,387 @@ def rainflow_astm(signal):
     return np.array(ampl_mean).T
 
 
-def eq_load(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=1, rainflow_func=rainflow_windap):
+# --------------------------------------------------------------------------------}
+# --- Fast rainflow counting
+# --------------------------------------------------------------------------------{
+# Same results as the reference routines (same half cycles, in the same order), with:
+#  - turning points (local minima/maxima) extracted with numpy, without loops over the samples, for all the channels at once
+#  - peak-trough filter and pair-range/ASTM counting run on the turning points only, on preallocated stacks and output
+#    buffers with index pointers (no list append/delete)
+#  - the counting kernels compiled with numba if it is installed. Without numba the same kernels run in python on lists
+#    of python scalars (indexing numpy arrays element by element from python is slower than indexing lists)
+try:
+    from numba import njit as _njit
+except ImportError:
+    _njit = None
+
+
+def _rainflowcount_kernel(sig, lo, hi, stack, ampls, means, k):
+    # ASTM counting of sig[lo:hi] (as `rainflowcount`): stack top pointer n, bottom pointer start
+    # the half cycles are written in ampls[k:], means[k:], returns the new k
+    n = 0
+    start = 0
+    for i in range(lo, hi):
+        stack[n] = sig[i]
+        n += 1
+        while n - start > 2:
+            ampl = abs(stack[n - 3] - stack[n - 2])
+            if ampl > abs(stack[n - 2] - stack[n - 1]):
+                break
+            mean = (stack[n - 3] + stack[n - 2]) / 2
+            if n - start == 3:
+                start += 1
+                if ampl > 0:
+                    ampls[k] = ampl
+                    means[k] = mean
+                    k += 1
+            else:
+                stack[n - 3] = stack[n - 1]
+                n -= 2
+                if ampl > 0:
+                    ampls[k] = ampl
+                    means[k] = mean
+                    ampls[k + 1] = ampl
+                    means[k + 1] = mean
+                    k += 2
+    for index in range(start, n - 1):
+        ampl = abs(stack[index] - stack[index + 1])
+        if ampl > 0:
+            ampls[k] = ampl
+            means[k] = (stack[index] + stack[index + 1]) / 2
+            k += 1
+    return k
+
+
+def _peak_trough_kernel(x, lo, hi, R, S, k):
+    # Peak-trough filter of x[lo:hi] (as `peak_trough`), the values are written in S[k:], returns the new k
+    trough = peak = x[lo]
+    f = 0
+    i = lo + 1
+    # begin: until the first difference larger than R
+    while i < hi:
+        if x[i] > peak:
+            peak = x[i]
+            if peak - trough >= R:
+                S[k] = trough
+                k += 1
+                f = 1
+                break
+        elif x[i] < trough:
+            trough = x[i]
+            if peak - trough >= R:
+                S[k] = peak
+                k += 1
+                f = -1
+                break
+        i += 1
+    i += 1
+    while i < hi:
+        if f == -1:
+            if x[i] < trough:
+                trough = x[i]
+            elif x[i] - trough >= R:
+                S[k] = trough
+                k += 1
+                peak = x[i]
+                f = 1
+        else:
+            if x[i] > peak:
+                peak = x[i]
+            elif peak - x[i] >= R:
+                S[k] = peak
+                k += 1
+                trough = x[i]
+                f = -1
+        i += 1
+
+    if f == 1:
+        S[k] = peak
+    elif f == -1:
+        S[k] = trough
+    else:
+        # no difference larger than R: first element not set (0) and mean value, as `peak_trough`
+        S[k] = 0
+        k += 1
+        S[k] = int((trough + peak) / 2)
+    return k + 1
+
+
+def _pair_range_kernel(x, lo, hi, S, ampls, means, k):
+    # Pair-range counting of x[lo:hi] (as `pair_range_amplitude_mean`): stack S with top pointer n
+    # the half cycles are written in ampls[k:], means[k:], returns the new k
+    n = 0
+    for i in range(lo, hi):
+        S[n] = x[i]
+        n += 1
+        while n >= 4:
+            S3, S2, S1, S0 = S[n - 4], S[n - 3], S[n - 2], S[n - 1]
+            if (S2 > S3 and S1 >= S3 and S0 >= S2) or (S2 < S3 and S1 <= S3 and S0 <= S2):
+                # Extract two intermediate half cycles
+                ampl = abs(S2 - S1)
+                mean = (S2 + S1) / 2
+                ampls[k] = ampl
+                means[k] = mean
+                ampls[k + 1] = ampl
+                means[k + 1] = mean
+                k += 2
+                S[n - 3] = S0
+                n -= 2
+            else:
+                break
+    for q in range(n - 1):
+        ampls[k] = abs(S[q + 1] - S[q])
+        means[k] = (S[q + 1] + S[q]) / 2
+        k += 1
+    return k
+
+
+if _njit is not None:
+    _rainflowcount_kernel = _njit(cache=True, nogil=True)(_rainflowcount_kernel)
+    _peak_trough_kernel = _njit(cache=True, nogil=True)(_peak_trough_kernel)
+    _pair_range_kernel = _njit(cache=True, nogil=True)(_pair_range_kernel)
+
+
+def _kernel_input(x):
+    # input of the counting kernels: numpy array for numba, list of python scalars otherwise
+    return x if _njit is not None else x.tolist()
+
+
+def _kernel_buffer(n, dtype=np.float64):
+    # preallocated stack/output of the counting kernels
+    return np.zeros(n, dtype=dtype) if _njit is not None else [0] * n
+
+
+def turning_point_mask(signals):
+    """Mask (n_time x n_channels) of the local minima and maxima plus first and last element of each column of signals
+
+    Plateaus are attributed to the preceding slope, as in `find_extremes`. Columns without variation are all False.
+    """
+    signals = np.asarray(signals)
+    mask = np.zeros(signals.shape, dtype=bool)
+    if len(signals) < 2:
+        return mask
+    sign_grad = np.sign(np.diff(signals, axis=0)).astype(np.int8)
+    nonzero = sign_grad != 0
+    varying = nonzero.any(axis=0)
+
+    # forward fill of the plateaus (sign_grad==0) with the last slope, leading plateau with the first slope
+    rows = np.arange(len(sign_grad))[:, None]
+    last = np.where(nonzero, rows, 0)
+    np.maximum.accumulate(last, axis=0, out=last)
+    sign_grad = np.take_along_axis(sign_grad, last, axis=0)
+    first = np.argmax(nonzero, axis=0)
+    sign_grad = np.where(rows < first, np.take_along_axis(sign_grad, first[None, :], axis=0), sign_grad)
+
+    mask[[0, -1]] = True
+    mask[1:-1] = sign_grad[1:] * sign_grad[:-1] < 0
+    mask[:, ~varying] = False
+    return mask
+
+
+def turning_point_indices(signal):
+    """Indexes of the local minima and maxima plus first and last element of signal (vectorized `find_extremes`)
+
+    Plateaus are attributed to the preceding slope, as in `find_extremes`. None if the signal has no variation.
+    """
+    mask = turning_point_mask(np.asarray(signal).reshape(-1, 1))[:, 0]
+    return np.flatnonzero(mask) if mask.any() else None
+
+
+def find_extremes_fast(signal):
+    """Same as `find_extremes`, vectorized"""
+    signal = np.asarray(signal)
+    extremes = turning_point_indices(signal)
+    if extremes is None:
+        # All values are equal to crossing level! (same output as find_extremes)
+        return np.array([0])
+    return signal[extremes]
+
+
+def rainflowcount_fast(sig):
+    """Same as `rainflowcount`, returns an array (n_half_cycles x 2) of amplitudes and means"""
+    sig = np.asarray(sig, dtype=np.float64).ravel()
+    # at most one half cycle per element
+    stack, ampls, means = _kernel_buffer(len(sig)), _kernel_buffer(len(sig)), _kernel_buffer(len(sig))
+    k = _rainflowcount_kernel(_kernel_input(sig), 0, len(sig), stack, ampls, means, 0)
+    return np.array([ampls[:k], means[:k]], dtype=np.float64).T.reshape(-1, 2)
+
+
+def peak_trough_fast(x, R):
+    """Same as `peak_trough`, the filter is run on the turning points of x only
+
+    Samples between turning points do not change the peaks and troughs found if R > 0
+    """
+    x = np.asarray(x).ravel()
+    if R > 0:
+        extremes = turning_point_indices(x)
+        if extremes is not None:
+            x = x[extremes]
+    S = _kernel_buffer(len(x) + 1, dtype=int)
+    k = _peak_trough_kernel(_kernel_input(x), 0, len(x), R, S, 0)
+    return np.array(S[:k], dtype=int)
+
+
+def pair_range_amplitude_mean_fast(x):
+    """Same as `pair_range_amplitude_mean`, returns an array (n_half_cycles x 2) of amplitudes and means"""
+    x = np.asarray(x)
+    x = x - np.min(x)
+    S, ampls, means = _kernel_buffer(len(x), dtype=x.dtype), _kernel_buffer(len(x)), _kernel_buffer(len(x))
+    k = _pair_range_kernel(_kernel_input(x), 0, len(x), S, ampls, means, 0)
+    return np.array([ampls[:k], means[:k]], dtype=np.float64).T.reshape(-1, 2)
+
+
+def rainflow_windap_fast(signal, levels=255., thresshold=(255 / 50)):
+    """Same as `rainflow_windap` (same half cycles), with the fast turning points and counting"""
+    check_signal(signal)
+    return rainflow_windap_channels(signal.reshape(-1, 1), levels, thresshold)[0]
+
+
+def rainflow_astm_fast(signal):
+    """Same as `rainflow_astm` (same half cycles), with the fast turning points and counting"""
+    check_signal(signal)
+    return rainflow_astm_channels(signal.reshape(-1, 1))[0]
+
+
+def rainflow_windap_channels(signals, levels=255., thresshold=(255 / 50)):
+    """Windap rainflow counting of each column of signals (n_time x n_channels), same half cycles as `rainflow_windap`
+
+    The quantization and the turning points of all the channels are computed at once, the counting kernels
+    of the channels share one preallocated buffer.
+
+    Returns
+    -------
+    ampl_mean : list
+        For each channel, array (2 x n_half_cycles) of amplitudes and means, None if the channel is all NaN
+        or has no variation
+    """
+    signals = np.array(signals, dtype=np.double)
+    if signals.ndim == 1:
+        signals = signals[:, None]
+    n_channels = signals.shape[1]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        offset = np.nanmin(signals, axis=0)
+        signals -= offset
+        top = np.nanmax(signals, axis=0)
+    valid, = np.nonzero(top > 0)
+    gain = top[valid] / levels
+    quantized = np.round(signals[:, valid] / gain).astype(int)
+
+    # turning points of each channel, concatenated channel after channel (the whole channel if R <= 0)
+    if thresshold > 0:
+        mask = turning_point_mask(quantized)
+    else:
+        mask = np.ones(quantized.shape, dtype=bool)
+    x = quantized.T[mask.T]
+    x_bounds = np.r_[0, np.cumsum(mask.sum(axis=0))].tolist()
+
+    # peak-trough filter, then pair-range counting (at most one half cycle per element) of each channel
+    S = _kernel_buffer(len(x) + len(valid), dtype=int)
+    S_bounds = [0]
+    x_in = _kernel_input(x)
+    for i in range(len(valid)):
+        S_bounds.append(_peak_trough_kernel(x_in, x_bounds[i], x_bounds[i + 1], thresshold, S, S_bounds[-1]))
+    S = np.array(S[:S_bounds[-1]], dtype=int)
+    for i in range(len(valid)):
+        S[S_bounds[i]:S_bounds[i + 1]] -= np.min(S[S_bounds[i]:S_bounds[i + 1]])
+    stack, ampls, means = _kernel_buffer(len(S), dtype=int), _kernel_buffer(len(S)), _kernel_buffer(len(S))
+    bounds = [0]
+    S_in = _kernel_input(S)
+    for i in range(len(valid)):
+        # the stack is reused by each channel
+        bounds.append(_pair_range_kernel(S_in, S_bounds[i], S_bounds[i + 1], stack, ampls, means, bounds[-1]))
+
+    ampl_mean = np.array([ampls[:bounds[-1]], means[:bounds[-1]]], dtype=np.float64)
+    channel_gain = np.repeat(gain, np.diff(bounds))
+    ampl_mean = np.round(ampl_mean / thresshold) * channel_gain * thresshold
+    ampl_mean[1] += np.repeat(offset[valid], np.diff(bounds))
+
+    out = [None] * n_channels
+    for i, channel in enumerate(valid):
+        out[channel] = ampl_mean[:, bounds[i]:bounds[i + 1]]
+    return out
+
+
+def rainflow_astm_channels(signals):
+    """ASTM rainflow counting of each column of signals (n_time x n_channels), same half cycles as `rainflow_astm`
+
+    The turning points of all the channels are computed at once, the counting kernels of the channels share
+    one preallocated buffer.
+
+    Returns
+    -------
+    ampl_mean : list
+        For each channel, array (2 x n_half_cycles) of amplitudes and means, None if the channel has no variation
+    """
+    signals = np.asarray(signals, dtype=np.double)
+    if signals.ndim == 1:
+        signals = signals[:, None]
+    mask = turning_point_mask(signals)
+    valid, = np.nonzero(mask.any(axis=0))
+    mask = mask[:, valid]
+    x = signals[:, valid].T[mask.T]
+    x_bounds = np.r_[0, np.cumsum(mask.sum(axis=0))].tolist()
+
+    # at most one half cycle per element
+    stack, ampls, means = _kernel_buffer(len(x)), _kernel_buffer(len(x)), _kernel_buffer(len(x))
+    bounds = [0]
+    x_in = _kernel_input(x)
+    for i in range(len(valid)):
+        bounds.append(_rainflowcount_kernel(x_in, x_bounds[i], x_bounds[i + 1], stack, ampls, means, bounds[-1]))
+    ampl_mean = np.array([ampls[:bounds[-1]], means[:bounds[-1]]], dtype=np.float64)
+
+    out = [None] * signals.shape[1]
+    for i, channel in enumerate(valid):
+        out[channel] = ampl_mean[:, bounds[i]:bounds[i + 1]]
+    return out
+
+
+def eq_load_channels(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=1, rainflow_func=rainflow_windap_fast):
+    """Equivalent loads of several channels
+
+    The WINDAP and ASTM countings are batched over the channels (`rainflow_windap_channels`, `rainflow_astm_channels`),
+    any other `rainflow_func` is called on each column.
+
+    Parameters
+    ----------
+    signals : array-like, shape (n_time, n_channels)
+        The signals, one channel per column (e.g. mooring tensions, tower base moments)
+    no_bins, m, neq, rainflow_func :
+        see `eq_load`, the fast rainflow counting is used by default
+
+    Returns
+    -------
+    eq_loads : ndarray, shape (n_channels, n_neq, n_m)
+        Equivalent loads of each channel, same values as `eq_load` for each column (NaN for the channels without variation)
+    """
+    signals = np.asarray(signals, dtype=np.float64)
+    if signals.ndim == 1:
+        signals = signals[:, None]
+    if rainflow_func in (rainflow_windap_fast, rainflow_windap):
+        half_cycles = rainflow_windap_channels(signals)
+    elif rainflow_func in (rainflow_astm_fast, rainflow_astm):
+        half_cycles = rainflow_astm_channels(signals)
+    else:
+        half_cycles = []
+        for i in range(signals.shape[1]):
+            try:
+                half_cycles.append(rainflow_func(np.ascontiguousarray(signals[:, i])))
+            except TypeError:
+                half_cycles.append(None)
+
+    eq_loads = []
+    for ampl_mean in half_cycles:
+        if ampl_mean is None:
+            eq_loads.append([[np.nan] * len(np.atleast_1d(m))] * len(np.atleast_1d(neq)))
+            continue
+        ampls, means = ampl_mean
+        cycles, ampl_bin_mean, ampl_edges, _, _ = _cycle_matrix(ampls, means, np.ones_like(ampls), no_bins, 1)
+        eq_loads.append(_eq_load_and_cycles(cycles, ampl_bin_mean, ampl_edges, m, neq)[0])
+    return np.array(eq_loads, dtype=np.float64)
+
+
+def eq_load(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=1, rainflow_func=rainflow_windap_fast):
     """Equivalent load calculation
 
     Calculate the equivalent loads for a list of Wohler exponent and number of equivalent loads
@@ -217,8 +602,8 @@ def eq_load(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=1, rainflow_func=ra
         Wohler exponent (default is [3, 4, 6, 8, 10, 12])
     neq : int, float or array-like, optional
         The equivalent number of load cycles (default is 1, but normally the time duration in seconds is used)
-    rainflow_func : {rainflow_windap, rainflow_astm}, optional
-        The rainflow counting function to use (default is rainflow_windap)
+    rainflow_func : {rainflow_windap_fast, rainflow_astm_fast, rainflow_windap, rainflow_astm}, optional
+        The rainflow counting function to use (default is rainflow_windap_fast, same half cycles as rainflow_windap)
 
     Returns
     -------
@@ -242,7 +627,7 @@ def eq_load(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=1, rainflow_func=ra
         return [[np.nan] * len(np.atleast_1d(m))] * len(np.atleast_1d(neq))
 
 
-def eq_load_and_cycles(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=[10 ** 6, 10 ** 7, 10 ** 8], rainflow_func=rainflow_windap):
+def eq_load_and_cycles(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=[10 ** 6, 10 ** 7, 10 ** 8], rainflow_func=rainflow_windap_fast):
     """Calculate combined fatigue equivalent load
 
     Parameters
@@ -258,8 +643,8 @@ def eq_load_and_cycles(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=[10 ** 6
         Wohler exponent (default is [3, 4, 6, 8, 10, 12])
     neq : int or array-like, optional
         Equivalent number, default is [10^6, 10^7, 10^8]
-    rainflow_func : {rainflow_windap, rainflow_astm}, optional
-        The rainflow counting function to use (default is rainflow_windap)
+    rainflow_func : {rainflow_windap_fast, rainflow_astm_fast, rainflow_windap, rainflow_astm}, optional
+        The rainflow counting function to use (default is rainflow_windap_fast, same half cycles as rainflow_windap)
 
     Returns
     -------
@@ -273,6 +658,11 @@ def eq_load_and_cycles(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=[10 ** 6
         Edges of the amplitude bins
     """
     cycles, ampl_bin_mean, ampl_bin_edges, _, _ = cycle_matrix(signals, no_bins, 1, rainflow_func)
+    return _eq_load_and_cycles(cycles, ampl_bin_mean, ampl_bin_edges, m, neq)
+
+
+def _eq_load_and_cycles(cycles, ampl_bin_mean, ampl_bin_edges, m, neq):
+    # equivalent loads of the cycle matrix (no_bins x 1) of `cycle_matrix`
     if 0:  #to be similar to windap
         ampl_bin_mean = (ampl_bin_edges[:-1] + ampl_bin_edges[1:]) / 2
     cycles, ampl_bin_mean = cycles.flatten(), ampl_bin_mean.flatten()
@@ -282,7 +672,7 @@ def eq_load_and_cycles(signals, no_bins=46, m=[3, 4, 6, 8, 10, 12], neq=[10 ** 6
     return eq_loads, cycles, ampl_bin_mean, ampl_bin_edges
 
 
-def cycle_matrix(signals, ampl_bins=10, mean_bins=10, rainflow_func=rainflow_windap):
+def cycle_matrix(signals, ampl_bins=10, mean_bins=10, rainflow_func=rainflow_windap_fast):
     """Markow load cycle matrix
 
     Calculate the Markow load cycle matrix
@@ -298,8 +688,8 @@ def cycle_matrix(signals, ampl_bins=10, mean_bins=10, rainflow_func=rainflow_win
     mean_bins : int or array-like, optional
         if int, Number of mean value bins (default is 10)
         if array-like, the bin edges for mea
-    rainflow_func : {rainflow_windap, rainflow_astm}, optional
-        The rainflow counting function to use (default is rainflow_windap)
+    rainflow_func : {rainflow_windap_fast, rainflow_astm_fast, rainflow_windap, rainflow_astm}, optional
+        The rainflow counting function to use (default is rainflow_windap_fast, same half cycles as rainflow_windap)
 
     Returns
     -------
@@ -327,6 +717,11 @@ def cycle_matrix(signals, ampl_bins=10, mean_bins=10, rainflow_func=rainflow_win
     else:
         ampls, means = rainflow_func(signals[:])
         weights = np.ones_like(ampls)
+    return _cycle_matrix(ampls, means, weights, ampl_bins, mean_bins)
+
+
+def _cycle_matrix(ampls, means, weights, ampl_bins, mean_bins):
+    # cycle matrix of the weighted half cycles, outputs of `cycle_matrix`
     if isinstance(ampl_bins, int):
         ampl_bins = np.linspace(0, 1, num=ampl_bins + 1) * ampls[weights>0].max()
     cycles, ampl_edges, mean_edges = np.histogram2d(ampls, means, [ampl_bins, mean_bins], weights=weights)
@@ -340,7 +735,7 @@ def cycle_matrix(signals, ampl_bins=10, mean_bins=10, rainflow_func=rainflow_win
     return cycles, ampl_bin_mean, ampl_edges, mean_bin_mean, mean_edges
 
 
-def cycle_matrix2(signal, nrb_amp, nrb_mean, rainflow_func=rainflow_windap):
+def cycle_matrix2(signal, nrb_amp, nrb_mean, rainflow_func=rainflow_windap_fast):
     """
     Same as wetb.fatigue.cycle_matrix but bin from min_amp to
     max_amp instead of 0 to max_amp.
@@ -357,8 +752,8 @@ def cycle_matrix2(signal, nrb_amp, nrb_mean, rainflow_func=rainflow_windap):
     nrb_mean : int
         Number of bins for the means
 
-    rainflow_func : {rainflow_windap, rainflow_astm}, optional
-        The rainflow counting function to use (default is rainflow_windap)
+    rainflow_func : {rainflow_windap_fast, rainflow_astm_fast, rainflow_windap, rainflow_astm}, optional
+        The rainflow counting function to use (default is rainflow_windap_fast, same half cycles as rainflow_windap)
 
     Returns
     -------
@@ -784,6 +1179,243 @@ def pair_range_amplitude_mean(x):  # cpdef pair_range(np.ndarray[long,ndim=1]  x
 
 
 
+# --------------------------------------------------------------------------------}
+# --- Streaming rainflow counting 
+# --------------------------------------------------------------------------------{
+class RainflowAccumulator(object):
+    """Streaming ASTM rainflow counting of one or more channels, in chunks, into fixed-bin cycle matrices
+
+    The turning points and the residual ASTM stack of each channel are carried from one chunk to the next, so
+    that the half cycles of a series counted chunk by chunk are the same as `rainflow_astm` on the whole series.
+    Several series (seeds, DLCs, files) are accumulated in the same matrices, with a weight each (e.g. the
+    lifetime hours represented by the series over its duration), and accumulators with the same bins can be merged.
+    Memory depends on the bins and on the residual stacks, not on the length of the series.
+
+    Besides the matrices, the exact sums of the weighted amplitudes**m are accumulated for the Wohler exponents `m`,
+    so that the equivalent loads can be computed without the binning error.
+    The WINDAP counting is not available: its quantization needs the range of the whole signal.
+
+    Parameters
+    ----------
+    ampl_edges : array-like
+        Edges of the amplitude bins (range of the cycles, as in `cycle_matrix`)
+    mean_edges : array-like, optional
+        Edges of the mean value bins, one bin for all the means if None
+    m : int, float or array-like, optional
+        Wohler exponents of the exact sums (default is [3, 4, 6, 8, 10, 12])
+    n_channels : int, optional
+        Number of channels (columns of the chunks)
+
+    Examples
+    --------
+    >>> acc = RainflowAccumulator(np.linspace(0, 2e4, 51), n_channels=2)
+    >>> for chunk in chunks:      # arrays nt x 2
+    ...     acc.add(chunk)
+    >>> acc.end_series()
+    >>> eq_loads = acc.eq_loads(neq=3600)
+    """
+    def __init__(self, ampl_edges, mean_edges=None, m=[3, 4, 6, 8, 10, 12], n_channels=1):
+        self.ampl_edges = np.asarray(ampl_edges, dtype=np.float64)
+        self.mean_edges = np.array([-np.inf, np.inf]) if mean_edges is None else np.asarray(mean_edges, dtype=np.float64)
+        self.m = np.atleast_1d(np.asarray(m, dtype=np.float64))
+        self.n_channels = n_channels
+
+        shape = (n_channels, len(self.ampl_edges) - 1, len(self.mean_edges) - 1)
+        self.half_cycles = np.zeros(shape)  # weighted number of half cycles
+        self.ampl_sum = np.zeros(shape)     # weighted sum of the amplitudes, for the bin averages
+        self.mean_sum = np.zeros(shape)     # weighted sum of the means, for the bin averages
+        self.damage_sum = np.zeros((n_channels, len(self.m)))  # weighted sum of the amplitudes**m of the half cycles (all)
+        self.n_series = 0
+        self._reset()
+
+    def _reset(self):
+        # turning point state of each channel: last sample, last non-zero slope, number of samples, ASTM stack
+        self._last = [None] * self.n_channels
+        self._slope = [0] * self.n_channels
+        self._n_samples = [0] * self.n_channels
+        self._stack = [[] for _ in range(self.n_channels)]
+
+    def _chunk(self, chunk):
+        chunk = np.asarray(chunk, dtype=np.float64)
+        if chunk.ndim == 1:
+            chunk = chunk[:, None]
+        if chunk.shape[1] != self.n_channels:
+            raise Exception('Chunk with {} channels, the accumulator has {} channels'.format(chunk.shape[1], self.n_channels))
+        return chunk
+
+    def add(self, chunk, weight=1.):
+        """Count the half cycles closed by the samples of `chunk` (array nt, or nt x n_channels), continuing the current series
+
+        The weight should be the same for all the chunks of a series (and for `end_series`).
+        """
+        chunk = self._chunk(chunk)
+        for i in range(self.n_channels):
+            x = chunk[:, i]
+            if len(x) == 0:
+                continue
+            turning_points = []
+            if self._last[i] is None:
+                # first sample of the series, always a turning point
+                turning_points.append(float(x[0]))
+                self._last[i] = float(x[0])
+                self._n_samples[i] = 1
+                x = x[1:]
+            if len(x) == 0:
+                self._count(i, turning_points, weight)
+                continue
+            # slopes into each sample (plateaus attributed to the preceding slope)
+            sign_grad = np.sign(np.diff(np.r_[self._last[i], x])).astype(np.int8)
+            sign_grad = np.r_[self._slope[i], sign_grad]
+            last = np.where(sign_grad != 0, np.arange(len(sign_grad)), 0)
+            np.maximum.accumulate(last, out=last)
+            sign_grad = sign_grad[last]
+            # samples where the slope changes sign: the previous last sample and the samples of the chunk but the last
+            seq = np.r_[self._last[i], x[:-1]]
+            turning_points.extend(seq[sign_grad[:-1] * sign_grad[1:] < 0].tolist())
+
+            self._slope[i] = int(sign_grad[-1])
+            self._last[i] = float(x[-1])
+            self._n_samples[i] += len(x)
+            self._count(i, turning_points, weight)
+
+    def end_series(self, weight=1.):
+        """End the current series: the last sample and the residual half cycles are counted, the next chunk starts a new series"""
+        for i in range(self.n_channels):
+            if self._last[i] is None:
+                continue
+            self._count(i, [self._last[i]] if self._n_samples[i] > 1 else [], weight, residue=True)
+        self._reset()
+        self.n_series += 1
+
+    def _count(self, i, turning_points, weight, residue=False):
+        # ASTM counting (same as rainflowcount_fast) of the turning points pushed on the stack of channel i
+        a = self._stack[i]
+        start = 0
+        ampl_mean = []
+        for x in turning_points:
+            a.append(x)
+            while len(a) - start > 2:
+                ampl = abs(a[-3] - a[-2])
+                if ampl > abs(a[-2] - a[-1]):
+                    break
+                mean = (a[-3] + a[-2]) / 2
+                if len(a) - start == 3:
+                    start += 1
+                    if ampl > 0:
+                        ampl_mean.append((ampl, mean))
+                else:
+                    del a[-3:-1]
+                    if ampl > 0:
+                        ampl_mean.append((ampl, mean))
+                        ampl_mean.append((ampl, mean))
+        del a[:start]
+        if residue:
+            for index in range(len(a) - 1):
+                ampl = abs(a[index] - a[index + 1])
+                mean = (a[index] + a[index + 1]) / 2
+                if ampl > 0:
+                    ampl_mean.append((ampl, mean))
+        if len(ampl_mean) > 0:
+            ampls, means = np.array(ampl_mean, dtype=np.float64).T
+            self._histogram(i, ampls, means, weight)
+
+    def _histogram(self, i, ampls, means, weight):
+        self.damage_sum[i] += weight * np.sum(ampls[:, None] ** self.m, axis=0)
+        # bins as np.histogram2d (last bin closed), cycles outside the edges are only in the exact sums
+        i_ampl = _bin_index(ampls, self.ampl_edges)
+        i_mean = _bin_index(means, self.mean_edges)
+        inside = (i_ampl >= 0) & (i_mean >= 0)
+        index = (i_ampl[inside], i_mean[inside])
+        np.add.at(self.half_cycles[i], index, weight)
+        np.add.at(self.ampl_sum[i], index, weight * ampls[inside])
+        np.add.at(self.mean_sum[i], index, weight * means[inside])
+
+    def add_series(self, signals, weight=1.):
+        """Count a whole series (array nt, or nt x n_channels)"""
+        self.add(signals, weight)
+        self.end_series(weight)
+
+    def merge(self, other):
+        """Add the counts of the accumulator `other` (same bins, exponents and channels, e.g. counted by another process)"""
+        if not (np.array_equal(self.ampl_edges, other.ampl_edges) and np.array_equal(self.mean_edges, other.mean_edges)
+                and np.array_equal(self.m, other.m) and self.n_channels == other.n_channels):
+            raise Exception('Accumulators with different bins, Wohler exponents or channels cannot be merged')
+        self.half_cycles += other.half_cycles
+        self.ampl_sum += other.ampl_sum
+        self.mean_sum += other.mean_sum
+        self.damage_sum += other.damage_sum
+        self.n_series += other.n_series
+        return self
+
+    def cycle_matrix(self, channel=0):
+        """Cycle matrix of a channel, same outputs as `cycle_matrix`: cycles (full), ampl_bin_mean, ampl_edges, mean_bin_mean, mean_edges"""
+        cycles = self.half_cycles[channel]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            ampl_bin_mean = np.nanmean(self.ampl_sum[channel] / np.where(cycles, cycles, np.nan), 1)
+            mean_bin_mean = np.nanmean(self.mean_sum[channel] / np.where(cycles, cycles, np.nan), 1)
+        return cycles / 2, ampl_bin_mean, self.ampl_edges, mean_bin_mean, self.mean_edges
+
+    def eq_loads(self, neq=1, exact=True):
+        """Equivalent loads, array (n_channels, n_neq, n_m)
+
+        exact: from the exact sums of the amplitudes**m, otherwise from the amplitude bins (as `eq_load_and_cycles`)
+        """
+        neq = np.atleast_1d(neq).astype(np.float64)
+        if exact:
+            damage = self.damage_sum / 2
+        else:
+            # amplitude bins of all the mean values
+            cycles = self.half_cycles.sum(axis=2)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                ampl_bin_mean = self.ampl_sum.sum(axis=2) / np.where(cycles, cycles, np.nan)
+                damage = np.nansum(cycles[:, :, None] / 2 * ampl_bin_mean[:, :, None] ** self.m, axis=1)
+        return (damage[:, None, :] / neq[None, :, None]) ** (1. / self.m[None, None, :])
+
+
+def _bin_index(values, edges):
+    """Bin index of the values as np.histogram (last bin closed), -1 outside the edges"""
+    index = np.searchsorted(edges, values, side='right') - 1
+    index[values == edges[-1]] = len(edges) - 2
+    index[(values < edges[0]) | (values > edges[-1]) | (index > len(edges) - 2)] = -1
+    return index
+
+
+def rainflow_files(files, channels, ampl_edges, mean_edges=None, m=[3, 4, 6, 8, 10, 12], weights=None, tmin=None, tmax=None,
+                   chunk_size=100000):
+    """Lifetime cycle matrices and equivalent loads of `channels` over many output files (seeds, DLCs)
+
+    Binary files (.outb) are read in chunks of `chunk_size` time steps with `FASTOutputBinaryMap`, the other
+    files are read whole. Each file is a series of the accumulator, with weight weights[i] (default 1).
+
+    Returns
+    -------
+    accumulator : RainflowAccumulator
+        Use `cycle_matrix(channel)` and `eq_loads(neq)`, the channels in the order of `channels`
+    """
+    from pyFAST.input_output.fast_output_file import FASTOutputFile, FASTOutputBinaryMap
+    acc = RainflowAccumulator(ampl_edges, mean_edges=mean_edges, m=m, n_channels=len(channels))
+    if weights is None:
+        weights = np.ones(len(files))
+    for filename, weight in zip(files, weights):
+        if os.path.splitext(filename)[1].lower() == '.outb':
+            with FASTOutputBinaryMap(filename) as B:
+                for time, data in B.iterChunks(channels, chunkSize=chunk_size, tmin=tmin, tmax=tmax):
+                    acc.add(data, weight)
+        else:
+            df = FASTOutputFile(filename).toDataFrame()
+            time = df.iloc[:, 0].values
+            keep = np.ones(len(time), dtype=bool)
+            if tmin is not None:
+                keep &= time >= tmin
+            if tmax is not None:
+                keep &= time <= tmax
+            labels = [c.split('_[')[0] for c in df.columns]
+            acc.add(np.column_stack([df.iloc[:, labels.index(c) if c in labels else list(df.columns).index(c)].values[keep]
+                                     for c in channels]), weight)
+        acc.end_series(weight)
+    return acc
 
 
 if __name__ == '__main__':
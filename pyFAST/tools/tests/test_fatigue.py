@@ -100,6 +100,124 @@ class TestFatigue(unittest.TestCase):
         #         print (cycle_matrix([(.5, signal1), (.5, signal2)], 4, 8, rainflow_func=rainflow_astm))
 
 
+    def test_fast_identical(self):
+        # Fast rainflow counting gives the same half cycles, equivalent loads and cycle matrices as the reference
+        from pyFAST.tools.fatigue import find_extremes, find_extremes_fast
+        rng = np.random.default_rng(1)
+        signals = [rng.standard_normal(500), np.round(rng.standard_normal(500)*3), np.cumsum(rng.standard_normal(500)),
+                   np.array([1, 1, 3, 3, 2, 2, 2, 5, 0, 0, 4.])]
+        for signal in signals:
+            np.testing.assert_array_equal(find_extremes(signal.copy()), find_extremes_fast(signal))
+            np.testing.assert_array_equal(np.reshape(rainflow_astm(signal.copy()), (2, -1)), rainflow_astm_fast(signal.copy()))
+            for levels, thresshold in [(255, 255/50), (18, 2)]:
+                np.testing.assert_array_equal(rainflow_windap(signal.copy(), levels, thresshold),
+                                              rainflow_windap_fast(signal.copy(), levels, thresshold))
+            for ref, fast in [(rainflow_windap, rainflow_windap_fast), (rainflow_astm, rainflow_astm_fast)]:
+                np.testing.assert_array_equal(eq_load(signal.copy(), no_bins=20, neq=[1, 100], rainflow_func=ref),
+                                              eq_load(signal.copy(), no_bins=20, neq=[1, 100], rainflow_func=fast))
+                for M_ref, M_fast in zip(cycle_matrix(signal.copy(), 8, 4, ref), cycle_matrix(signal.copy(), 8, 4, fast)):
+                    np.testing.assert_array_equal(M_ref, M_fast)
+
+    def test_peak_trough_fast(self):
+        # Same as the reference, also for constant signals and signals with a range below the threshold
+        from pyFAST.tools.fatigue import peak_trough, peak_trough_fast
+        rng = np.random.default_rng(5)
+        signals = [np.array([2, 2, 2, 2, 2, 0, 0, 0, 0, 0]), np.array([3, 3, 3, 3]), np.array([1, 2, 1, 2, 3, 2])]
+        signals += [rng.integers(0, 6, rng.integers(2, 30)) for _ in range(200)]
+        for signal in signals:
+            for R in [1, 2, 4, 10]:
+                np.testing.assert_array_equal(peak_trough(signal, R), peak_trough_fast(signal, R))
+
+    def test_eq_load_channels(self):
+        rng = np.random.default_rng(2)
+        signals = np.cumsum(rng.standard_normal((1000, 3)), axis=0)
+        leq = eq_load_channels(signals, no_bins=20, m=[3, 10], neq=[1, 1000])
+        self.assertEqual(leq.shape, (3, 2, 2))
+        for i in range(3):
+            np.testing.assert_array_equal(leq[i], eq_load(signals[:, i].copy(), no_bins=20, m=[3, 10], neq=[1, 1000]))
+
+    def test_eq_load_channels_batched(self):
+        # Batched counting: same half cycles as the single channel counting, NaN for the channels without variation
+        import pyFAST.tools.fatigue as fatigue
+        rng = np.random.default_rng(3)
+        signals = np.c_[np.cumsum(rng.standard_normal((800, 2)), axis=0), np.full(800, 2.), np.round(rng.standard_normal(800)*3)]
+        for ref, batched in [(rainflow_windap, rainflow_windap_channels), (rainflow_astm, rainflow_astm_channels)]:
+            half_cycles = batched(signals)
+            self.assertIsNone(half_cycles[2])
+            for i in [0, 1, 3]:
+                np.testing.assert_array_equal(np.reshape(ref(signals[:, i].copy()), (2, -1)), half_cycles[i])
+            leq = eq_load_channels(signals, no_bins=20, m=[3, 10], neq=[1, 1000], rainflow_func=ref)
+            self.assertTrue(np.all(np.isnan(leq[2])))
+            np.testing.assert_array_equal(leq[3], eq_load(signals[:, 3].copy(), no_bins=20, m=[3, 10], neq=[1, 1000], rainflow_func=ref))
+        # kernels on preallocated numpy buffers (as with numba)
+        njit = fatigue._njit
+        fatigue._njit = True
+        try:
+            for ref, fast in [(rainflow_windap, rainflow_windap_fast), (rainflow_astm, rainflow_astm_fast)]:
+                np.testing.assert_array_equal(np.reshape(ref(signals[:, 0].copy()), (2, -1)), fast(signals[:, 0].copy()))
+            x = np.array([2, 2, 2, 0, 0, 0])
+            np.testing.assert_array_equal(fatigue.peak_trough(x, 4), fatigue.peak_trough_fast(x, 4))
+        finally:
+            fatigue._njit = njit
+
+    def test_accumulator_chunks(self):
+        # Half cycles counted chunk by chunk: same cycle matrix as rainflow_astm on the whole signal
+        rng = np.random.default_rng(3)
+        signal = np.cumsum(rng.standard_normal(2000))
+        ampl_edges = np.linspace(0, 15, 16)
+        mean_edges = np.linspace(signal.min(), signal.max(), 5)
+        acc = RainflowAccumulator(ampl_edges, mean_edges, m=[3, 10])
+        for chunk in np.split(signal, [0, 1, 7, 500, 501, 1333]):
+            acc.add(chunk)
+        acc.end_series()
+        M_ref = cycle_matrix(signal.copy(), ampl_edges, mean_edges, rainflow_astm)
+        M = acc.cycle_matrix()
+        np.testing.assert_array_equal(M[0], M_ref[0])
+        np.testing.assert_allclose(M[1], M_ref[1])
+        np.testing.assert_allclose(M[3], M_ref[3])
+        ampls = rainflow_astm(signal.copy())[0]
+        np.testing.assert_allclose(acc.eq_loads(neq=2000)[0, 0], [(np.sum(ampls**m)/2/2000)**(1/m) for m in [3, 10]])
+        np.testing.assert_allclose(acc.eq_loads(neq=2000, exact=False)[0],
+                                   eq_load(signal.copy(), no_bins=ampl_edges, m=[3, 10], neq=2000, rainflow_func=rainflow_astm))
+
+    def test_accumulator_merge(self):
+        # Weighted series of two channels, counted in two accumulators and merged
+        rng = np.random.default_rng(4)
+        series = [np.cumsum(rng.standard_normal((800, 2)), axis=0) for _ in range(3)]
+        weights = [0.5, 0.3, 0.2]
+        ampl_edges = np.linspace(0, 20, 11)
+        acc = RainflowAccumulator(ampl_edges, n_channels=2)
+        for signals, weight in zip(series, weights):
+            acc.add_series(signals, weight)
+        acc1 = RainflowAccumulator(ampl_edges, n_channels=2)
+        acc2 = RainflowAccumulator(ampl_edges, n_channels=2)
+        acc1.add_series(series[0], weights[0])
+        for signals, weight in zip(series[1:], weights[1:]):
+            acc2.add_series(signals, weight)
+        acc1.merge(acc2)
+        self.assertEqual(acc1.n_series, 3)
+        np.testing.assert_allclose(acc1.half_cycles, acc.half_cycles)
+        np.testing.assert_allclose(acc1.eq_loads(neq=[1, 100]), acc.eq_loads(neq=[1, 100]))
+        for i in range(2):
+            M_ref = cycle_matrix([(w, s[:, i].copy()) for s, w in zip(series, weights)], ampl_edges, 1, rainflow_astm)
+            np.testing.assert_allclose(acc.cycle_matrix(i)[0], M_ref[0])
+        with self.assertRaises(Exception):
+            acc.merge(RainflowAccumulator(ampl_edges, n_channels=1))
+
+    def test_rainflow_files(self):
+        # Channels of binary output files read in chunks
+        import os
+        from pyFAST.input_output.tests.helpers_for_test import MyDir
+        from pyFAST.input_output.fast_output_file import FASTOutputBinaryMap
+        files = [os.path.join(MyDir, 'FASTOutBin.outb')]*2
+        acc = rainflow_files(files, ['GenPwr', 'Wind1VelX'], np.linspace(0, 100, 21), weights=[1, 2], chunk_size=4)
+        with FASTOutputBinaryMap(files[0]) as B:
+            time, data = B.channels(['GenPwr', 'Wind1VelX'])
+        ref = RainflowAccumulator(np.linspace(0, 100, 21), n_channels=2)
+        ref.add_series(data, 3)
+        np.testing.assert_allclose(acc.half_cycles, ref.half_cycles)
+        np.testing.assert_allclose(acc.damage_sum, ref.damage_sum)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -32,6 +32,9 @@ class QBladeOutputFile(File):
         time  = df['Time_[s]']
         Omega = df['RotSpeed_[rpm]']
 
+        # read only some channels in a time window
+        df = QBladeOutputFile('Output.outq', channels=['NP Yaw Z_l [deg]','Thrust'], tmin=600).toDataFrame()
+
     """
 
     @staticmethod
@@ -42,18 +45,34 @@ class QBladeOutputFile(File):
     def formatName():
         return 'QBlade output file'
 
-    def _read(self):
+    def _read(self, channels=None, tmin=None, tmax=None, dtype='float64', chunksize=100000):
+        """ 
+        Read the file. The numeric body is bulk-loaded with the pandas C parser, with optional selection:
+          - channels: list of channel names (with or without units, e.g. 'NP Yaw Z_l' or 'NP Yaw Z_l [deg]'),
+                      the time (first column) is always read
+          - tmin, tmax: time window (inclusive), the file is read by chunks of `chunksize` lines and
+                      the reading stops after tmax
+          - dtype: data type of the channels
+        Files not matching the QBlade layout are read with the generic CSV reader.
+        """
         
         self.info={}
         self['binary']=False
         
         try:
+            try:
+                self.data = read_qblade_body(self.filename, channels=channels, tmin=tmin, tmax=tmax, dtype=dtype, chunksize=chunksize)
+            except (ValueError, pd.errors.ParserError):
+                if channels is not None or tmin is not None or tmax is not None:
+                    raise
                 F=CSVFile(filename=self.filename, sep=',', commentLines=[0,2],colNamesLine=2)
                 self.data = F.data
                 del F
-                self.info['attribute_units']=None
-                self.info['attribute_names']=self.data.columns.values
+            self.info['attribute_units']=None
+            self.info['attribute_names']=self.data.columns.values
 
+        except KeyError:
+            raise
         except MemoryError as e:    
             raise BrokenReaderError('QBlade Out File {}: Memory error encountered\n{}'.format(self.filename,e))
         except Exception as e:    
@@ -87,6 +106,72 @@ class QBladeOutputFile(File):
 # --------------------------------------------------------------------------------
 # --- Helper low level functions 
 # --------------------------------------------------------------------------------
+# Number of lines before the numeric body (the channel names are on the last one)
+QBLADE_HEADER_LINES = 3
+
+def read_qblade_header(filename):
+    """ Return the names of the channels of a QBlade output file (line QBLADE_HEADER_LINES-1 of the file) """
+    with open(filename, 'r', errors='replace') as f:
+        for i in range(QBLADE_HEADER_LINES):
+            line = f.readline()
+    names = [c.strip() for c in line.strip().split(',')]
+    # trailing separator
+    while len(names)>0 and names[-1]=='':
+        names = names[:-1]
+    if len(names)<2 or any([n=='' for n in names]):
+        raise ValueError('No channel names found on line {}'.format(QBLADE_HEADER_LINES))
+    return names
+
+def qblade_channel_indices(names, channels):
+    """ Indices of `channels` in `names`, channel names are accepted with or without units. Raise KeyError if not found. """
+    short_names = [re.sub(r'\s*\[.*\]$','',n) for n in names]
+    I = []
+    for c in channels:
+        c = c.strip()
+        if c in names:
+            I.append(names.index(c))
+        elif c in short_names:
+            I.append(short_names.index(c))
+        else:
+            raise KeyError('Channel {} not found in QBlade output file'.format(c))
+    return I
+
+def read_qblade_body(filename, channels=None, tmin=None, tmax=None, dtype='float64', chunksize=100000):
+    """ 
+    Read the numeric body of a QBlade output file with the pandas C parser, returns a DataFrame
+    with the selected channels (time first). See QBladeOutputFile._read for the arguments.
+    """
+    names = read_qblade_header(filename)
+    if channels is None:
+        I = list(range(len(names)))
+    else:
+        I = [0] + [i for i in qblade_channel_indices(names, channels) if i!=0]
+        I = list(dict.fromkeys(I)) # unique, order kept
+    cols = [names[i] for i in I]
+    # (the C parser infers float64 faster than it converts to given dtypes, the dtype is applied after)
+    kwargs = dict(sep=',', skiprows=QBLADE_HEADER_LINES, header=None, usecols=I, engine='c')
+
+    if tmin is None and tmax is None:
+        df = pd.read_csv(filename, **kwargs)
+    else:
+        tmin = -np.inf if tmin is None else tmin
+        tmax =  np.inf if tmax is None else tmax
+        dfs = []
+        with pd.read_csv(filename, chunksize=chunksize, **kwargs) as reader:
+            for chunk in reader:
+                time = chunk[0].values
+                dfs.append(chunk[(time>=tmin) & (time<=tmax)])
+                if len(time)>0 and time[-1]>tmax:
+                    break
+        df = pd.concat(dfs) if len(dfs)>0 else pd.DataFrame(columns=I)
+    df = df[I]
+    if any([not np.issubdtype(t, np.number) for t in df.dtypes]):
+        raise ValueError('Non numeric values in QBlade output file')
+    df = df.astype({i:(dtype if i!=0 else 'float64') for i in I}, copy=False)
+    df.columns = cols
+    df.reset_index(drop=True, inplace=True)
+    return df
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:20:48 2026
+
+#  Persistent store (SQLite database) of the objective function values of the optimization, so that design vectors already
+#  evaluated, in this or in a previous run, are not simulated again and interrupted optimizations can be warm-started.
+#  Values are stored with the key of the template model (model definition, template files and objective settings) and the
+#  design vector rounded to "decimals".
+#  Contains:
+#  - class: ResultStore, MemoizedTarget, FailedEvaluation
+#  - functions: template_model_key
+
+@author: Guido Lazzerini
+
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+# Model entries and options not affecting the results (execution settings), excluded from the key of the template model
+RESULT_NEUTRAL_ENTRIES = ['IDFOLDER']
+RESULT_NEUTRAL_OPTIONS = ['BEMWorkers', 'HydroCacheFolder', 'HydroCacheMaxSizeMB', 'HydroCacheMaxEntries', 'InputCacheFolder',
+                          'RunShareMethods', 'RunSymlinkFolders', 'RunScratchFolder', 'RunHarvestPatterns', 'RunIndexFile',
+                          'PlotSpectra', 'PlotQueueFolder']
+
+# Key of the template model: entries of the model definition, content of the template files in "filepath_template"
+# named by the model (labels ending with "FILENAME") and any other setting of the objective function in "extra" (dict)
+def template_model_key(model, filepath_template, extra={}):
+
+    entries = []
+    for d in model.data:
+        if d['isComment'] or d['label'] in RESULT_NEUTRAL_ENTRIES:
+            continue
+        if d['label'] == 'OPTIONS':
+            entries.append((d['label'], {k: v for k, v in d['value'].items() if k not in RESULT_NEUTRAL_OPTIONS}))
+        else:
+            entries.append((d['label'], d['value']))
+    key_hash = hashlib.sha256(json.dumps([entries, extra], sort_keys=True, default=str).encode('utf-8'))
+
+    for label, value in entries:
+        if label.endswith('FILENAME') and not label.endswith('MODFILENAME'):
+            template_file = filepath_template + "\\" + str(value)
+            if os.path.isfile(template_file):
+                with open(template_file, 'rb') as f:
+                    key_hash.update(f.read())
+
+    return key_hash.hexdigest()[:16]
+
+# Value of the objective function of an evaluation not completed (model not created, simulation aborted, exception in
+# a stage): used by the optimizer as any other value, but not stored, so that the design is evaluated again in a next run
+# (penalties of the constraints are values of completed evaluations, and are stored)
+class FailedEvaluation(float):
+    pass
+
+class ResultStore:
+
+    # db_file (string) : SQLite database, shared by all the workers (one connection per call, so the object can be pickled)
+    # decimals (int) : number of decimals of the design variables used to compare the design vectors
+    def __init__(self, db_file, decimals=6):
+        self.db_file = db_file
+        self.decimals = decimals
+
+        with self._connect() as con:
+            con.execute('CREATE TABLE IF NOT EXISTS results (model_key TEXT, design_key TEXT, xx TEXT, fval REAL, time TEXT, '
+                        'PRIMARY KEY (model_key, design_key))')
+        con.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_file, timeout=60)
+
+    def design_key(self, xx):
+        return json.dumps([round(float(value), self.decimals) for value in xx])
+
+    # Stored value of the objective function for "xx", None if "xx" was never evaluated
+    def get(self, model_key, xx):
+
+        con = self._connect()
+        row = con.execute('SELECT fval FROM results WHERE model_key=? AND design_key=?', (model_key, self.design_key(xx))).fetchone()
+        con.close()
+
+        return row[0] if row is not None else None
+
+    # Store the value of the objective function for "xx" (non finite values and failed evaluations are not stored)
+    def put(self, model_key, xx, fval):
+
+        if not np.isfinite(fval) or isinstance(fval, FailedEvaluation):
+            return False
+
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._connect() as con:
+            con.execute('INSERT OR REPLACE INTO results VALUES (?,?,?,?,?)',
+                        (model_key, self.design_key(xx), json.dumps([float(value) for value in xx]), float(fval), current_time))
+        con.close()
+
+        return True
+
+    # All the design vectors (array M x N) and objective values (array M) stored for the model, sorted by objective value
+    def results(self, model_key):
+
+        con = self._connect()
+        rows = con.execute('SELECT xx, fval FROM results WHERE model_key=? ORDER BY fval', (model_key,)).fetchall()
+        con.close()
+
+        xx = np.array([json.loads(row[0]) for row in rows])
+        fvals = np.array([row[1] for row in rows])
+
+        return xx, fvals
+
+    # Initial population (array S x N) for differential_evolution "init": the best stored designs inside "boundaries",
+    # completed with random designs (latin hypercube) if less than "n_individuals" designs are stored
+    def init_population(self, model_key, boundaries, n_individuals, seed=None):
+
+        lower = np.array([min(bound) for bound in boundaries])
+        upper = np.array([max(bound) for bound in boundaries])
+
+        xx, fvals = self.results(model_key)
+        if len(xx) > 0:
+            inside = np.all((xx >= lower) & (xx <= upper), axis=1)
+            xx = xx[inside][:n_individuals]
+        else:
+            xx = np.zeros((0, len(boundaries)))
+
+        n_random = n_individuals - len(xx)
+        if n_random > 0:
+            rng = np.random.default_rng(seed)
+            samples = (rng.permuted(np.tile(np.arange(n_random), (len(boundaries), 1)), axis=1).T + rng.random((n_random, len(boundaries))))/n_random
+            xx = np.vstack([xx, lower + samples*(upper - lower)])
+
+        print('Initial population: %d stored designs, %d random designs' % (n_individuals - max(n_random, 0), max(n_random, 0)))
+
+        return xx
+
+# Objective function returning the stored value of the design vectors already evaluated (can be pickled for the DE workers)
+class MemoizedTarget:
+
+    def __init__(self, func, store, model_key):
+        self.func = func
+        self.store = store
+        self.model_key = model_key
+
+    def __call__(self, xx):
+
+        fval = self.store.get(self.model_key, xx)
+        if fval is not None:
+            print('Design %s already evaluated, stored objective %.6f' % (list(xx), fval))
+            return fval
+
+        fval = self.func(xx)
+        self.store.put(self.model_key, xx, fval)
+
+        return fval
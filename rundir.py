@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+r"""
+Created on Sun Oct 18 22:48:09 2026
+
+#  Run-directory builder of the simulation folders of the individuals ("sims\mod_input_files_<id>"):
+#  - the read-only assets of the template (airfoils, ServoDyn folder, hydrodynamic potential files, ...) are shared,
+#    not copied: files by hard link, then symbolic link, then reflink (copy-on-write clone, Linux file systems
+#    supporting FICLONE), then copy; folders by a symbolic link to the whole folder or, if not allowed (e.g. Windows
+#    without developer mode), by sharing each file
+#  - garbage collection of the completed run folders whose outputs are in the archive (postproc_archive.py):
+#    'compact' removes the shared assets and the archived outputs and keeps the (small) modified input files, plots and
+#    the outputs not archived (MoorDyn ".MD.out" and ".MD.Line<n>.out"),
+#    'delete' removes the whole folder (compacted instead if it contains outputs not archived)
+#  A shared file is the template file itself: it must be removed, not overwritten, before writing a modified file.
+#  Contains:
+#  - functions: share_file, share_folder, run_folder_state, collect_run_folders
+
+@author: Guido Lazzerini
+
+"""
+import os
+import shutil
+import time
+
+# Methods used to share the files, in order of preference
+SHARE_METHODS = ['hardlink', 'symlink', 'reflink', 'copy']
+
+# Output files of the runs (archived), prefix of the run folders
+RUN_OUTPUT_EXTENSIONS = ['.outb', '.outq', '.out']
+RUN_FOLDER_PREFIX = 'mod_input_files_'
+
+# Parts of the names of the output files not archived (MoorDyn outputs, see postproc_archive.archive_folder)
+RUN_OUTPUTS_NOT_ARCHIVED = ['.MD.']
+
+# Linux ioctl cloning a file (copy-on-write, e.g. btrfs, xfs)
+FICLONE = 0x40049409
+
+def _reflink(src_file, dst_file):
+
+    import fcntl
+    with open(src_file, 'rb') as src, open(dst_file, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(dst_file)
+            raise
+    shutil.copystat(src_file, dst_file)
+
+# Share "src_file" as "dst_file" with the first method of "methods" supported, returns the method used
+def share_file(src_file, dst_file, methods=SHARE_METHODS):
+
+    if os.path.lexists(dst_file):
+        os.remove(dst_file)
+
+    for method in methods:
+        try:
+            if method == 'hardlink':
+                os.link(src_file, dst_file)
+            elif method == 'symlink':
+                os.symlink(os.path.abspath(src_file), dst_file)
+            elif method == 'reflink':
+                _reflink(src_file, dst_file)
+            elif method == 'copy':
+                shutil.copy2(src_file, dst_file)
+            return method
+        except (OSError, AttributeError, NotImplementedError, ImportError):
+            continue
+
+    raise OSError('File %s could not be shared as %s' % (src_file, dst_file))
+
+# Share the folder "src_dir" as "dst_dir": symbolic link to the folder if "symlink_folder", otherwise (or if not allowed)
+# each file is shared by "share_file" in a copy of the folder tree; returns the number of files shared by each method
+def share_folder(src_dir, dst_dir, methods=SHARE_METHODS, symlink_folder=True):
+
+    if not os.path.isdir(src_dir):
+        raise FileNotFoundError(2, 'Folder not found', src_dir)
+
+    if symlink_folder and 'symlink' in methods and not os.path.lexists(dst_dir):
+        try:
+            os.symlink(os.path.abspath(src_dir), dst_dir, target_is_directory=True)
+            return {'symlink_folder': 1}
+        except (OSError, NotImplementedError):
+            pass
+
+    shared = {}
+    for base, dirs, files in os.walk(src_dir):
+        dst_base = os.path.join(dst_dir, os.path.relpath(base, src_dir))
+        os.makedirs(dst_base, exist_ok=True)
+        for x in files:
+            method = share_file(os.path.join(base, x), os.path.join(dst_base, x), methods)
+            shared[method] = shared.get(method, 0) + 1
+
+    return shared
+
+# Shared entries (links to the template) and output files of a run folder
+def run_folder_state(run_folder):
+
+    shared, outputs = [], []
+    for base, dirs, files in os.walk(run_folder):
+        for x in list(dirs):
+            if os.path.islink(os.path.join(base, x)):
+                shared.append(os.path.join(base, x))
+                dirs.remove(x)
+        for x in files:
+            path = os.path.join(base, x)
+            if os.path.islink(path) or os.stat(path).st_nlink > 1:
+                shared.append(path)
+            elif os.path.splitext(x)[1] in RUN_OUTPUT_EXTENSIONS:
+                outputs.append(path)
+
+    return shared, outputs
+
+# Garbage collection of the run folders in "sims_folder" whose outputs are all in the archive
+# archived_sources (dict) : source file as key and archived modification time as value (see postproc_archive.read_archive_sources)
+# policy (string) : 'compact' (remove shared assets and archived outputs) or 'delete' (remove the folder, compact it if it
+#                   contains outputs not archived)
+# min_age (float) : run folders modified less than "min_age" seconds ago are skipped (runs possibly still in progress)
+# not_archived (list) : parts of the names of the outputs not archived, kept in the compacted folders
+def collect_run_folders(sims_folder, archived_sources, policy='compact', min_age=600, not_archived=RUN_OUTPUTS_NOT_ARCHIVED):
+
+    if policy not in ['compact', 'delete']:
+        raise ValueError('Unknown garbage collection policy %s' % policy)
+
+    archived = {os.path.normcase(os.path.abspath(source)): mtime for source, mtime in archived_sources.items()}
+    now = time.time()
+    collected = 0
+    freed = 0
+
+    for x in sorted(os.listdir(sims_folder)):
+        run_folder = os.path.join(sims_folder, x)
+        if not x.startswith(RUN_FOLDER_PREFIX) or os.path.islink(run_folder) or not os.path.isdir(run_folder):
+            continue
+        if now - os.path.getmtime(run_folder) < min_age:
+            continue
+
+        shared, outputs = run_folder_state(run_folder)
+        # outputs in the archive with an up-to-date modification time, the others (e.g. MoorDyn ".MD.out", not archived) are kept
+        archived_outputs = [path for path in outputs
+                            if archived.get(os.path.normcase(os.path.abspath(path)), -1) >= os.path.getmtime(path)]
+        kept_outputs = [path for path in outputs if path not in archived_outputs]
+        # main outputs all archived
+        if len(archived_outputs) == 0 or \
+           any([not any([part in os.path.basename(path) for part in not_archived]) for path in kept_outputs]):
+            continue
+
+        if policy == 'delete' and len(kept_outputs) == 0:
+            for base, dirs, files in os.walk(run_folder):
+                freed += sum([os.path.getsize(os.path.join(base, f)) for f in files
+                              if not os.path.islink(os.path.join(base, f)) and os.stat(os.path.join(base, f)).st_nlink == 1])
+            shutil.rmtree(run_folder)
+        else:
+            # folder compacted also with 'delete' if it contains outputs not archived
+            for path in shared + archived_outputs:
+                if os.path.islink(path) or os.path.isfile(path):
+                    if not os.path.islink(path) and os.stat(path).st_nlink == 1:
+                        freed += os.path.getsize(path)
+                    os.remove(path)
+            # empty folders left by the shared assets
+            for base, dirs, files in os.walk(run_folder, topdown=False):
+                if base != run_folder and len(os.listdir(base)) == 0:
+                    os.rmdir(base)
+        collected += 1
+
+    print('Garbage collection (%s): %d run folders, %.1f MB freed' % (policy, collected, freed/1024**2))
+
+    return collected
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+r"""
+Created on Sun Oct 18 23:20:36 2026
+
+#  Lifecycle of the run folders of the individuals:
+#  - each case is executed in a run folder, in "sims" or in a scratch folder (option 'RunScratchFolder', e.g. a tmpfs
+#    such as "/dev/shm", 'tmpfs' to use "/dev/shm" if available, otherwise the temporary folder of the system)
+#  - at the end of the evaluation only the declared outputs (option 'RunHarvestPatterns', output files and plots by default)
+#    are moved from the scratch folder to the result folder "sims\mod_input_files_<id>" and the scratch folder is removed
+#  - the runs are tracked in an index (SQLite database, option 'RunIndexFile'), so that the number of evaluations and of
+#    executions of OpenFAST/QBlade are read from the index instead of walking the "sims" folder
+#  Contains:
+#  - class: RunIndex
+#  - functions: run_folder_name, scratch_root, harvest_run
+
+@author: Guido Lazzerini
+
+"""
+import fnmatch
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+
+# Outputs moved from the scratch folder to the result folder
+HARVEST_PATTERNS = ['*.outb', '*.outq', '*.MD.out', '*.png', '*.npz']
+
+# Folder of the run (scratch) or of the results of the individual "name", in "root_folder"
+def run_folder_name(simSoftware, name, root_folder):
+
+    if simSoftware == 'OpenFAST':
+        return root_folder + f"\\mod_input_files_{name}"
+    elif simSoftware == 'QBlade':
+        return root_folder + f"\\mod_input_files_QBlade_{name}"
+
+# Root of the scratch run folders set by the option 'RunScratchFolder' (None if the runs are executed in "sims")
+def scratch_root(model):
+
+    scratch = model.getOption('RunScratchFolder')
+    if scratch == 'tmpfs':
+        scratch = '/dev/shm/fowt_runs' if os.path.isdir('/dev/shm') else os.path.join(tempfile.gettempdir(), 'fowt_runs')
+    if scratch is not None:
+        os.makedirs(scratch, exist_ok=True)
+
+    return scratch
+
+# Move the outputs of "run_folder" matching "patterns" to "result_folder" and remove "run_folder" (if different)
+# returns the list of the outputs in "result_folder"
+def harvest_run(run_folder, result_folder, patterns=HARVEST_PATTERNS):
+
+    if os.path.abspath(run_folder) == os.path.abspath(result_folder) or not os.path.isdir(run_folder):
+        return []
+
+    os.makedirs(result_folder, exist_ok=True)
+    harvested = []
+    for base, dirs, files in os.walk(run_folder):
+        for x in files:
+            if any([fnmatch.fnmatch(x, pattern) for pattern in patterns]):
+                src_file = os.path.join(base, x)
+                if os.path.islink(src_file):
+                    continue
+                dst_file = os.path.join(result_folder, os.path.relpath(src_file, run_folder))
+                os.makedirs(os.path.dirname(dst_file), exist_ok=True)
+                shutil.move(src_file, dst_file)
+                harvested.append(dst_file)
+
+    shutil.rmtree(run_folder, ignore_errors=True)
+
+    return harvested
+
+class RunIndex:
+
+    # index_file (string) : SQLite database, shared by all the workers (one connection per call, so the object can be pickled)
+    def __init__(self, index_file):
+        self.index_file = index_file
+
+        with self._connect() as con:
+            con.execute('CREATE TABLE IF NOT EXISTS runs (id_folder TEXT PRIMARY KEY, sim_software TEXT, run_folder TEXT, '
+                        'result_folder TEXT, status TEXT, output_file TEXT, f_max REAL, created TEXT, finished TEXT)')
+        con.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.index_file, timeout=60)
+
+    # New run (status 'created')
+    def register(self, id_folder, sim_software, run_folder, result_folder):
+
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._connect() as con:
+            con.execute('INSERT OR REPLACE INTO runs VALUES (?,?,?,?,?,?,?,?,?)',
+                        (id_folder, sim_software, run_folder, result_folder, 'created', None, None, current_time, None))
+        con.close()
+
+    # Update the run "id_folder": status ('executed', 'failed', 'finished'), output file, objective value
+    def update(self, id_folder, status, output_file=None, f_max=None):
+
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._connect() as con:
+            con.execute('UPDATE runs SET status=?, output_file=COALESCE(?, output_file), f_max=COALESCE(?, f_max), finished=? '
+                        'WHERE id_folder=?', (status, output_file, f_max, current_time, id_folder))
+        con.close()
+
+    # Number of evaluations (runs created) and of executions of the simulation software (runs with an output file),
+    # optionally only the runs created after "since" (datetime)
+    def counts(self, since=None):
+
+        since = '' if since is None else since.strftime("%Y-%m-%d %H:%M:%S")
+        con = self._connect()
+        n_eval, n_exec = con.execute('SELECT COUNT(*), COUNT(output_file) FROM runs WHERE created>=?', (since,)).fetchone()
+        con.close()
+
+        return n_eval, n_exec
+
+    # Runs as list of dict, optionally only the runs with status "status"
+    def runs(self, status=None):
+
+        con = self._connect()
+        con.row_factory = sqlite3.Row
+        if status is None:
+            rows = con.execute('SELECT * FROM runs ORDER BY created').fetchall()
+        else:
+            rows = con.execute('SELECT * FROM runs WHERE status=? ORDER BY created', (status,)).fetchall()
+        con.close()
+
+        return [dict(row) for row in rows]
@@ -11,6 +11,9 @@ import numpy as np
 import subprocess
 import os
 import shutil
+import tempfile
+import hashlib
+import json
 import uuid
 import time
 import math
@@ -18,9 +21,12 @@ from datetime import datetime
 from pathlib import Path
 
 # Import third-party custom open-source libraries for input/output handling and software execution
-from pyFAST.input_output.fast_input_file import FASTInputFile
+from fastinputcache import read_fast_input
+from templatedeck import get_template_deck
 from pyFAST.input_output.fast_output_file import FASTOutputFile
 from mappp_mooring_response import calc_mooring_restoring_matrix
+from evalscheduler import solver_slot
+from runmanager import RunIndex, HARVEST_PATTERNS, run_folder_name, scratch_root, harvest_run
 #import QBladeDllInterface.qbladesys as QBlade
 from pyQBlade.qblade_input_file import QBladeInputFile
 from pyQBlade.qblade_output_file import QBladeOutputFile
@@ -29,12 +35,17 @@ from turbclass import TurbModel
 # Import custom libraries for platform and moorings modifications and frequency domain analysis
 from moormod import moor_config_openfast,moor_config_qblade
 from platmod import plat_config_openfast, plat_config_qblade
-from timetofreqdomain import freq_domain_data
+from timetofreqdomain import spectral_peaks, plot_freq_domain, fixed_freq_grid, psd_fixed_grid, track_peaks
 from postproc_timehistories import plot_func, plot_func_moor
+from plotservice import get_plot_queue
+from resultstore import FailedEvaluation
 
 
 # OpenFAST exe path
 FASTexe = os.getcwd() + r'\\openfast_x64.exe'
+
+# Designs rejected by the screening, read from "Rejected_list.txt" (file modification time and list of records)
+REJECTED_DESIGNS = {'mtime': None, 'records': []}
     
 # Creates and modifies the files necessary to simulate a floating wind turbine in time domain and calculates specific performance from simulation
 # xx (list) : design variables values, their order MUST correspond to the keys of model['DESVARIABLES']
@@ -42,13 +53,138 @@ FASTexe = os.getcwd() + r'\\openfast_x64.exe'
 # evaltime  (float) : > 0 initial time instant at which the specific performance of the simulation will be evaluated (used to avoid transient effects)
 # penaltyValue (float): value returned by this function if constraints are not satisfied (constraints are defined in model['CONSTRAINTS'])
 # filepath_template (string) : filepath of the folder in which the model files are present
+# Evaluations not completed (new model not created, simulation aborted) return 1/penaltyValue as FailedEvaluation (not stored, see resultstore.py)
+# The evaluation is split in stages (eval_screening, eval_preprocess, eval_mooring_check, eval_solver_run, eval_postprocess) sharing
+# an evaluation state (dict), so that the stages of different individuals can be overlapped (see evalpipeline.py)
 
 def eval_Fobj(xx,\
               model,\
               evalTime = 0, penaltyValue = 9999.9,\
               filepath_template = os.getcwd() + '\\sims\\template_input_files'):
     
-    f_max = -1
+    # Check the surge constraint before creating any file of the new model
+    passed, f_screen, K0 = eval_screening(xx, model, penaltyValue = penaltyValue, filepath_template = filepath_template)
+    
+    if not passed:
+        return f_screen
+    
+    ev = eval_preprocess(xx, model, filepath_template = filepath_template)
+    
+    if ev == -1:
+        return FailedEvaluation(1/penaltyValue)
+    
+    ev['K0'] = K0
+    ev = eval_guarded(eval_mooring_check, ev, penaltyValue = penaltyValue)
+    
+    ev = eval_guarded(eval_solver_run, ev)
+    
+    return eval_postprocess(ev, evalTime = evalTime, penaltyValue = penaltyValue)
+
+# Evaluation stage 0 (screening): checks the surge constraint with MAP++ from the design variables only, in a scratch folder
+# removed afterwards, so that infeasible designs are rejected before the files, the mesh and the hydrodynamics of the new model are created
+# rejected designs are appended to "Rejected_list.txt" and rejected again without running MAP++ if the constraint is not looser
+# returns passed (bool), f_max (penalty if not passed) and the restoring matrix K0 (None if not calculated)
+def eval_screening(xx,\
+                   model,\
+                   penaltyValue = 9999.9,\
+                   filepath_template = os.getcwd() + '\\sims\\template_input_files'):
+    
+    if 'MaxSurgeExcursion' not in model['CONSTRAINTS'].keys():
+        return True, -1, None
+    
+    max_surge = model['CONSTRAINTS']['MaxSurgeExcursion']
+    screening_key = get_screening_key(model)
+    
+    # Designs already rejected
+    surge_excursion = find_rejected_design(xx, screening_key, max_surge)
+    
+    if surge_excursion is not None:
+        file_object = open(os.getcwd() + '\\sims\\'+'Pop_list'+'.txt', 'a') 
+        now = datetime.now()
+        current_time = now.strftime("%H:%M:%S")
+        file_object.write("%s - surge out of boundary (already rejected) - %.2f %.4f %.2f\n" % (current_time, xx[0], xx[1], surge_excursion))
+        file_object.close()
+        return False, 1/penaltyValue, None
+    
+    # Calculate restoring matrix of mooring system in a scratch folder
+    screening_folder = tempfile.mkdtemp(prefix='screening_', dir=os.getcwd() + '\\sims')
+    try:
+        K0 = calc_mooring_restoring_matrix(xx,
+                                           model,
+                                           filepath_template=filepath_template,mapp_template=model['MAPFILENAME'],
+                                           filepath_mod=screening_folder,mapp_modfile=model['MAPFILENAME'])
+    finally:
+        shutil.rmtree(screening_folder, ignore_errors=True)
+    
+    # Surge excursion from thrust force
+    surge_excursion = model['FIXVARIABLES']['SurgeForce']/K0[0][0]
+    
+    if surge_excursion>max_surge:
+        add_rejected_design(xx, screening_key, surge_excursion)
+        file_object = open(os.getcwd() + '\\sims\\'+'Pop_list'+'.txt', 'a') 
+        now = datetime.now()
+        current_time = now.strftime("%H:%M:%S")
+        file_object.write("%s - surge out of boundary - %.2f %.4f %.2f screening\n" % (current_time, xx[0], xx[1], surge_excursion))
+        file_object.close()
+        return False, 1/penaltyValue, K0
+    
+    return True, -1, K0
+
+# Key of the mooring system of the model (the design variables names, the fixed variables and the MAP++ template),
+# designs are compared only if they share the key
+def get_screening_key(model):
+    
+    key_data = [list(model['DESVARIABLES'].keys()), model['FIXVARIABLES'], model['PLATFORMTYPE'], model['MAPFILENAME']]
+    key_string = json.dumps(key_data, sort_keys=True, default=str)
+    
+    return hashlib.sha1(key_string.encode('utf-8')).hexdigest()[:16]
+
+# Surge excursion of a rejected design with the same key and design variables (rounded to "decimals") exceeding "max_surge",
+# None if the design was never rejected
+def find_rejected_design(xx, screening_key, max_surge, decimals = 6):
+    
+    rejected_file = os.getcwd() + '\\sims\\'+'Rejected_list'+'.txt'
+    
+    if not os.path.isfile(rejected_file):
+        return None
+    
+    # read the file again only if other workers added new records
+    mtime = os.path.getmtime(rejected_file)
+    if REJECTED_DESIGNS['mtime'] != mtime:
+        records = []
+        file_object = open(rejected_file, 'r')
+        for line in file_object:
+            values = line.split()
+            try:
+                records.append((values[1], float(values[2]), tuple(round(float(value), decimals) for value in values[3:])))
+            except (IndexError, ValueError):
+                continue
+        file_object.close()
+        REJECTED_DESIGNS['mtime'] = mtime
+        REJECTED_DESIGNS['records'] = records
+    
+    design = tuple(round(float(value), decimals) for value in xx)
+    for key, surge_excursion, rejected_design in REJECTED_DESIGNS['records']:
+        if key == screening_key and rejected_design == design and surge_excursion > max_surge:
+            return surge_excursion
+    
+    return None
+
+# Append a rejected design to "Rejected_list.txt": time, key, surge excursion and design variables
+def add_rejected_design(xx, screening_key, surge_excursion):
+    
+    file_object = open(os.getcwd() + '\\sims\\'+'Rejected_list'+'.txt', 'a')
+    now = datetime.now()
+    current_time = now.strftime("%H:%M:%S")
+    file_object.write("%s %s %.6f %s\n" % (current_time, screening_key, surge_excursion, ' '.join('%.10g' % value for value in xx)))
+    file_object.close()
+
+# Evaluation stage 1: creates the folder and the files of the new model, modifies moorings and platform (hydrodynamics)
+# returns the evaluation state (dict) used by the next stages, -1 if the new model was not created
+def eval_preprocess(xx,\
+                    model,\
+                    filepath_template = os.getcwd() + '\\sims\\template_input_files'):
+    
     # Save outputs to print in "Pop_list.txt", first we save the design variables current values
     outputsToPrint = {}
     k = 1
@@ -66,94 +202,131 @@ def eval_Fobj(xx,\
     simSoftware = model['SIMSOFTWARE']
     
     # Create new folder for modified files, if the IDFOLDER is 'auto' the function creates a new folder with a random and unique name
+    # the case is executed in a scratch folder if 'RunScratchFolder' is set, the outputs are then harvested in the result
+    # folder in "sims" by eval_postprocess (see runmanager.py)
     if model['IDFOLDER'] == 'auto':
         id_folder = uuid.uuid4().hex
-        mod_folder_name = createModFolder(model['SIMSOFTWARE'],id_folder)
     else:
         id_folder = model['IDFOLDER']
+    scratch_folder = scratch_root(model)
+    result_folder_name = run_folder_name(simSoftware, id_folder, os.getcwd() + '\\sims')
+    if scratch_folder is None:
         mod_folder_name = createModFolder(model['SIMSOFTWARE'],id_folder)
+    else:
+        mod_folder_name = createModFolder(model['SIMSOFTWARE'],id_folder,root_folder = scratch_folder)
+    
+    # Register the run in the index of the runs
+    runIndex = RunIndex(model.getOption('RunIndexFile', os.getcwd() + '\\sims\\run_index.sqlite'))
+    runIndex.register(id_folder, simSoftware, mod_folder_name, result_folder_name)
     
     # Open first text file to check the correct execution of this function, with starting time, simulation software and folder id
     file_object = open(os.getcwd() + '\\sims\\'+'check_parallel_execution1'+'.txt', 'a')
     file_object.write("time: %s, recognized simulation software: %s, folder id: %s \n" % (current_time,simSoftware,id_folder))
     file_object.close()
     
-    # Create new turbine model (and copy the files needed by the simulation software) in the new folder
-    currentTurbModel = createModFiles(model, filepath_template, mod_folder_name)
+    # the run is closed in the index and the scratch folder removed if the creation of the model fails
+    try:
+        # Create new turbine model (and copy the files needed by the simulation software) in the new folder
+        currentTurbModel = createModFiles(model, filepath_template, mod_folder_name)
     
-    if currentTurbModel == -1:
-        print('Something went wrong in the creation of the new model, the simulation was not performed!')
-        return -1
-
-    MD_Data = -1
-    sub_data = -1
+        if currentTurbModel == -1:
+            print('Something went wrong in the creation of the new model, the simulation was not performed!')
+            runIndex.update(id_folder, 'failed')
+            harvest_run(mod_folder_name, result_folder_name, patterns = [])
+            return -1
 
-    # Modify moorings configuration
-    if simSoftware == 'OpenFAST':
-        MD_Data=moor_config_openfast(xx,
-                                     currentTurbModel,
-                                     filepath = filepath_template, filepath_mod = mod_folder_name)
-        if MD_Data == -1:
-            print('Beware, moorings are not present in this simulation')
+        MD_Data = -1
+        sub_data = -1
+        ED_data = -1
+        dt = -1
+
+        # Modify moorings configuration
+        if simSoftware == 'OpenFAST':
+            MD_Data=moor_config_openfast(xx,
+                                         currentTurbModel,
+                                         filepath = filepath_template, filepath_mod = mod_folder_name)
+            if MD_Data == -1:
+                print('Beware, moorings are not present in this simulation')
         
-    elif simSoftware == 'QBlade':
-        sub_data=moor_config_qblade(xx,
-                                    currentTurbModel,
-                                    filepath = filepath_template, filepath_mod = mod_folder_name)
-        if sub_data == -1:
-            print('Beware, moorings are not present in this simulation')
+        elif simSoftware == 'QBlade':
+            sub_data=moor_config_qblade(xx,
+                                        currentTurbModel,
+                                        filepath = filepath_template, filepath_mod = mod_folder_name)
+            if sub_data == -1:
+                print('Beware, moorings are not present in this simulation')
             
-    # Modify platform and re-calculate hydrostatics and hydrodynamics, if needed
-    capy_init_time = time.time()
+        # Modify platform and re-calculate hydrostatics and hydrodynamics, if needed
+        capy_init_time = time.time()
     
-    if simSoftware == 'OpenFAST':
-        HD_data,ED_data,hst_file,K_hst, draft = plat_config_openfast(xx,
-                                                                     currentTurbModel, 
-                                                                     filepath = filepath_template,
-                                                                     filepath_mod = mod_folder_name)   
-    elif simSoftware == 'QBlade':
-        sub_data = plat_config_qblade(xx, 
-                                      currentTurbModel, 
-                                      filepath = filepath_template,
-                                      filepath_mod = mod_folder_name)
-    
-    capy_eval_time = time.time()-capy_init_time
-    
-    file_object = open(os.getcwd() + '\\sims\\'+'check_parallel_execution2'+'.txt', 'a')
-    file_object.write("%s - Capytaine complete in %.1f s \n" % (id_folder,capy_eval_time))
-    file_object.close()
+        if simSoftware == 'OpenFAST':
+            HD_data,ED_data,hst_file,K_hst, draft = plat_config_openfast(xx,
+                                                                         currentTurbModel, 
+                                                                         filepath = filepath_template,
+                                                                         filepath_mod = mod_folder_name)   
+        elif simSoftware == 'QBlade':
+            sub_data = plat_config_qblade(xx, 
+                                          currentTurbModel, 
+                                          filepath = filepath_template,
+                                          filepath_mod = mod_folder_name)
+    
+        capy_eval_time = time.time()-capy_init_time
     
-    # Update paths
-    updatePaths(currentTurbModel,mod_folder_name)
+        file_object = open(os.getcwd() + '\\sims\\'+'check_parallel_execution2'+'.txt', 'a')
+        file_object.write("%s - Capytaine complete in %.1f s \n" % (id_folder,capy_eval_time))
+        file_object.close()
+    
+        # Update paths (and final time of simulation)
+        updatePaths(currentTurbModel,mod_folder_name,filepath_template)
         
-    # Change initial displacement, if needed ONLY OPENFAST
-    if simSoftware == 'OpenFAST':
-        if currentTurbModel['OPTIONS']['FixInitDisplacement']:
-         ED_data['PtfmSurge'] = currentTurbModel['OPTIONS']['InitDisplacement'][0]
-         ED_data['PtfmSway'] = currentTurbModel['OPTIONS']['InitDisplacement'][0]
-         ED_data['PtfmHeave'] = currentTurbModel['OPTIONS']['InitDisplacement'][0]
-         ED_data['PtfmRoll'] = currentTurbModel['OPTIONS']['InitDisplacement'][0]
-         ED_data['PtfmPitch'] = currentTurbModel['OPTIONS']['InitDisplacement'][0]
-         ED_data['PtfmYaw'] =  currentTurbModel['OPTIONS']['InitDisplacement'][0]
-         ED_data.write(mod_folder_name + '\\' + currentTurbModel['ELSMODFILENAME'])
-    
-    # Change final time of simulation
-    if currentTurbModel['OPTIONS']['TimeDomainSim']:
-      if simSoftware == 'OpenFAST':
-        fst_data = FASTInputFile(mod_folder_name+"\\"+currentTurbModel['FSTMODFILENAME'])
-        fst_data['TMax'] = currentTurbModel['TMAX']
-        fst_data.write(mod_folder_name+"\\"+currentTurbModel['FSTMODFILENAME'])
-      elif simSoftware == 'QBlade':
-        qb_data = QBladeInputFile(mod_folder_name+"\\"+currentTurbModel['SIMMODFILENAME'])
-        dt = qb_data['TIMESTEP']
-        qb_data['NUMTIMESTEPS'] = round(currentTurbModel['TMAX']/dt)
-        qb_data.write(mod_folder_name+"\\"+currentTurbModel['SIMMODFILENAME'])
-
-    # Calculate restoring matrix of mooring system
-    K0 = calc_mooring_restoring_matrix(xx,
-                                       currentTurbModel,
-                                       filepath_template=filepath_template,mapp_template=currentTurbModel['MAPFILENAME'],
-                                       filepath_mod=mod_folder_name,mapp_modfile=currentTurbModel['MAPMODFILENAME'])
+        # Change initial displacement, if needed ONLY OPENFAST
+        if simSoftware == 'OpenFAST':
+            if currentTurbModel['OPTIONS']['FixInitDisplacement']:
+             ED_data['PtfmSurge'] = currentTurbModel['OPTIONS']['InitDisplacement'][0]
+             ED_data['PtfmSway'] = currentTurbModel['OPTIONS']['InitDisplacement'][0]
+             ED_data['PtfmHeave'] = currentTurbModel['OPTIONS']['InitDisplacement'][0]
+             ED_data['PtfmRoll'] = currentTurbModel['OPTIONS']['InitDisplacement'][0]
+             ED_data['PtfmPitch'] = currentTurbModel['OPTIONS']['InitDisplacement'][0]
+             ED_data['PtfmYaw'] =  currentTurbModel['OPTIONS']['InitDisplacement'][0]
+             get_template_deck(currentTurbModel, filepath_template).write_input('ELSFILENAME', ED_data, mod_folder_name + '\\' + currentTurbModel['ELSMODFILENAME'])
+    
+        # Change final time of simulation (OpenFAST: set by "updatePaths")
+        if currentTurbModel['OPTIONS']['TimeDomainSim']:
+          if simSoftware == 'QBlade':
+            qb_data = QBladeInputFile(mod_folder_name+"\\"+currentTurbModel['SIMMODFILENAME'])
+            dt = qb_data['TIMESTEP']
+            qb_data['NUMTIMESTEPS'] = round(currentTurbModel['TMAX']/dt)
+            qb_data.write(mod_folder_name+"\\"+currentTurbModel['SIMMODFILENAME'])
+
+        ev = {'xx': xx, 'model': currentTurbModel, 'filepath_template': filepath_template,
+              'simSoftware': simSoftware, 'id_folder': id_folder, 'mod_folder_name': mod_folder_name,
+              'result_folder_name': result_folder_name, 'run_index': runIndex,
+              'outputsToPrint': outputsToPrint, 'eval_init_time': eval_init_time, 'dt': dt,
+              'f_max': -1, 'done': False}
+
+        return ev
+    except BaseException:
+        runIndex.update(id_folder, 'failed')
+        harvest_run(mod_folder_name, result_folder_name, patterns = [])
+        raise
+
+# Evaluation stage 2: calculates the restoring matrix of the mooring system (MAP++) and checks the surge constraint
+# if the constraint is not satisfied the evaluation is over: ev['done'] is True and ev['f_max'] is the penalty
+def eval_mooring_check(ev, penaltyValue = 9999.9):
+    
+    if ev['done']:
+        return ev
+    
+    xx = ev['xx']
+    currentTurbModel = ev['model']
+    id_folder = ev['id_folder']
+
+    # Calculate restoring matrix of mooring system, if not already calculated by the screening
+    K0 = ev.get('K0')
+    if K0 is None:
+        K0 = calc_mooring_restoring_matrix(xx,
+                                           currentTurbModel,
+                                           filepath_template=ev['filepath_template'],mapp_template=currentTurbModel['MAPFILENAME'],
+                                           filepath_mod=ev['mod_folder_name'],mapp_modfile=currentTurbModel['MAPMODFILENAME'])
     
     #print(K0)
 
@@ -170,13 +343,27 @@ def eval_Fobj(xx,\
             
             # If surge exceeds maximum, quit evaluation and return 
             if surge_excursion>currentTurbModel['CONSTRAINTS']['MaxSurgeExcursion']:
-                f_max = 1/penaltyValue
+                ev['f_max'] = 1/penaltyValue
+                ev['done'] = True
                 file_object = open(os.getcwd() + '\\sims\\'+'Pop_list'+'.txt', 'a') 
                 now = datetime.now()
                 current_time = now.strftime("%H:%M:%S")
                 file_object.write("%s - surge out of boundary - %.2f %.4f %.2f %s\n" % (current_time, xx[0], xx[1], surge_excursion,id_folder))
                 file_object.close()
-                return f_max            
+                return ev
+
+    return ev
+
+# Evaluation stage 3: runs the time domain simulation (OpenFAST or QBlade)
+def eval_solver_run(ev):
+    
+    if ev['done']:
+        return ev
+    
+    currentTurbModel = ev['model']
+    simSoftware = ev['simSoftware']
+    mod_folder_name = ev['mod_folder_name']
+    id_folder = ev['id_folder']
 
     if simSoftware == 'OpenFAST':
         if currentTurbModel['OPTIONS']['TimeDomainSim']:
@@ -184,10 +371,11 @@ def eval_Fobj(xx,\
          mainfilemod = mod_folder_name+'\\'+currentTurbModel['FSTMODFILENAME']
          new_mainfilemod='"'+mainfilemod+'"'
 
-         # Run openFAST
-         openfast_init_time = time.time()
-         proc=subprocess.Popen(FASTexe+" "+ new_mainfilemod,stdout=subprocess.PIPE,stderr=subprocess.STDOUT,shell=True)
-         stdout,stderr = proc.communicate()
+         # Run openFAST (when a slot is free, if the runs are limited by the evaluation scheduler)
+         with solver_slot():
+             openfast_init_time = time.time()
+             proc=subprocess.Popen(FASTexe+" "+ new_mainfilemod,stdout=subprocess.PIPE,stderr=subprocess.STDOUT,shell=True)
+             stdout,stderr = proc.communicate()
 
          # Print OpenFAST output
          print(stdout)
@@ -200,13 +388,131 @@ def eval_Fobj(xx,\
          file_object.write("%s - OpenFAST and costs complete in %.1f s \n" % (id_folder,openfast_eval_time))
          file_object.close()
 
-         output_filename = r''+mod_folder_name+'\\'+currentTurbModel['FSTMODFILENAME'][:-4]+'.outb'
+         ev['output_filename'] = r''+mod_folder_name+'\\'+currentTurbModel['FSTMODFILENAME'][:-4]+'.outb'
+
+    if simSoftware == 'QBlade':
+        
+        # Define Output Channels
+        outputChannels = [b"X_g COG Pos. [m]",b"Y_g COG Pos. [m]",b"Z_g COG Pos. [m]",b"NP Roll X_l [deg]",b"NP Pitch Y_l [deg]",b"NP Yaw Z_l [deg]",b"Thrust [N]"]
+
+        # Define simulation file for QBlade
+        simfilemod = mod_folder_name+'\\'+currentTurbModel['SIMMODFILENAME']
+        sim_data = QBladeInputFile(simfilemod)
+        timeSteps = sim_data["NUMTIMESTEPS"]
+        p = str(Path(simfilemod).resolve())
+        currentSimFilePath = str.encode(p)
+        # filepath_outputFileName = os.getcwd()
+        outputFileName = 'outputSim.outq'
+        dst_outputFileName = mod_folder_name+"\\"+outputFileName
+        # Run QBlade
+        with solver_slot():
+            qblade_init_time = time.time()
+            simulation = QBlade.QBladeSim()
+            simulation.runSimulation(0,32,currentSimFilePath,b'final_project.qpr',dst_outputFileName,timeSteps,outputChannels)
+
+        qblade_eval_time = time.time()-qblade_init_time
+        
+        # Write evaluation
+        file_object = open(os.getcwd() + '\\sims\\'+'check_parallel_execution4'+'.txt', 'a')
+        file_object.write("%s - QBlade and costs complete in %.1f s \n" % (id_folder,qblade_eval_time))
+        file_object.close()
+
+        ev['output_filename'] = dst_outputFileName
+
+    # Track the execution in the index of the runs
+    if os.path.isfile(ev.get('output_filename', '')):
+        ev['run_index'].update(id_folder, 'executed', output_file = ev['output_filename'])
+    else:
+        ev['run_index'].update(id_folder, 'failed')
+
+    return ev
+
+# Evaluation stage 4: reads and post-processes the simulation outputs (eval_outputs), then harvests the outputs of the
+# run folder and closes the run in the index (eval_finish), returns the specific performance f_max
+def eval_postprocess(ev, evalTime = 0, penaltyValue = 9999.9):
+    
+    f_max = None
+    try:
+        f_max = eval_outputs(ev, evalTime = evalTime, penaltyValue = penaltyValue)
+    finally:
+        eval_finish(ev, f_max)
+    
+    return f_max
+
+# Path of the file "run_file" of the run folder once harvested in the result folder (the same file if the run is executed in "sims")
+def result_output_file(ev, run_file):
+    
+    return os.path.join(ev['result_folder_name'], os.path.relpath(run_file, ev['mod_folder_name']))
+
+# Runs the evaluation stage "stage" on "ev": if the stage raises an exception, the run is closed as failed (eval_finish)
+# before the exception is raised again, so that no scratch folder or run left 'created' in the index remains
+def eval_guarded(stage, ev, **kwargs):
+    
+    try:
+        return stage(ev, **kwargs)
+    except BaseException:
+        eval_finish(ev, None)
+        raise
+
+# Moves the declared outputs (option 'RunHarvestPatterns') of a scratch run folder to the result folder, removes the
+# scratch folder and updates the index of the runs; evaluations ended before the creation of the run folder are skipped
+def eval_finish(ev, f_max = None):
+    
+    if 'run_index' not in ev:
+        return
+    
+    harvested = harvest_run(ev['mod_folder_name'], ev['result_folder_name'],
+                            patterns = ev['model'].getOption('RunHarvestPatterns', HARVEST_PATTERNS))
+    
+    output_file = None
+    if len(harvested) > 0 and 'output_filename' in ev:
+        if result_output_file(ev, ev['output_filename']) in harvested:
+            output_file = result_output_file(ev, ev['output_filename'])
+    
+    completed = f_max is not None and not isinstance(f_max, FailedEvaluation)
+    ev['run_index'].update(ev['id_folder'], 'finished' if completed else 'failed', output_file = output_file, f_max = f_max)
+
+# Reads the simulation outputs, performs the frequency domain analysis, writes "Pop_list.txt"
+# and checks the heeling constraint, returns the specific performance f_max
+def eval_outputs(ev, evalTime = 0, penaltyValue = 9999.9):
+    
+    if ev['done']:
+        return ev['f_max']
+    
+    xx = ev['xx']
+    model = ev['model']
+    currentTurbModel = ev['model']
+    simSoftware = ev['simSoftware']
+    mod_folder_name = ev['mod_folder_name']
+    id_folder = ev['id_folder']
+    outputsToPrint = ev['outputsToPrint']
+    filepath_template = ev['filepath_template']
+    f_max = ev['f_max']
+    
+    # Plot outputs, if needed
+    plot_t_h_flag = False
+    plot_t_h_moor_flag = False
+    
+    # Figures drawn at once in the run folder, or queued (option 'PlotQueueFolder', see plotservice.py) and drawn afterwards
+    # in the result folder
+    plot_queue = get_plot_queue(currentTurbModel)
+    plot_folder = ev['result_folder_name'] if plot_queue is not None else mod_folder_name
+
+    if simSoftware == 'OpenFAST':
+        if currentTurbModel['OPTIONS']['TimeDomainSim']:
+         output_filename = ev['output_filename']
+         
+         # Only the channels used below are decoded from the binary file (all of them if the time histories are plotted)
+         if plot_t_h_flag:
+             outputChannels = None
+         else:
+             outputChannels = ['PtfmYaw_[deg]','PtfmPitch_[deg]','PtfmRoll_[deg]','PtfmSurge_[m]','RotThrust_[kN]']
 
          ## Plot output
          file_object = open(os.getcwd() + '\\sims\\'+'check_parallel_execution5'+'.txt', 'a')
          file_object.write("%s - output filename %s \n" % (id_folder,output_filename))
          file_object.close()
-         outdata=FASTOutputFile(output_filename).toDataFrame()         
+         outdata=FASTOutputFile(output_filename, channels = outputChannels).toDataFrame()
 
         if currentTurbModel['OPTIONS']['EvalCosts']:
          # Get Costs to print
@@ -218,18 +524,11 @@ def eval_Fobj(xx,\
          if currentTurbModel['OPTIONS']['FFTAnalysis']:
             if outdata.loc[:,['Time_[s]']].to_numpy()[-1,0] == model['TMAX']:
                
-                # Frequency domain analysis
-                freqs_Yaw,Pxx1_Yaw,fft1_Yaw,fft1_normalized_Yaw = freq_domain_data(outdata.loc[outdata['Time_[s]'] > evalTime,['PtfmYaw_[deg]']].to_numpy()[:,0],outdata.loc[outdata['Time_[s]'] > evalTime,['Time_[s]']].to_numpy()[:,0], None,folder_path=mod_folder_name,plot_flag=True,plot_name = "Yaw")
-                freq_PSDpeak_Yaw = freqs_Yaw[np.argmax(Pxx1_Yaw)]
-                FFTpeak_Yaw = max(fft1_normalized_Yaw)
-
-                freqs_Pitch,Pxx1_Pitch,fft1_Pitch,fft1_normalized_Pitch = freq_domain_data(outdata.loc[outdata['Time_[s]'] > evalTime,['PtfmPitch_[deg]']].to_numpy()[:,0],outdata.loc[outdata['Time_[s]'] > evalTime,['Time_[s]']].to_numpy()[:,0], None,folder_path=mod_folder_name,plot_flag=True,plot_name = "Pitch")
-                freq_PSDpeak_Pitch = freqs_Pitch[np.argmax(Pxx1_Pitch)]
-                FFTpeak_Pitch = max(fft1_normalized_Pitch)
-
-                freqs_Roll,Pxx1_Roll,fft1_Roll,fft1_normalized_Roll = freq_domain_data(outdata.loc[outdata['Time_[s]'] > evalTime,['PtfmRoll_[deg]']].to_numpy()[:,0],outdata.loc[outdata['Time_[s]'] > evalTime,['Time_[s]']].to_numpy()[:,0], None,folder_path=mod_folder_name,plot_flag=True,plot_name = "Roll")
-                freq_PSDpeak_Roll = freqs_Roll[np.argmax(Pxx1_Roll)]
-                FFTpeak_Roll = max(fft1_normalized_Roll)
+                # Frequency domain analysis of yaw, pitch and roll (one batched FFT), plots only if 'PlotSpectra'
+                spectra = eval_spectra(outdata, 'Time_[s]', ['PtfmYaw_[deg]','PtfmPitch_[deg]','PtfmRoll_[deg]'], evalTime,
+                                       currentTurbModel, mod_folder_name, plot_folder = plot_folder, plot_queue = plot_queue)
+                freq_PSDpeak_Yaw, freq_PSDpeak_Pitch, freq_PSDpeak_Roll = spectra['freq_PSDpeak']
+                FFTpeak_Yaw, FFTpeak_Pitch, FFTpeak_Roll = spectra['FFTpeak']
 
                 if math.isinf(freq_PSDpeak_Roll):
                     freq_PSDpeak_Roll = 0
@@ -248,7 +547,7 @@ def eval_Fobj(xx,\
                 # Objective function evaluation
                 f_max = FFTpeak_Yaw
             else:
-                f_max = 1/penaltyValue
+                f_max = FailedEvaluation(1/penaltyValue)
                 file_object = open(os.getcwd() + '\\sims\\'+'Pop_list'+'.txt', 'a') 
                 now = datetime.now()
                 current_time = now.strftime("%H:%M:%S")
@@ -258,24 +557,8 @@ def eval_Fobj(xx,\
         
     if simSoftware == 'QBlade':
         
-        # Define Output Channels
-        outputChannels = [b"X_g COG Pos. [m]",b"Y_g COG Pos. [m]",b"Z_g COG Pos. [m]",b"NP Roll X_l [deg]",b"NP Pitch Y_l [deg]",b"NP Yaw Z_l [deg]",b"Thrust [N]"]
-
-        # Define simulation file for QBlade
-        simfilemod = mod_folder_name+'\\'+currentTurbModel['SIMMODFILENAME']
-        sim_data = QBladeInputFile(simfilemod)
-        timeSteps = sim_data["NUMTIMESTEPS"]
-        p = str(Path(simfilemod).resolve())
-        currentSimFilePath = str.encode(p)
-        # filepath_outputFileName = os.getcwd()
-        outputFileName = 'outputSim.outq'
-        dst_outputFileName = mod_folder_name+"\\"+outputFileName
-        # Run QBlade
-        qblade_init_time = time.time()
-        simulation = QBlade.QBladeSim()
-        simulation.runSimulation(0,32,currentSimFilePath,b'final_project.qpr',dst_outputFileName,timeSteps,outputChannels)
-
-        qblade_eval_time = time.time()-qblade_init_time
+        dt = ev['dt']
+        dst_outputFileName = ev['output_filename']
 
         # Get Costs to print
         if currentTurbModel['OPTIONS']['EvalCosts']: 
@@ -283,38 +566,28 @@ def eval_Fobj(xx,\
          for i in costs.keys():
             outputsToPrint[i] = costs[i]
         
-        # Write evaluation
-        file_object = open(os.getcwd() + '\\sims\\'+'check_parallel_execution4'+'.txt', 'a')
-        file_object.write("%s - QBlade and costs complete in %.1f s \n" % (id_folder,qblade_eval_time))
-        file_object.close()
-        
         ## Plot output
         file_object = open(os.getcwd() + '\\sims\\'+'check_parallel_execution5'+'.txt', 'a')
         file_object.write("%s - output filename %s \n" % (id_folder,dst_outputFileName))
         file_object.close()
-        outdata=QBladeOutputFile(dst_outputFileName).toDataFrame()
+        # Only the platform DOFs and the thrust are read (all the channels if the time histories are plotted)
+        if plot_t_h_flag:
+            outputChannels = None
+        else:
+            outputChannels = ['X_g COG Pos. [m]','Y_g COG Pos. [m]','Z_g COG Pos. [m]','NP Roll X_l [deg]','NP Pitch Y_l [deg]','NP Yaw Z_l [deg]','Thrust [N]']
+        outdata=QBladeOutputFile(dst_outputFileName, channels = outputChannels).toDataFrame()
         
         if outdata.loc[:,['Time [s]']].to_numpy()[-1,0] == (model['TMAX']-dt):
-            # Frequency domain analysis
-            freqs_Yaw,Pxx1_Yaw,fft1_Yaw,fft1_normalized_Yaw = freq_domain_data(outdata.loc[outdata['Time [s]'] > evalTime,['NP Yaw Z_l [deg]']].to_numpy()[:,0],outdata.loc[outdata['Time [s]'] > evalTime,['Time [s]']].to_numpy()[:,0], None,folder_path=mod_folder_name,plot_flag=True,plot_name = "Yaw")
-            
-            freq_PSDpeak_Yaw = freqs_Yaw[np.argmax(Pxx1_Yaw)]
-            FFTpeak_Yaw = max(fft1_normalized_Yaw)
-            
-            freqs_Pitch,Pxx1_Pitch,fft1_Pitch,fft1_normalized_Pitch = freq_domain_data(outdata.loc[outdata['Time [s]'] > evalTime,['NP Pitch Y_l [deg]']].to_numpy()[:,0],outdata.loc[outdata['Time [s]'] > evalTime,['Time [s]']].to_numpy()[:,0], None,folder_path=mod_folder_name,plot_flag=True,plot_name = "Pitch")
-            
-            freq_PSDpeak_Pitch = freqs_Pitch[np.argmax(Pxx1_Pitch)]
-            FFTpeak_Pitch = max(fft1_normalized_Pitch)
-    
-            freqs_Roll,Pxx1_Roll,fft1_Roll,fft1_normalized_Roll = freq_domain_data(outdata.loc[outdata['Time [s]'] > evalTime,['NP Roll X_l [deg]']].to_numpy()[:,0],outdata.loc[outdata['Time [s]'] > evalTime,['Time [s]']].to_numpy()[:,0], None,folder_path=mod_folder_name,plot_flag=True,plot_name = "Roll")
-            
-            freq_PSDpeak_Roll = freqs_Roll[np.argmax(Pxx1_Roll)]
-            FFTpeak_Roll = max(fft1_normalized_Roll)    
+            # Frequency domain analysis of yaw, pitch and roll (one batched FFT), plots only if 'PlotSpectra'
+            spectra = eval_spectra(outdata, 'Time [s]', ['NP Yaw Z_l [deg]','NP Pitch Y_l [deg]','NP Roll X_l [deg]'], evalTime,
+                                   currentTurbModel, mod_folder_name, plot_folder = plot_folder, plot_queue = plot_queue)
+            freq_PSDpeak_Yaw, freq_PSDpeak_Pitch, freq_PSDpeak_Roll = spectra['freq_PSDpeak']
+            FFTpeak_Yaw, FFTpeak_Pitch, FFTpeak_Roll = spectra['FFTpeak']
             
             # Function evaluation
             f_max = FFTpeak_Yaw
         else:
-            f_max = 1/penaltyValue
+            f_max = FailedEvaluation(1/penaltyValue)
             file_object = open(os.getcwd() + '\\sims\\'+'Pop_list'+'.txt', 'a') 
             now = datetime.now()
             current_time = now.strftime("%H:%M:%S")
@@ -322,25 +595,11 @@ def eval_Fobj(xx,\
             file_object.close()
             return f_max
 
-    final_eval_time = time.time()-eval_init_time
+    final_eval_time = time.time()-ev['eval_init_time']
 
 
-    # Count succesful executions
-    totalDir = 0
-    folders_path = os.getcwd() + '\\sims\\'
-    count = 0
-    
-    for base, dirs, files in os.walk(folders_path):
-        # print('Searching in : ',base)
-        for directories in dirs:
-            totalDir += 1
-        for x in files:          
-            if x.endswith(".outb"):
-                count = count + 1               
-            elif x.endswith(".outq"):
-                count = count + 1
-
-    totalExec = count
+    # Count succesful executions (index of the runs)
+    totalEval, totalExec = ev['run_index'].counts()
 
     file_object = open(os.getcwd() + '\\sims\\'+'check_parallel_execution6'+'.txt', 'a')
     file_object.write("%s successful execution of individual - number of .outb/.outq files: %d - total evaluation elapsed time %.2f s - f_max: %.4f \n" % (id_folder,totalExec,final_eval_time,f_max))
@@ -405,15 +664,15 @@ def eval_Fobj(xx,\
     file_object.close()
     
     # Plot outputs, if needed
-    plot_t_h_flag = False
-    plot_t_h_moor_flag = False
-    
+    # queued figures reference the output files harvested in the result folder
     if plot_t_h_flag:
-        plot_func(simSoftware,evalTime,outdata,folder_path=mod_folder_name)
+        plot_func(simSoftware,evalTime,outdata,folder_path=plot_folder,plot_queue=plot_queue,
+                  output_file=result_output_file(ev, ev['output_filename']))
     if plot_t_h_moor_flag & (simSoftware == 'OpenFAST'):
         output_moor_filename = r''+mod_folder_name+'\\'+currentTurbModel['FSTMODFILENAME'][:-4]+'.MD.out'
         outdata_moor = FASTOutputFile(output_moor_filename).toDataFrame()
-        plot_func_moor(simSoftware,evalTime,outdata_moor,folder_path=mod_folder_name)
+        plot_func_moor(simSoftware,evalTime,outdata_moor,folder_path=plot_folder,plot_queue=plot_queue,
+                       output_file=result_output_file(ev, output_moor_filename))
 
     # Check heeling constraint, if needed    
     for i in currentTurbModel['CONSTRAINTS'].keys():
@@ -426,12 +685,39 @@ def eval_Fobj(xx,\
 
 # Helper Functions
 
-def createModFolder(simSoftware,name):
+# Frequency domain analysis of the "channels" of the outputs after "evalTime", all the channels by one batched FFT
+# (see timetofreqdomain.spectral_peaks); the PSD/FFT plots are saved in "folder_path" only if the option 'PlotSpectra' is set
+# with the option 'SpectraMethod' ('welch' or 'multitaper') the PSD peaks are taken from the PSD on the fixed frequency grid
+# (timetofreqdomain.psd_fixed_grid), saved in "folder_path" as "spectra.npz" to be stacked with the spectra of the other runs
+# the plots are saved in "plot_folder" ("folder_path" by default) or queued in "plot_queue" (plotservice.PlotQueue)
+def eval_spectra(outdata, time_name, channels, evalTime, model, folder_path, plot_names = ['Yaw','Pitch','Roll'],
+                 plot_folder = None, plot_queue = None):
     
-    if simSoftware == 'OpenFAST':
-        mod_folder_name = os.getcwd() + f"\\sims\\mod_input_files_{name}"
-    elif simSoftware == 'QBlade':
-        mod_folder_name = os.getcwd() + f"\\sims\\mod_input_files_QBlade_{name}"
+    time_data = outdata[time_name].to_numpy()
+    mask = time_data > evalTime
+    data = outdata[channels].to_numpy()[mask]
+    spectra = spectral_peaks(data, time_data[mask], padded_length = model.getOption('SpectraPaddedLength'))
+    
+    method = model.getOption('SpectraMethod')
+    if method is not None:
+        freq_grid = fixed_freq_grid(**model.getOption('SpectraGrid', {}))
+        psd_grid = psd_fixed_grid(data, time_data[mask], freq_grid = freq_grid, method = method,
+                                  **model.getOption('SpectraSettings', {}))
+        spectra['freq_PSDpeak'], spectra['PSDpeak'] = track_peaks(freq_grid, psd_grid, band = model.getOption('SpectraBand'))
+        spectra['freq_grid'], spectra['psd_grid'] = freq_grid, psd_grid
+        np.savez(folder_path + '\\spectra.npz', freq_grid = freq_grid, psd = psd_grid, channels = np.array(channels))
+    
+    if model.getOption('PlotSpectra', False):
+        for kk, plot_name in enumerate(plot_names):
+            plot_freq_domain(spectra['freqs'], spectra['power_spectrum'][:,kk], spectra['fourier_transform_norm'][:,kk],
+                             folder_path = plot_folder if plot_folder is not None else folder_path, plot_name = plot_name,
+                             plot_queue = plot_queue)
+    
+    return spectra
+
+def createModFolder(simSoftware,name,root_folder = os.getcwd() + '\\sims'):
+    
+    mod_folder_name = run_folder_name(simSoftware, name, root_folder)
             
     try:
         os.mkdir(mod_folder_name)
@@ -493,149 +779,22 @@ def createModFiles(model,filepath_template,mod_folder_name):
         except:
             print('No "Mapp" filename provided...')
        
-    if model['SIMSOFTWARE'] == 'OpenFAST':
-        
-        # Copy .fst template file to new folder
-        src_dir=filepath_template+"\\"+model['FSTFILENAME']
-        dst_dir=mod_folder_name+"\\"+model['FSTMODFILENAME']
-        shutil.copy(src_dir,dst_dir)
-        
-        try:
-            # Copy blades template to mod folders
-            src_dir=filepath_template+"\\"+model['BLDFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['BLDFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No blades file was found and copied...')
-        
-        try:    
-            # Copy tower template to mod folders
-            src_dir=filepath_template+"\\"+model['TWRFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['TWRFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No tower file was found and copied')
-        
-        try:
-            # Copy aerodyn template to mod folders
-            src_dir=filepath_template+"\\"+model['ARDFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['ARDFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No "Aerodyn" file was found and copied')
-        
-        try:
-            # Copy aerodyn template to mod folders
-            src_dir=filepath_template+"\\"+model['IFWFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['IFWFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No "Inflow Module" file was found and copied')
-            
-        try:
-            # Copy aerodyn folder to mod folders
-            src_dir=filepath_template+model['AERFOLDERNAME']
-            dst_dir=mod_folder_name+model['AERFOLDERNAME']
-            shutil.copytree(src_dir,dst_dir)
-        except:
-            print('No "Aerodyn" folder was found and copied')
-        
-        try:
-            # Copy servodyn template to mod folders
-            src_dir=filepath_template+"\\"+model['SRVFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['SRVFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No "Servodyn" file was found and copied')
-        
-        try:
-            # Copy servodyn structural template to mod folders
-            src_dir=filepath_template+"\\"+model['STCFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['STCFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No "Servodyn" structural file was found and copied')
-            
-        try:
-            # Copy force template to mod folders
-            src_dir=filepath_template+"\\"+model['FRCFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['FRCFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No prescribed force for "Servodyn" structural file was found and copied')
-
-        try:
-            # Copy moment template to mod folders
-            src_dir=filepath_template+"\\"+model['MOMFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['MOMFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No prescribed moment for "Servodyn" structural file was found and copied')
-        
-        try:
-            # Copy servodyn template to mod folders
-            src_dir=filepath_template+"\\"+model['SRVFOLDERNAME']
-            dst_dir=mod_folder_name+"\\"+model['SRVFOLDERNAME']
-            shutil.copytree(src_dir,dst_dir)
-        except:
-            print('No "Servodyn" folder was found and copied')
-            
-    elif model['SIMSOFTWARE'] == 'QBlade':
-        
-        # Copy FST template to mod folders
-        src_dir=filepath_template+"\\"+model['SIMFILENAME']
-        dst_dir=mod_folder_name+"\\"+model['SIMMODFILENAME']
-        shutil.copy(src_dir,dst_dir)
-        
-        try:
-            # Copy blades template to mod folders
-            src_dir=filepath_template+"\\"+model['BLDFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['BLDFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No blades file was found and copied...')
-        
-        try:    
-            # Copy tower template to mod folders
-            src_dir=filepath_template+"\\"+model['TWRFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['TWRFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No tower file was found and copied')
-        
-        try:
-            # Copy turbine template to mod folders
-            src_dir=filepath_template+"\\"+model['TRBFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['TRBMODFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No turbine file was found and copied')
-            
-        try:
-            # Copy main template to mod folders
-            src_dir=filepath_template+"\\"+model['MAINFILENAME']
-            dst_dir=mod_folder_name+"\\"+model['MAINMODFILENAME']
-            shutil.copy(src_dir,dst_dir)
-        except:
-            print('No main structure file was found and copied')   
-            
-        try:
-            # Copy aerodyn folder to mod folders
-            src_dir=filepath_template+model['AERFOLDERNAME']
-            dst_dir=mod_folder_name+model['AERFOLDERNAME']
-            shutil.copytree(src_dir,dst_dir)
-        except:
-            print('No aerodyn folder was found and copied')
+    # Share the template files and folders (links, see rundir.py) with the new folder, the input files modified by the design
+    # variables are written from the parsed templates (see templatedeck.py); hydrodynamic data are shared by "plat_config_*"
+    deck = get_template_deck(model, filepath_template)
+    deck.share_assets(mod_folder_name, exclude_folders = ['HYDFOLDERNAME'])
     
     newModel = model
     
     return newModel
 
-def updatePaths(model,mod_folder_name):
+def updatePaths(model,mod_folder_name,filepath_template = os.getcwd() + '\\sims\\template_input_files'):
     
     if model['SIMSOFTWARE'] == 'OpenFAST':
 
-        fst_data = FASTInputFile(mod_folder_name+"\\"+model['FSTMODFILENAME'])
+        # .fst file written once from the parsed template, with the paths and the final time of simulation
+        deck = get_template_deck(model, filepath_template)
+        fst_data = deck.input('FSTFILENAME')
         try:
             fst_data['EDFile'] = model['ELSMODFILENAME']
         except:
@@ -662,7 +821,10 @@ def updatePaths(model,mod_folder_name):
             print('No "Inflow Module" file, going to deactivate "Inflow Module" in OpenFAST simulation...')
             fst_data['CompInflow'] = 0
         
-        fst_data.write(mod_folder_name+"\\"+model['FSTMODFILENAME'])
+        if model['OPTIONS']['TimeDomainSim']:
+            fst_data['TMax'] = model['TMAX']
+        
+        deck.write_input('FSTFILENAME', fst_data, mod_folder_name+"\\"+model['FSTMODFILENAME'])
         
     elif model['SIMSOFTWARE'] =='QBlade':
 
@@ -743,7 +905,7 @@ def get_costs(xx,model,filepath):
     # To get "Depth" directly from OpenFast or QBlade files
     if model['SIMSOFTWARE'] == 'OpenFAST':
         HD_file=filepath +"\\"+ model['HYDFILENAME']
-        HD_Data = FASTInputFile(HD_file)
+        HD_Data = read_fast_input(HD_file, model.getOption('InputCacheFolder'))
         WtrDpth=HD_Data['WtrDpth']
     elif model['SIMSOFTWARE'] == 'QBlade':
         sub_file = filepath +"\\"+ model['SUBFILENAME']
@@ -799,7 +961,11 @@ if __name__ == '__main__':
   templateModel = TurbModel(r'.\sims\template_input_files\_DTU10MW3Spar_modeldefinition.dat')
   templateFolder = r'.\sims\template_input_files'
   templateModel.addKeyVal('OPTIONS',{'TimeDomainSim':True,'FFTAnalysis':True,'EvalCosts':True,'Costs':['MoorCosts','BracesCosts'],\
-                                     'FixInitDisplacement':False,'InitDisplacement':[0,0,0,0,0,0]})    
+                                     'FixInitDisplacement':False,'InitDisplacement':[0,0,0,0,0,0],\
+                                     'HydroCacheFolder':os.getcwd() + '\\sims\\hydro_cache','HydroCacheMaxSizeMB':2000,\
+                                     'InputCacheFolder':os.getcwd() + '\\sims\\input_cache'})    
+  # To interpolate hydrodynamics instead of solving BEM problems, build the surrogate once (offline) and add 'HydroSurrogateFile' to OPTIONS:
+  # build_triple_spar_surrogate(templateModel, np.arange(20.0,40.1,2.0), os.getcwd() + '\\sims\\hydro_surrogate.nc', os.getcwd() + '\\sims\\hydro_surrogate')
   templateModel.addKeyVal('DESVARIABLES',{'SparDistance': 32.0,'LineLengthFactor' : 1.05676})
   templateModel.addKeyVal('FIXVARIABLES',{'LineNumber' : 3,
                                           'AnchorRadius' : 600.0,
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:05:31 2026
+
+#  Compiled template deck (FASTInputDeck): the template input files of the model are parsed once (per process) and the
+#  files of each individual are rendered from memory:
+#  - the input files modified by the design variables (".fst", ElastoDyn, HydroDyn, MoorDyn) are copies of the parsed
+#    templates, written in the folder of the individual only if they differ from the template (otherwise they are linked)
+#  - the other files and folders of the model (blades, tower, AeroDyn, ServoDyn, airfoils, hydrodynamic data, ...) are
+#    shared with the template folder by links (see rundir.py, options 'RunShareMethods' and 'RunSymlinkFolders')
+#  Shared files are the template files themselves: they are removed, not overwritten, before writing.
+#  The parsed templates are stored in "fst_vt" as in FASTInputDeck, but the files are the ones named in the model (labels
+#  "...FILENAME"), not the ones referenced by the ".fst", and the deck is not written with FASTInputDeck.write, which
+#  renames all the files of the deck.
+#  Contains:
+#  - class: TemplateDeck
+#  - functions: get_template_deck
+
+@author: Guido Lazzerini
+
+"""
+import os
+import pickle
+import shutil
+
+from fastinputcache import read_fast_input
+from pyFAST.input_output.fast_input_deck import FASTInputDeck
+from rundir import SHARE_METHODS, share_file, share_folder
+
+# Input files rendered from memory for each individual (template label: label of the modified file)
+DECK_INPUT_LABELS = {'OpenFAST': {'FSTFILENAME': 'FSTMODFILENAME', 'ELSFILENAME': 'ELSMODFILENAME',
+                                  'HYDFILENAME': 'HYDMODFILENAME', 'MRDFILENAME': 'MRDMODFILENAME'},
+                     'QBlade': {}}
+
+# Key in "fst_vt" and short key (FASTInputDeck) of the input files rendered from memory
+DECK_INPUT_KEYS = {'FSTFILENAME': ('Fst', 'Fst'), 'ELSFILENAME': ('ElastoDyn', 'ED'),
+                   'HYDFILENAME': ('HydroDyn', 'HD'), 'MRDFILENAME': ('MoorDyn', 'MD')}
+
+# Files modified in place by the simulation software specific code (always copied) and files not used by the simulation
+DECK_COPIED_LABELS = {'OpenFAST': [], 'QBlade': ['SIMFILENAME', 'TRBFILENAME', 'MAINFILENAME']}
+DECK_EXCLUDED_LABELS = ['MAPFILENAME', 'SUBFILENAME']
+
+# Decks of this process, the key is the template folder with the file names and modification times of the templates
+TEMPLATE_DECKS = {}
+
+# Template files and folders of the model: (label, name) of the entries ending with "FILENAME"/"FOLDERNAME"
+def _template_entries(model, suffix):
+
+    return [(d['label'], d['value']) for d in model.data if not d['isComment'] and d['label'].endswith(suffix)
+            and not d['label'].endswith('MOD' + suffix)]
+
+class TemplateDeck(FASTInputDeck):
+
+    # model (TurbModel) : model with the names of the template files
+    # filepath_template (string) : template folder
+    def __init__(self, model, filepath_template):
+
+        self.filepath_template = filepath_template
+        self.cache_folder = model.getOption('InputCacheFolder')
+        self.simSoftware = model['SIMSOFTWARE']
+        self.files = {label: name for label, name in _template_entries(model, 'FILENAME') if label not in DECK_EXCLUDED_LABELS}
+        self.folders = dict(_template_entries(model, 'FOLDERNAME'))
+        self.input_labels = DECK_INPUT_LABELS.get(self.simSoftware, {})
+        self.share_methods = model.getOption('RunShareMethods', SHARE_METHODS)
+        self.symlink_folders = model.getOption('RunSymlinkFolders', True)
+
+        FASTInputDeck.__init__(self, readlist=[DECK_INPUT_KEYS[label][1] for label in self.input_labels])
+        if 'FSTFILENAME' in self.files:
+            self.filename = self.template_file('FSTFILENAME')
+
+        # parsed templates in "fst_vt", pickled (a copy is returned by "input") and their content as written by pyFAST
+        self.inputs = {}
+        self.strings = {}
+        for label in self.input_labels:
+            if label in self.files and os.path.isfile(self.template_file(label)):
+                key, shortkey = DECK_INPUT_KEYS[label]
+                self.fst_vt[key] = self._read(self.files[label], shortkey)
+                self.inputs[label] = pickle.dumps(self.fst_vt[key], protocol=pickle.HIGHEST_PROTOCOL)
+                self.strings[label] = self.fst_vt[key].toString()
+        self.version = 'OF2' if self.fst_vt['Fst'] is not None else ''
+        self.fst = self.fst_vt['Fst']
+        self.ED = self.fst_vt['ElastoDyn']
+
+    # Template file "relfilepath" of the template folder, from the parse cache (see fastinputcache.py)
+    def _read(self, relfilepath, shortkey):
+
+        fullpath = self.filepath_template + "\\" + relfilepath
+        data = read_fast_input(fullpath, self.cache_folder)
+        self.inputfiles[shortkey] = fullpath
+
+        return data
+
+    def template_file(self, label):
+        return self.filepath_template + "\\" + self.files[label]
+
+    # Copy of the parsed template file "label" (e.g. 'HYDFILENAME'), to be modified and written by "write_input"
+    def input(self, label):
+        return pickle.loads(self.inputs[label])
+
+    # Write the input file "label" as "dst_file" only if it differs from the template, otherwise the template is shared
+    # returns True if the file was written
+    def write_input(self, label, data, dst_file):
+
+        content = data.toString()
+        if content == self.strings.get(label):
+            share_file(self.template_file(label), dst_file, self.share_methods)
+            return False
+
+        # the file may be a link to the template
+        if os.path.lexists(dst_file):
+            os.remove(dst_file)
+        data.write(dst_file)
+
+        return True
+
+    # Share the template folder "label" (e.g. 'HYDFOLDERNAME') in "mod_folder_name"
+    def share_folder(self, label, mod_folder_name):
+        share_folder(self.filepath_template + self.folders[label], mod_folder_name + self.folders[label],
+                     self.share_methods, self.symlink_folders)
+
+    # Share the template files and folders in "mod_folder_name", except the input files rendered by the deck
+    # and the folders in "exclude_folders" (e.g. hydrodynamic data shared only if the platform is not modified)
+    def share_assets(self, mod_folder_name, exclude_folders=[]):
+
+        for label, name in self.files.items():
+            if label in self.input_labels:
+                continue
+            try:
+                if label in DECK_COPIED_LABELS.get(self.simSoftware, []):
+                    shutil.copy(self.template_file(label), mod_folder_name + "\\" + name)
+                else:
+                    share_file(self.template_file(label), mod_folder_name + "\\" + name, self.share_methods)
+            except OSError:
+                print('No %s file was found and shared' % label)
+
+        for label in self.folders:
+            if label in exclude_folders:
+                continue
+            if os.path.isdir(self.filepath_template + self.folders[label]):
+                self.share_folder(label, mod_folder_name)
+            else:
+                print('No %s folder was found and shared' % label)
+
+# Deck of the template files of "model" in "filepath_template", compiled once per process (again if the templates change)
+def get_template_deck(model, filepath_template):
+
+    entries = _template_entries(model, 'FILENAME') + _template_entries(model, 'FOLDERNAME')
+    mtimes = []
+    for label in DECK_INPUT_LABELS.get(model['SIMSOFTWARE'], {}):
+        template_file = filepath_template + "\\" + str(dict(entries).get(label))
+        mtimes.append(os.path.getmtime(template_file) if os.path.isfile(template_file) else None)
+    key = (os.path.abspath(filepath_template), model['SIMSOFTWARE'], tuple(entries), tuple(mtimes),
+           tuple(model.getOption('RunShareMethods', SHARE_METHODS)), model.getOption('RunSymlinkFolders', True))
+
+    if key not in TEMPLATE_DECKS:
+        TEMPLATE_DECKS[key] = TemplateDeck(model, filepath_template)
+
+    return TEMPLATE_DECKS[key]
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:20:41 2026
+
+#  Tests of the columnar archive of the outputs of the runs (postproc_archive.py)
+
+@author: Guido Lazzerini
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pyFAST.input_output.fast_output_file import writeDataFrame
+from postproc_archive import (archive_folder, find_archive_run, list_archive_runs, read_archive_channels,
+                              read_archive_chunk_stats, read_archive_stats, read_output_channels)
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.sims_folder = tempfile.mkdtemp()
+        self.archive_file = os.path.join(self.sims_folder, 'outputs_archive.h5')
+        time = np.arange(0, 100, 0.1)
+        self.outdata = pd.DataFrame({'Time_[s]': time, 'PtfmYaw_[deg]': np.sin(time), 'PtfmSurge_[m]': 2 + np.cos(time/7)})
+        self.output_files = []
+        for name in ['mod_input_files_1', 'mod_input_files_2']:
+            os.makedirs(os.path.join(self.sims_folder, name))
+            self.output_files.append(os.path.join(self.sims_folder, name, 'a.outb'))
+            writeDataFrame(self.outdata, self.output_files[-1])
+
+    def tearDown(self):
+        shutil.rmtree(self.sims_folder, ignore_errors=True)
+
+    def test_roundtrip(self):
+        # same output file name in the two run folders: two runs
+        run_ids = archive_folder(self.archive_file, self.sims_folder, chunk_steps=64, dtype='float64')
+        self.assertEqual(sorted(run_ids), ['mod_input_files_1__a.outb', 'mod_input_files_2__a.outb'])
+        self.assertEqual(sorted(list_archive_runs(self.archive_file)), sorted(run_ids))
+
+        raw = read_output_channels(self.output_files[0], ['PtfmYaw_[deg]'], tmin=12.05, tmax=30)
+        archived = read_archive_channels(self.archive_file, run_ids[0], ['PtfmYaw'], tmin=12.05, tmax=30)
+        self.assertEqual(list(archived.columns), ['Time_[s]', 'PtfmYaw_[deg]'])
+        self.assertTrue(archived['Time_[s]'].min() >= 12.05 and archived['Time_[s]'].max() <= 30)
+        np.testing.assert_array_equal(archived.to_numpy(), raw.to_numpy())
+        with self.assertRaises(KeyError):
+            read_archive_channels(self.archive_file, run_ids[0], ['PtfmPitch'])
+
+        # run found in the archive also after the output file is removed
+        self.assertEqual(find_archive_run(self.archive_file, self.output_files[1]), 'mod_input_files_2__a.outb')
+        os.remove(self.output_files[1])
+        np.testing.assert_array_equal(read_output_channels(self.output_files[1], ['PtfmYaw_[deg]'], self.archive_file).to_numpy(),
+                                      read_output_channels(self.output_files[0], ['PtfmYaw_[deg]']).to_numpy())
+
+    def test_stats(self):
+        archive_folder(self.archive_file, self.sims_folder, chunk_steps=64, dtype='float64')
+        raw = read_output_channels(self.output_files[0], ['PtfmSurge_[m]'])
+        values = raw['PtfmSurge_[m]'].to_numpy()
+
+        chunk_stats = read_archive_chunk_stats(self.archive_file, 'mod_input_files_1__a.outb', 'PtfmSurge_[m]')
+        self.assertEqual(len(chunk_stats), int(np.ceil(len(values)/64)))
+        for kk, row in chunk_stats.iterrows():
+            chunk = values[kk*64:(kk+1)*64]
+            np.testing.assert_allclose([row['min'], row['max'], row['mean']], [chunk.min(), chunk.max(), chunk.mean()])
+            self.assertEqual(row['t_start'], raw['Time_[s]'].to_numpy()[kk*64])
+
+        stats = read_archive_stats(self.archive_file, 'PtfmSurge')
+        self.assertEqual(len(stats), 2)
+        np.testing.assert_allclose(stats.loc['mod_input_files_1__a.outb'].to_numpy(dtype=float),
+                                   [values.min(), values.max(), values.mean(), values.std()])
+        self.assertEqual(len(read_archive_stats(self.archive_file, 'PtfmPitch')), 0)
+
+if __name__ == '__main__':
+    unittest.main()
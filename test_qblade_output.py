@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:12:37 2026
+
+#  Tests of the reader of the QBlade output files (pyQBlade/qblade_output_file.py)
+
+@author: Guido Lazzerini
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from pyQBlade.qblade_output_file import QBladeOutputFile, read_qblade_body, read_qblade_header
+
+# Synthetic .outq: two header lines, channel names on the third line (trailing separator, as written by QBlade)
+NAMES = ['Time [s]', 'Thrust [kN]', 'NP Yaw Z_l [deg]', 'Azimuthal Position Blade 1']
+
+def _write_outq(filename, time, body_rows=None):
+    with open(filename, 'w') as f:
+        f.write('QBlade Output File\n')
+        f.write('Simulation: test\n')
+        f.write(','.join(NAMES) + ',\n')
+        if body_rows is None:
+            body_rows = [[t, 10 + t, np.sin(t), 2*t] for t in time]
+        for row in body_rows:
+            f.write(','.join([str(x) for x in row]) + ',\n')
+
+class TestQBladeOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'test.outq')
+        self.time = np.round(np.arange(0, 50, 0.5), 1)
+        _write_outq(self.filename, self.time)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_header(self):
+        self.assertEqual(read_qblade_header(self.filename), NAMES)
+
+    def test_channels(self):
+        # names with and without units, time always first
+        df = read_qblade_body(self.filename, channels=['NP Yaw Z_l', 'Thrust [kN]', 'Azimuthal Position Blade 1'])
+        self.assertEqual(list(df.columns), ['Time [s]', 'NP Yaw Z_l [deg]', 'Thrust [kN]', 'Azimuthal Position Blade 1'])
+        np.testing.assert_array_equal(df['Time [s]'].values, self.time)
+        np.testing.assert_allclose(df['Thrust [kN]'].values, 10 + self.time)
+        df = read_qblade_body(self.filename)
+        self.assertEqual(list(df.columns), NAMES)
+        self.assertEqual(df.shape, (len(self.time), len(NAMES)))
+        with self.assertRaises(KeyError):
+            read_qblade_body(self.filename, channels=['Power'])
+        with self.assertRaises(KeyError):
+            QBladeOutputFile(self.filename, channels=['Power'])
+
+    def test_window(self):
+        # time window read by chunks smaller than the file, bounds included
+        for chunksize in [7, 1000]:
+            df = read_qblade_body(self.filename, channels=['Thrust'], tmin=10, tmax=20.5, dtype='float32', chunksize=chunksize)
+            np.testing.assert_array_equal(df['Time [s]'].values, self.time[(self.time>=10) & (self.time<=20.5)])
+            self.assertEqual(df['Thrust [kN]'].dtype, np.float32)
+            self.assertEqual(list(df.index), list(range(len(df))))
+        df = read_qblade_body(self.filename, tmin=100, chunksize=7)
+        self.assertEqual(len(df), 0)
+
+    def test_csv_fallback(self):
+        # non numeric values: the file is read by the generic CSV reader, unless a selection is requested
+        rows = [[0.0, 1.0, 2.0, 0.0], [0.5, 1.5, 'ERR', 1.0], [1.0, 2.0, 4.0, 2.0]]
+        _write_outq(self.filename, None, rows)
+        with self.assertRaises(ValueError):
+            read_qblade_body(self.filename)
+        df = QBladeOutputFile(self.filename).toDataFrame()
+        self.assertEqual(list(df.columns[:len(NAMES)]), NAMES)
+        np.testing.assert_array_equal(df['Time [s]'].values, [0.0, 0.5, 1.0])
+        with self.assertRaises(Exception):
+            QBladeOutputFile(self.filename, tmin=0.5)
+        with self.assertRaises(Exception):
+            QBladeOutputFile(self.filename, channels=['NP Yaw Z_l'])
+        # channels without non numeric values are still read by the pandas parser
+        df = QBladeOutputFile(self.filename, channels=['Thrust']).toDataFrame()
+        np.testing.assert_array_equal(df['Thrust [kN]'].values, [1.0, 1.5, 2.0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:02:15 2026
+
+#  Tests of the store of the objective function values (resultstore.py)
+
+@author: Guido Lazzerini
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from resultstore import ResultStore, MemoizedTarget, FailedEvaluation
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = ResultStore(os.path.join(self.folder, 'results.sqlite'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_failed_not_stored(self):
+        self.assertFalse(self.store.put('model', [1.0, 2.0], FailedEvaluation(0.5)))
+        self.assertIsNone(self.store.get('model', [1.0, 2.0]))
+        self.assertTrue(self.store.put('model', [1.0, 2.0], 0.5))
+        self.assertEqual(self.store.get('model', [1.0, 2.0]), 0.5)
+
+    def test_memoized_target_retries_failed(self):
+        calls = []
+        def func(xx):
+            calls.append(list(xx))
+            return FailedEvaluation(9.0) if len(calls) == 1 else 1.0
+        target = MemoizedTarget(func, self.store, 'model')
+        self.assertEqual(target([1.0]), 9.0)
+        self.assertEqual(target([1.0]), 1.0)
+        self.assertEqual(target([1.0]), 1.0)
+        self.assertEqual(len(calls), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:05:12 2026
+
+#  Tests of the garbage collection of the run folders (rundir.py)
+
+@author: Guido Lazzerini
+
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from rundir import collect_run_folders
+
+class TestCollectRunFolders(unittest.TestCase):
+
+    def setUp(self):
+        self.sims_folder = tempfile.mkdtemp()
+        self.run_folder = os.path.join(self.sims_folder, 'mod_input_files_1')
+        os.makedirs(self.run_folder)
+        for x in ['a.fst', 'a.outb', 'a.MD.out', 'a.MD.Line1.out']:
+            with open(os.path.join(self.run_folder, x), 'w') as f:
+                f.write(x)
+        old = time.time() - 3600
+        for x in os.listdir(self.run_folder) + ['']:
+            os.utime(os.path.join(self.run_folder, x), (old, old))
+        # only the main output is archived
+        self.archived = {os.path.join(self.run_folder, 'a.outb'): time.time()}
+
+    def tearDown(self):
+        shutil.rmtree(self.sims_folder, ignore_errors=True)
+
+    def test_compact_keeps_outputs_not_archived(self):
+        self.assertEqual(collect_run_folders(self.sims_folder, self.archived, policy='compact'), 1)
+        self.assertEqual(sorted(os.listdir(self.run_folder)), ['a.MD.Line1.out', 'a.MD.out', 'a.fst'])
+
+    def test_delete_keeps_outputs_not_archived(self):
+        self.assertEqual(collect_run_folders(self.sims_folder, self.archived, policy='delete'), 1)
+        self.assertEqual(sorted(os.listdir(self.run_folder)), ['a.MD.Line1.out', 'a.MD.out', 'a.fst'])
+
+    def test_not_archived(self):
+        self.assertEqual(collect_run_folders(self.sims_folder, {}, policy='compact'), 0)
+        self.assertEqual(len(os.listdir(self.run_folder)), 4)
+
+    def test_outputs_not_archived_option(self):
+        # only the per-line MoorDyn outputs not archived: "a.MD.out" blocks the folder
+        self.assertEqual(collect_run_folders(self.sims_folder, self.archived, policy='compact', not_archived=['.MD.Line']), 0)
+        self.assertEqual(len(os.listdir(self.run_folder)), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:31:40 2026
+
+#  Tests of the peak tracking on the fixed frequency grid (timetofreqdomain.py)
+
+@author: Guido Lazzerini
+
+"""
+import unittest
+
+import numpy as np
+
+from timetofreqdomain import fixed_freq_grid, track_peaks
+
+class TestTrackPeaks(unittest.TestCase):
+
+    def setUp(self):
+        self.freqs = fixed_freq_grid(f_max=0.25, df=0.001)
+
+    def test_peak_inside(self):
+        psd = np.exp(-((self.freqs - 0.1003)/0.01)**2)
+        freq_peak, psd_peak = track_peaks(self.freqs, psd[:, None], axis=0)
+        np.testing.assert_allclose(freq_peak, [0.1003], atol=1e-4)
+        np.testing.assert_allclose(psd_peak, [1.0], atol=1e-4)
+
+    def test_peak_last_bin(self):
+        psd = 32*self.freqs**2
+        freq_peak, psd_peak = track_peaks(self.freqs, psd[:, None], axis=0)
+        np.testing.assert_allclose(freq_peak, [0.25])
+        np.testing.assert_allclose(psd_peak, [2.0])
+
+    def test_peak_first_bin(self):
+        psd = 2 - 32*self.freqs**2
+        freq_peak, psd_peak = track_peaks(self.freqs, psd[:, None], axis=0)
+        np.testing.assert_allclose(freq_peak, [0.0])
+        np.testing.assert_allclose(psd_peak, [2.0])
+
+if __name__ == '__main__':
+    unittest.main()
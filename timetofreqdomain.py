@@ -20,10 +20,55 @@ Analyse time series in the frequency domain
             If `padded_length` is even, the length of the transformed axis is ``(padded_length/2)+1``.
             If `padded_length` is odd, the length is ``(padded_length+1)/2``.)
     "fourier_transform_norm"
+
+## function name: 
+    "freq_domain_batch"
+## inputs: 
+    "data" (time series of the channels to be analysed, numpy array [N x n_channels])
+    "time" (time series of time instants, in "s", numpy vector [Nx1])
+    "padded_length" (number of points of the fourier transform: integer, None for N, 'fast' for the first length >= N
+                     with small prime factors, planned by scipy.fft.next_fast_len)
+## outputs:
+    "freqs", "power_spectrum", "fourier_transform", "fourier_transform_norm" as "freq_domain_data", one column per channel,
+    computed by one batched real FFT of all the channels
+
+## function name: 
+    "spectral_peaks"
+## outputs:
+    dict with the outputs of "freq_domain_batch" and the peak frequency and amplitude of the PSD and of the normalized FFT
+    of each channel ("freq_PSDpeak", "PSDpeak", "freq_FFTpeak", "FFTpeak", numpy vectors [n_channels])
+
+## function name: 
+    "plot_freq_domain" (plots of the PSD and of the normalized FFT of one channel, separate from the analysis, drawn at once
+                        or queued in "plot_queue", see plotservice.py; "freq_domain_specs" returns the specs of the figures)
+
+## function name: 
+    "psd_fixed_grid"
+## inputs: 
+    "data", "time" as "freq_domain_batch"
+    "freq_grid" (frequencies of the PSD, shared by all the runs, default "fixed_freq_grid()" up to 0.25 Hz every 0.001 Hz)
+    "method" ('welch': average of the periodograms of overlapping Hann windowed segments of "segment_time" s,
+              overlapping by "overlap" (fraction); 'multitaper': average of the periodograms of the whole series
+              windowed by the 2*NW-1 DPSS tapers of time-bandwidth "NW")
+## outputs:
+    "psd" (one-sided power spectral density on "freq_grid", numpy array [n_freqs x n_channels]), independent of the
+    length of the run, so that the spectra of different runs can be stacked ("stack_spectra") and compared ("track_peaks")
+
+## function name: 
+    "track_peaks"
+## inputs: 
+    "freqs" (frequency grid), "psd" (spectra with the frequencies along "axis", e.g. [n_runs x n_freqs x n_channels])
+    "band" (optional, frequency band (f_min, f_max) of the peak)
+## outputs:
+    "freq_peak", "psd_peak" (frequency, refined by parabolic interpolation of the three bins around the maximum, and value
+    of the peak of each spectrum)
     
 """
-import matplotlib.pyplot as plt
 import numpy as np
+import scipy.fft
+import scipy.signal
+
+from plotservice import line_spec, render_specs
 
 def freq_domain_data(data,time,padded_length=None,folder_path='unused',plot_flag=True,plot_name = 'unused'):
             
@@ -61,33 +106,165 @@ def freq_domain_data(data,time,padded_length=None,folder_path='unused',plot_flag
     
     fourier_transform_norm = np.abs(fourier_transform)/(N/2) # https://dsp.stackexchange.com/questions/66058/am-i-supposed-to-normalize-fft-in-python
     
+    # plot frequency domain analyses data
+    
+    if plot_flag:
+        plot_freq_domain(freqs,power_spectrum,fourier_transform_norm,folder_path=folder_path,plot_name=plot_name)
+    
+    return freqs, power_spectrum , fourier_transform, fourier_transform_norm
+
+def freq_domain_specs(freqs,power_spectrum,fourier_transform_norm,folder_path='unused',plot_name = 'unused'):
+    
     freq_PSDpeak = freqs[np.argmax(power_spectrum)]
     PSDpeak = max(power_spectrum)
 
     freq_FFTpeak = freqs[np.argmax(fourier_transform_norm)]
-    FFTpeak = max(fourier_transform_norm)    
-    # plot frequency domain analyses data
+    FFTpeak = max(fourier_transform_norm)
     
-    if plot_flag:
-        plt.xlabel('f (Hz)')
-        plt.ylabel('PSD (sig^2/Hz)')
-        plt.xlim([0,0.25])
-        plt.title('{name} PSD'.format(name=plot_name))
-        plt.plot(freqs,power_spectrum)
-        plt.text(freq_PSDpeak+freq_PSDpeak*0.125,PSDpeak-PSDpeak*0.05,f"f={freq_PSDpeak:5.3f} Hz")
-        plt.text(freq_PSDpeak+freq_PSDpeak*0.125,PSDpeak-PSDpeak*0.10,f"T={1/freq_PSDpeak:5.2f} s")
-        plt.savefig(folder_path+"\\output_{name}_PSD.png".format(name=plot_name)) #save as png
-        plt.clf()
-        
-        plt.xlabel('f (Hz)')
-        plt.ylabel('FFT (sig)')
-        plt.xlim([0,0.25])
-        plt.title('{name} FFT Normalized'.format(name=plot_name))
-        plt.plot(freqs,fourier_transform_norm)
-        plt.text(freq_FFTpeak+freq_FFTpeak*0.125,FFTpeak-FFTpeak*0.05,f"f={freq_FFTpeak:5.3f} Hz")
-        plt.text(freq_FFTpeak+freq_FFTpeak*0.125,FFTpeak-FFTpeak*0.10,f"T={1/freq_FFTpeak:5.2f} s")
-        plt.savefig(folder_path+"\\output_{name}_fft.png".format(name=plot_name)) #save as png
-        plt.clf()
-        
-    
-    return freqs, power_spectrum , fourier_transform, fourier_transform_norm
\ No newline at end of file
+    psd_spec = line_spec([(freqs,power_spectrum,None)], title='{name} PSD'.format(name=plot_name),
+                         xlabel='f (Hz)', ylabel='PSD (sig^2/Hz)', xlim=[0,0.25],
+                         texts=[(freq_PSDpeak+freq_PSDpeak*0.125,PSDpeak-PSDpeak*0.05,f"f={freq_PSDpeak:5.3f} Hz"),
+                                (freq_PSDpeak+freq_PSDpeak*0.125,PSDpeak-PSDpeak*0.10,f"T={1/freq_PSDpeak:5.2f} s")],
+                         file=folder_path+"\\output_{name}_PSD.png".format(name=plot_name), group=folder_path)
+    
+    fft_spec = line_spec([(freqs,fourier_transform_norm,None)], title='{name} FFT Normalized'.format(name=plot_name),
+                         xlabel='f (Hz)', ylabel='FFT (sig)', xlim=[0,0.25],
+                         texts=[(freq_FFTpeak+freq_FFTpeak*0.125,FFTpeak-FFTpeak*0.05,f"f={freq_FFTpeak:5.3f} Hz"),
+                                (freq_FFTpeak+freq_FFTpeak*0.125,FFTpeak-FFTpeak*0.10,f"T={1/freq_FFTpeak:5.2f} s")],
+                         file=folder_path+"\\output_{name}_fft.png".format(name=plot_name), group=folder_path)
+    
+    return [psd_spec, fft_spec]
+
+def plot_freq_domain(freqs,power_spectrum,fourier_transform_norm,folder_path='unused',plot_name = 'unused',plot_queue=None):
+    
+    specs = freq_domain_specs(freqs,power_spectrum,fourier_transform_norm,folder_path=folder_path,plot_name=plot_name)
+    if plot_queue is not None:
+        plot_queue.add(specs)
+    else:
+        render_specs(specs)
+
+def freq_domain_batch(data,time,padded_length=None):
+    
+    data = np.asarray(data, dtype=float)
+    if data.ndim == 1:
+        data = data[:, None]
+    
+    fs = 1/(time[1]-time[0]) # frequency of the sampled data (calculated from the first two instants) [hz]
+    
+    df = 1/max(time) # minimum resolution in frequency of the sampled data (calculated from last instant) [hz]
+    
+    N = data.shape[0] # number of sampled data
+    
+    if padded_length is None:
+        padded_length = N
+    elif padded_length == 'fast':
+        padded_length = scipy.fft.next_fast_len(N, real=True)
+    elif not isinstance(padded_length,int):
+        raise ValueError("Non integer number of points")
+    
+    # one-dimensional discrete Fourier Transform for real input of all the channels (columns) at once
+    fourier_transform = scipy.fft.rfft(data-np.mean(data, axis=0), n=padded_length, axis=0)
+    
+    N_trasf = fourier_transform.shape[0]
+    
+    # calculate power spectrum and frequency vector
+    
+    fourier_transform_abs = np.abs(fourier_transform)
+    
+    power_spectrum = (fourier_transform_abs**2/(N)**2)/df
+    
+    freqs = np.linspace(0, fs/2, N_trasf) # vector of the frequencies analysed
+    
+    fourier_transform_norm = fourier_transform_abs/(N/2)
+    
+    return freqs, power_spectrum, fourier_transform, fourier_transform_norm
+
+def spectral_peaks(data,time,padded_length=None):
+    
+    freqs, power_spectrum, fourier_transform, fourier_transform_norm = freq_domain_batch(data,time,padded_length=padded_length)
+    
+    return {'freqs': freqs, 'power_spectrum': power_spectrum, 'fourier_transform': fourier_transform,
+            'fourier_transform_norm': fourier_transform_norm,
+            'freq_PSDpeak': freqs[np.argmax(power_spectrum, axis=0)], 'PSDpeak': np.max(power_spectrum, axis=0),
+            'freq_FFTpeak': freqs[np.argmax(fourier_transform_norm, axis=0)], 'FFTpeak': np.max(fourier_transform_norm, axis=0)}
+
+def fixed_freq_grid(f_max=0.25,df=0.001):
+    
+    return np.arange(0, int(round(f_max/df))+1)*df
+
+def psd_fixed_grid(data,time,freq_grid=None,method='welch',segment_time=200.0,overlap=0.5,NW=2):
+    
+    data = np.asarray(data, dtype=float)
+    if data.ndim == 1:
+        data = data[:, None]
+    if freq_grid is None:
+        freq_grid = fixed_freq_grid()
+    
+    fs = 1/(time[1]-time[0]) # frequency of the sampled data (calculated from the first two instants) [hz]
+    N = data.shape[0]
+    df_grid = freq_grid[1]-freq_grid[0]
+    
+    if method == 'welch':
+        nperseg = min(N, int(round(segment_time*fs)))
+        # FFT length giving frequencies on the grid spacing (bins aligned with the grid if fs/df_grid is integer)
+        nfft = max(nperseg, int(round(fs/df_grid)))
+        freqs, psd = scipy.signal.welch(data, fs=fs, window='hann', nperseg=nperseg, noverlap=int(overlap*nperseg),
+                                        nfft=nfft, detrend='constant', scaling='density', axis=0)
+    elif method == 'multitaper':
+        tapers = scipy.signal.windows.dpss(N, NW, Kmax=int(2*NW-1)) # K tapers with unit energy
+        nfft = max(N, int(round(fs/df_grid)))
+        tapered_ft = scipy.fft.rfft(tapers[:, :, None]*(data-np.mean(data, axis=0))[None, :, :], n=nfft, axis=1)
+        psd = np.mean(np.abs(tapered_ft)**2, axis=0)/fs
+        psd[1:-1] *= 2 # one-sided spectrum (Nyquist bin not doubled for even "nfft")
+        if nfft % 2 == 1:
+            psd[-1] *= 2
+        freqs = np.fft.rfftfreq(nfft, 1/fs)
+    else:
+        raise ValueError("Unknown PSD method {}".format(method))
+    
+    # PSD on the shared grid (exact if the bins are aligned with the grid, linear interpolation otherwise)
+    psd_grid = np.empty((len(freq_grid), data.shape[1]))
+    for kk in range(data.shape[1]):
+        psd_grid[:,kk] = np.interp(freq_grid, freqs, psd[:,kk], right=np.nan)
+    
+    return psd_grid
+
+def track_peaks(freqs,psd,band=None,axis=-2):
+    
+    psd = np.moveaxis(np.asarray(psd, dtype=float), axis, -1)
+    if band is not None:
+        psd = np.where((freqs >= band[0]) & (freqs <= band[1]), psd, -np.inf)
+    psd = np.where(np.isnan(psd), -np.inf, psd)
+    
+    kk = np.argmax(psd, axis=-1)
+    inside = (kk > 0) & (kk < len(freqs)-1)
+    y0 = np.take_along_axis(psd, np.maximum(kk-1, 0)[..., None], axis=-1)[..., 0]
+    y1 = np.take_along_axis(psd, kk[..., None], axis=-1)[..., 0]
+    y2 = np.take_along_axis(psd, np.minimum(kk+1, len(freqs)-1)[..., None], axis=-1)[..., 0]
+    
+    # vertex of the parabola through the three bins around the maximum (maxima in the first/last bin of the grid and
+    # bins at the edges of the band are not refined)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        denominator = y0 - 2*y1 + y2
+        shift = np.where(inside & np.isfinite(denominator) & (denominator < 0), 0.5*(y0 - y2)/denominator, 0.0)
+    shift = np.clip(np.nan_to_num(shift), -0.5, 0.5)
+    df = freqs[1]-freqs[0]
+    freq_peak = freqs[kk] + shift*df
+    psd_peak = np.where(shift != 0, y1 - 0.25*(y0 - y2)*shift, y1)
+    
+    return freq_peak, psd_peak
+
+def stack_spectra(spectra_files):
+    
+    freq_grid = None
+    psd = []
+    for spectra_file in spectra_files:
+        with np.load(spectra_file) as spectra:
+            if freq_grid is None:
+                freq_grid = spectra['freq_grid']
+                channels = [str(channel) for channel in spectra['channels']]
+            elif not np.array_equal(freq_grid, spectra['freq_grid']):
+                raise ValueError("Spectra of {} not on the shared frequency grid".format(spectra_file))
+            psd.append(spectra['psd'])
+    
+    return freq_grid, np.stack(psd), channels
@@ -102,6 +102,12 @@ class TurbModel(object):
         d['value']=val
         self.data.append(d)
     
+    def getOption(self,key,default=None):
+        # value of an entry of the 'OPTIONS' dictionary, default if 'OPTIONS' or the entry are not defined
+        if self.getIDSafe('OPTIONS')<0:
+            return default
+        return self['OPTIONS'].get(key,default)
+    
     def fromQBladeModel(self,file):
         return
     
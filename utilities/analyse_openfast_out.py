@@ -5,11 +5,16 @@ Created on Tue Feb 21 12:20:43 2023
 @author: guila
 """
 
+import os
+import sys
 from pyFAST.input_output.fast_output_file import FASTOutputFile
 import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from postproc_archive import read_output_channels
+
 
 #Options
 params = {'text.usetex' : True,
@@ -90,10 +95,21 @@ def freq_domain_data(data,time,padded_length=None,folder_path='unused',plot_flag
 folder_path = r"C:\FOWT_optim_SOFTWIND_rev5\FOWT_optim_test\sims\baseline_input_files_triple_spar_heave_thrust"
 output_filename = r'\DTU10MW3Spar_Param_MPHC_par.outb'
 
-outdata=FASTOutputFile(folder_path+output_filename).toDataFrame()
+# archive of the outputs (postproc_archive.py), e.g. sims folder + 'outputs_archive.h5', the output file is read if None
+# or if the run is not archived
+archive_file = None
+
+bladepitch_output = False
 
 evalTime = 0
 
+# only the analysed channels are read, from evalTime
+channels = ["PtfmRoll_[deg]", "PtfmPitch_[deg]", "PtfmYaw_[deg]", "PtfmSurge_[m]", "PtfmSway_[m]", "PtfmHeave_[m]",
+            "RotThrust_[kN]", "RotSpeed_[rpm]"]
+if bladepitch_output == True:
+    channels += ["PtchPMzc1_[deg]", "PtchPMzc2_[deg]", "PtchPMzc3_[deg]"]
+outdata = read_output_channels(folder_path+output_filename, channels, archive_file, tmin=evalTime)
+
 outdata = outdata[outdata["Time_[s]"]>evalTime]
 
 
@@ -316,8 +332,6 @@ plt.xlim(evalTime, time[-1])
 plt.savefig(folder_path+"\\output_rotspeed_time_history.png") #save as png
 plt.clf()
 
-bladepitch_output = False
-
 if bladepitch_output == True:
 
     bladepitch1 = outdata["PtchPMzc1_[deg]"].to_numpy()[:]
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:10:37 2026
+
+Benchmark of the readers of OpenFAST binary output files (.outb) on large synthetic files:
+ - legacy buffered reader (struct.unpack of each buffer and scaling loop over the channels, copied below as reference)
+ - current reader (pyFAST load_binary_output, np.fromfile and vectorized scaling)
+ - memory-mapped reader of a few channels (pyFAST FASTOutputBinaryMap)
+
+Usage (from the main folder): python utilities/benchmark_fast_output.py --size-gb 2 --channels 120
+
+@author: Guido Lazzerini
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyFAST.input_output.fast_output_file import load_binary_output, FASTOutputBinaryMap
+
+# Write a synthetic binary output file (FileID=2) of about "size_gb" GB with "n_channels" channels, in chunks
+def write_synthetic_outb(filename, size_gb, n_channels, dt=0.0125, chunk_steps=200000):
+
+    n_steps = int(size_gb*1024**3/(2*n_channels))
+    names = ['Time'] + ['Chan%d' % kk for kk in range(1, n_channels+1)]
+    units = ['(s)'] + ['(-)']*n_channels
+    rng = np.random.default_rng(0)
+
+    with open(filename, 'wb') as fid:
+        fid.write(struct.pack('@h', 2))
+        fid.write(struct.pack('@i', n_channels))
+        fid.write(struct.pack('@i', n_steps))
+        fid.write(struct.pack('@d', 0.0))
+        fid.write(struct.pack('@d', dt))
+        fid.write(rng.uniform(1, 100, n_channels).astype(np.float32).tobytes())   # ColScl
+        fid.write(rng.uniform(-10, 10, n_channels).astype(np.float32).tobytes())  # ColOff
+        desc = b'Synthetic file for the benchmark of the binary readers'
+        fid.write(struct.pack('@i', len(desc)))
+        fid.write(desc)
+        for name in names:
+            fid.write(name.ljust(10).encode('ascii'))
+        for unit in units:
+            fid.write(unit.ljust(10).encode('ascii'))
+        steps_written = 0
+        while steps_written < n_steps:
+            steps = min(chunk_steps, n_steps - steps_written)
+            fid.write(rng.integers(-32768, 32767, size=(steps, n_channels), dtype=np.int16).tobytes())
+            steps_written += steps
+
+    return n_steps
+
+# Legacy buffered reader of the channel data of a FileID=2 file (struct.unpack and scaling loop), used as reference
+def load_binary_output_struct(filename):
+
+    def fread(fid, n, type):
+        fmt, nbytes = {'uint8': ('B', 1), 'int16':('h', 2), 'int32':('i', 4), 'float32':('f', 4), 'float64':('d', 8)}[type]
+        return struct.unpack(fmt * n, fid.read(nbytes * n))
+
+    with open(filename, 'rb') as fid:
+        FileID = fread(fid, 1, 'int16')[0]
+        LenName = fread(fid, 1, 'int16')[0] if FileID == 4 else 10
+        NumOutChans = fread(fid, 1, 'int32')[0]
+        NT = fread(fid, 1, 'int32')[0]
+        TimeOut1 = fread(fid, 1, 'float64')[0]
+        TimeIncr = fread(fid, 1, 'float64')[0]
+        ColScl = fread(fid, NumOutChans, 'float32')
+        ColOff = fread(fid, NumOutChans, 'float32')
+        LenDesc = fread(fid, 1, 'int32')[0]
+        fread(fid, LenDesc, 'uint8')
+        fread(fid, 2*LenName*(NumOutChans + 1), 'uint8')
+
+        n = NT*NumOutChans
+        nLinesPerBuffer = int(4096*40/NumOutChans)
+        BufferSize = NumOutChans*nLinesPerBuffer
+        data = np.zeros((NT, NumOutChans+1), dtype='float64')
+        nIntRead = 0
+        nLinesRead = 0
+        while nIntRead < n:
+            nIntToRead = min(n-nIntRead, BufferSize)
+            nLinesToRead = int(nIntToRead/NumOutChans)
+            Buffer = np.array(struct.unpack('h' * nIntToRead, fid.read(2 * nIntToRead))).reshape(-1, NumOutChans)
+            data[nLinesRead:(nLinesRead+nLinesToRead), 1:] = Buffer
+            nLinesRead = nLinesRead + nLinesToRead
+            nIntRead = nIntRead + nIntToRead
+
+    for iCol in range(NumOutChans):
+        if np.isnan(ColScl[iCol]) and np.isnan(ColOff[iCol]):
+            data[:, iCol+1] = 0
+        else:
+            data[:, iCol+1] = (data[:, iCol+1] - ColOff[iCol]) / ColScl[iCol]
+    data[:, 0] = TimeOut1 + TimeIncr * np.arange(NT)
+
+    return data
+
+def timed(label, function, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    print('%-45s %8.2f s' % (label, elapsed))
+    return result, elapsed
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark of the readers of OpenFAST binary output files')
+    parser.add_argument('--size-gb', type=float, default=2.0, help='size of the synthetic file [GB]')
+    parser.add_argument('--channels', type=int, default=120, help='number of channels of the synthetic file')
+    parser.add_argument('--file', default='benchmark_synthetic.outb', help='synthetic file (kept if --keep)')
+    parser.add_argument('--skip-legacy', action='store_true', help='do not run the legacy struct reader (very slow on multi-GB files)')
+    parser.add_argument('--keep', action='store_true', help='keep the synthetic file')
+    args = parser.parse_args()
+
+    n_steps = write_synthetic_outb(args.file, args.size_gb, args.channels)
+    print('Synthetic file: %s, %.2f GB, %d channels, %d time steps' % (args.file, os.path.getsize(args.file)/1024**3, args.channels, n_steps))
+
+    (data, info), t_new = timed('np.fromfile reader (load_binary_output)', load_binary_output, args.file)
+
+    with FASTOutputBinaryMap(args.file) as B:
+        names = info['attribute_names'][1:6]
+        (time_sel, data_sel), t_map = timed('memory-mapped, 5 channels, 2nd half of time', B.channels, names, tmin=data[-1, 0]/2)
+        np.testing.assert_array_equal(data_sel, data[data[:, 0] >= data[-1, 0]/2][:, 1:6])
+
+    if not args.skip_legacy:
+        data_legacy, t_legacy = timed('legacy struct reader', load_binary_output_struct, args.file)
+        np.testing.assert_array_equal(data, data_legacy)
+        print('Speed-up of the np.fromfile reader: %.1fx' % (t_legacy/t_new))
+        print('Speed-up of the memory-mapped reader (5 channels): %.1fx' % (t_legacy/t_map))
+
+    if not args.keep:
+        os.remove(args.file)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:12:41 2026
+
+Benchmark of the rainflow counting of pyFAST.tools.fatigue on synthetic load channels (sea-state like signals):
+ - reference counting (rainflow_windap, rainflow_astm: loops over all the samples)
+ - fast counting (rainflow_windap_fast, rainflow_astm_fast: vectorized turning points, counting on the turning points)
+The equivalent loads of the two are checked to be identical.
+
+Usage (from the main folder): python utilities/benchmark_rainflow.py --duration 3600 --dt 0.0125 --channels 6
+
+@author: Guido Lazzerini
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pyFAST.tools.fatigue import eq_load, eq_load_channels, rainflow_windap, rainflow_astm, rainflow_windap_fast, rainflow_astm_fast
+
+# Synthetic channels: sum of wave-frequency components with random phases, low-frequency drift and noise
+def synthetic_channels(duration, dt, n_channels, seed=0):
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(0, duration, dt)
+    freqs = np.linspace(0.05, 0.25, 40)
+    signals = np.zeros((len(t), n_channels))
+    for i in range(n_channels):
+        phases = rng.uniform(0, 2*np.pi, len(freqs))
+        amplitudes = rng.uniform(0.5, 1.5, len(freqs))
+        signals[:, i] = np.sin(2*np.pi*np.outer(t, freqs) + phases) @ amplitudes + 5*np.sin(2*np.pi*0.008*t) \
+                        + 0.2*rng.standard_normal(len(t))
+
+    return signals
+
+def timed(label, function, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - t0
+    print('%-45s %8.2f s' % (label, elapsed))
+    return result, elapsed
+
+def eq_load_loop(signals, rainflow_func, neq):
+    return np.array([eq_load(signals[:, i].copy(), neq=neq, rainflow_func=rainflow_func) for i in range(signals.shape[1])])
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark of the rainflow counting of pyFAST.tools.fatigue')
+    parser.add_argument('--duration', type=float, default=3600.0, help='duration of the synthetic signals [s]')
+    parser.add_argument('--dt', type=float, default=0.0125, help='time step of the synthetic signals [s]')
+    parser.add_argument('--channels', type=int, default=6, help='number of channels')
+    args = parser.parse_args()
+
+    signals = synthetic_channels(args.duration, args.dt, args.channels)
+    print('Synthetic signals: %d time steps, %d channels' % signals.shape)
+
+    for label, reference, fast in [('WINDAP', rainflow_windap, rainflow_windap_fast), ('ASTM', rainflow_astm, rainflow_astm_fast)]:
+        leq_ref, t_ref = timed('%s reference (eq_load of each channel)' % label, eq_load_loop, signals, reference, args.duration)
+        leq_fast, t_fast = timed('%s fast (eq_load_channels)' % label, eq_load_channels, signals, neq=args.duration, rainflow_func=fast)
+        np.testing.assert_array_equal(leq_ref, leq_fast)
+        print('Speed-up of the %s fast counting: %.1fx' % (label, t_ref/t_fast))